@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import cv2
+from utils.job_manager import init_worker, analyze_file, analyze_frames, list_images
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+
+
+def iter_image_batches(directory, batch_size):
+    """Yield batches of image paths (decoded inside the workers)"""
+    paths = list_images(directory)
+    for start in range(0, len(paths), batch_size):
+        yield [{"source": path, "frame_index": 0} for path in paths[start:start + batch_size]]
+
+
+def iter_video_batches(video_path, batch_size, stride):
+    """
+    Yield batches of consecutive frames, decoding the video as a stream
+    
+    Only the current batch is held here; the caller bounds how many batches
+    are in flight, so memory stays flat regardless of the video's size.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video {video_path}")
+    
+    batch = []
+    frame_index = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            
+            if frame_index % stride == 0:
+                batch.append({
+                    "source": video_path,
+                    "frame_index": frame_index,
+                    "timestamp_ms": round(cap.get(cv2.CAP_PROP_POS_MSEC), 1),
+                    "frame": frame
+                })
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            frame_index += 1
+    finally:
+        cap.release()
+    
+    if batch:
+        yield batch
+
+
+def run_batch(batch):
+    """
+    Worker entry point: analyze one batch of images or video frames
+    
+    Track IDs are dropped from the faces: batches of one video run on
+    different workers, each with a fresh tracker, so the same ID would
+    name different people across batches.
+    """
+    if "frame" in batch[0]:
+        predictions = analyze_frames([item["frame"] for item in batch])
+        results = [{"success": True, "predictions": p} for p in predictions]
+    else:
+        results = [analyze_file(item["source"]) for item in batch]
+    
+    for result in results:
+        for face in result.get("predictions", {}).get("faces", []):
+            face.pop("track_id", None)
+    
+    return [
+        {**{k: v for k, v in item.items() if k != "frame"}, **result}
+        for item, result in zip(batch, results)
+    ]
+
+
+class JsonlWriter:
+    """One JSON line per frame/image"""
+    
+    def __init__(self, path):
+        self.file = open(path, "w") if path != "-" else sys.stdout
+    
+    def write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+    
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+class ParquetWriter:
+    """One flat row per face, written in row groups"""
+    
+    COLUMNS = [
+        "source", "frame_index", "timestamp_ms", "face_index",
+        "x", "y", "w", "h", "age", "age_midpoint", "gender", "emotion",
+        "emotion_confidence", "smile_score", "is_smiling", "blur_score", "is_clear"
+    ]
+    
+    def __init__(self, path, row_group_size=10000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("❌ Parquet output needs pyarrow (pip install pyarrow)")
+        
+        self.pa = pa
+        self.writer = None
+        self.pq = pq
+        self.path = path
+        self.rows = []
+        self.row_group_size = row_group_size
+    
+    def write(self, record):
+        if not record.get("success"):
+            return
+        for face_index, face in enumerate(record["predictions"]["faces"]):
+            bbox = face["bbox"]
+            self.rows.append({
+                "source": record["source"],
+                "frame_index": record["frame_index"],
+                "timestamp_ms": record.get("timestamp_ms"),
+                "face_index": face_index,
+                "x": bbox["x"], "y": bbox["y"], "w": bbox["w"], "h": bbox["h"],
+                "age": face["age"],
+                "age_midpoint": face["age_midpoint"],
+                "gender": face["gender"],
+                "emotion": face["emotion"],
+                "emotion_confidence": face["emotion_confidence"],
+                "smile_score": face["smile_score"],
+                "is_smiling": face["is_smiling"],
+                "blur_score": face["blur_score"],
+                "is_clear": face["is_clear"]
+            })
+        if len(self.rows) >= self.row_group_size:
+            self._flush()
+    
+    def _flush(self):
+        if not self.rows:
+            return
+        table = self.pa.Table.from_pylist(self.rows)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+        self.rows = []
+    
+    def close(self):
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+def batch_process(input_path, output, output_format, workers, batch_size, stride):
+    """Run the model stack over a directory of images or a video file"""
+    
+    print("="*60, file=sys.stderr)
+    print("🧮 Smilage Batch Processor", file=sys.stderr)
+    print("="*60, file=sys.stderr)
+    
+    if os.path.isdir(input_path):
+        batches = iter_image_batches(input_path, batch_size)
+    elif input_path.lower().endswith(VIDEO_EXTENSIONS):
+        batches = iter_video_batches(input_path, batch_size, stride)
+    else:
+        raise SystemExit(f"❌ Input must be a directory or a video file ({', '.join(VIDEO_EXTENSIONS)})")
+    
+    writer = ParquetWriter(output) if output_format == "parquet" else JsonlWriter(output)
+    print(f"📂 Input: {input_path}", file=sys.stderr)
+    print(f"💾 Output: {output} ({output_format})", file=sys.stderr)
+    print(f"⚙️  Workers: {workers}, batch size: {batch_size}\n", file=sys.stderr)
+    
+    processed = 0
+    faces = 0
+    start = time.perf_counter()
+    last_report = start
+    
+    # Results are written in input order; batches finishing early wait here
+    in_flight = {}
+    finished = {}
+    next_submit = 0
+    next_write = 0
+    batches = iter(batches)
+    exhausted = False
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        while True:
+            # Keep a bounded number of batches in flight (bounded memory)
+            while not exhausted and len(in_flight) + len(finished) < workers * 2:
+                batch = next(batches, None)
+                if batch is None:
+                    exhausted = True
+                    break
+                in_flight[executor.submit(run_batch, batch)] = next_submit
+                next_submit += 1
+            
+            if not in_flight and not finished:
+                break
+            
+            if in_flight:
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for future in done:
+                    finished[in_flight.pop(future)] = future.result()
+            
+            while next_write in finished:
+                for record in finished.pop(next_write):
+                    writer.write(record)
+                    processed += 1
+                    if record.get("success"):
+                        faces += len(record["predictions"]["faces"])
+                next_write += 1
+            
+            now = time.perf_counter()
+            if now - last_report >= 2.0:
+                last_report = now
+                print(f"   {processed} frames, {processed / (now - start):.1f} frames/sec", file=sys.stderr)
+    
+    writer.close()
+    elapsed = time.perf_counter() - start
+    
+    print("\n" + "="*60, file=sys.stderr)
+    print(f"✅ Processed {processed} frames, {faces} faces in {elapsed:.1f}s", file=sys.stderr)
+    print(f"📊 Throughput: {processed / elapsed if elapsed else 0:.1f} frames/sec", file=sys.stderr)
+    print("="*60, file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Headless age/gender/emotion/smile analysis of image directories and video files"
+    )
+    parser.add_argument("input", help="Directory of JPEG/PNG images or a video file")
+    parser.add_argument("-o", "--output", default="-", help="Output file ('-' for stdout, JSONL only)")
+    parser.add_argument("-f", "--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("-b", "--batch-size", type=int, default=16, help="Images/frames per worker task")
+    parser.add_argument("--stride", type=int, default=1, help="Process every Nth video frame")
+    args = parser.parse_args()
+    
+    if args.format == "parquet" and args.output == "-":
+        parser.error("Parquet output needs an --output file")
+    
+    batch_process(args.input, args.output, args.format, args.workers, args.batch_size, max(args.stride, 1))
+
+
+if __name__ == "__main__":
+    main()
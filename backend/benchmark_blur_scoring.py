@@ -0,0 +1,90 @@
+import sys
+import time
+import cv2
+import numpy as np
+from utils.face_detector import FaceDetector
+from utils.sharpness import SharpnessMap
+
+# Regions scored per frame: the detected faces, topped up with random
+# candidate boxes (as in best-shot selection)
+REGION_COUNTS = (1, 4, 16, 64)
+
+def benchmark_blur_scoring(source=0, max_frames=100):
+    """Compare per-crop Laplacian variance against the integral-image SharpnessMap"""
+    
+    print("="*60)
+    print("⏱️  Benchmarking Blur Scoring: per-crop vs integral image")
+    print("="*60)
+    print("\nUsage: python benchmark_blur_scoring.py [video_file] [max_frames]")
+    print("  (defaults to the webcam and 100 frames)\n")
+    
+    detector = FaceDetector(mode="full")
+    
+    cap = cv2.VideoCapture(source)
+    
+    if not cap.isOpened():
+        print(f"❌ Error: Cannot open source {source}")
+        return
+    
+    # Grayscale up front: both methods get the shared per-frame grayscale
+    grays = []
+    while len(grays) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        grays.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    cap.release()
+    
+    if not grays:
+        print("❌ Error: No frames read")
+        return
+    
+    height, width = grays[0].shape
+    print(f"📸 Loaded {len(grays)} frames ({width}x{height})\n")
+    
+    rng = np.random.default_rng(0)
+    faces = [[tuple(int(v) for v in face) for face in detector.detect_faces(gray)] for gray in grays]
+    print(f"🙂 {sum(len(f) for f in faces)} faces detected\n")
+    
+    def regions_for(frame_faces, count):
+        boxes = frame_faces[:count]
+        while len(boxes) < count:
+            side = int(rng.integers(30, min(200, height, width) + 1))
+            boxes.append((int(rng.integers(0, width - side + 1)), int(rng.integers(0, height - side + 1)), side, side))
+        return boxes
+    
+    print(f"{'regions':>8}{'crop ms':>10}{'integral ms':>13}{'speed-up':>10}{'med Δ%':>9}{'clear agree':>13}")
+    print("-"*63)
+    for count in REGION_COUNTS:
+        regions = [regions_for(frame_faces, count) for frame_faces in faces]
+        
+        # Per crop: float64 Laplacian + var() of every region (FaceDetector.check_blur)
+        start = time.perf_counter()
+        crop_scores = [
+            [detector.check_blur(gray[y:y+h, x:x+w])[1] for (x, y, w, h) in boxes]
+            for gray, boxes in zip(grays, regions)
+        ]
+        crop_ms = 1000 * (time.perf_counter() - start) / len(grays)
+        
+        # Integral image: one float32 Laplacian per frame, O(1) per region
+        start = time.perf_counter()
+        integral_scores = [SharpnessMap(gray).variances(boxes) for gray, boxes in zip(grays, regions)]
+        integral_ms = 1000 * (time.perf_counter() - start) / len(grays)
+        
+        crop_scores = np.concatenate([np.asarray(s, dtype=np.float64) for s in crop_scores])
+        integral_scores = np.concatenate(integral_scores)
+        relative = np.abs(integral_scores - crop_scores) / np.maximum(crop_scores, 1e-6)
+        agree = np.mean((crop_scores > 100) == (integral_scores > 100)) * 100
+        
+        print(f"{count:>8}{crop_ms:>10.2f}{integral_ms:>13.2f}{crop_ms / integral_ms:>9.2f}x"
+              f"{np.median(relative) * 100:>9.2f}{agree:>12.1f}%")
+    
+    print("\n" + "="*60)
+    print("ms = per frame, med Δ% = median relative score difference,")
+    print("clear agree = same is_clear decision at the default threshold (100)")
+    print("="*60)
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else 0
+    max_frames = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    benchmark_blur_scoring(source, max_frames)
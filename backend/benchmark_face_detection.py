@@ -0,0 +1,76 @@
+import sys
+import time
+import cv2
+from utils.face_detector import FaceDetector
+from utils.face_tracker import FaceTracker
+
+def benchmark_face_detection(source=0, max_frames=300):
+    """Compare full-frame detection against ROI-guided detection"""
+    
+    print("="*60)
+    print("⏱️  Benchmarking Face Detection: full vs ROI mode")
+    print("="*60)
+    print("\nUsage: python benchmark_face_detection.py [video_file] [max_frames]")
+    print("  (defaults to the webcam and 300 frames)\n")
+    
+    full_detector = FaceDetector(mode="full")
+    roi_detector = FaceDetector(mode="roi")
+    
+    cap = cv2.VideoCapture(source)
+    
+    if not cap.isOpened():
+        print(f"❌ Error: Cannot open source {source}")
+        return
+    
+    # Read frames up front so both modes see exactly the same input
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    
+    if not frames:
+        print("❌ Error: No frames read")
+        return
+    
+    print(f"📸 Loaded {len(frames)} frames ({frames[0].shape[1]}x{frames[0].shape[0]})\n")
+    
+    # Full-frame baseline (also the reference for recall)
+    start = time.perf_counter()
+    reference = [full_detector.detect_faces(frame) for frame in frames]
+    full_time = time.perf_counter() - start
+    
+    # ROI-guided mode
+    start = time.perf_counter()
+    roi_results = [roi_detector.detect_faces(frame) for frame in frames]
+    roi_time = time.perf_counter() - start
+    
+    # Recall: reference faces matched by an ROI-mode face with IoU >= 0.5
+    total_faces = 0
+    matched_faces = 0
+    for ref_faces, roi_faces in zip(reference, roi_results):
+        for ref in ref_faces:
+            total_faces += 1
+            if any(FaceTracker.iou(ref, face) >= 0.5 for face in roi_faces):
+                matched_faces += 1
+    
+    recall = matched_faces / total_faces if total_faces else 1.0
+    full_fps = len(frames) / full_time
+    roi_fps = len(frames) / roi_time
+    
+    print(f"{'Mode':<10}{'FPS':>10}{'ms/frame':>12}")
+    print("-"*32)
+    print(f"{'full':<10}{full_fps:>10.1f}{1000 * full_time / len(frames):>12.2f}")
+    print(f"{'roi':<10}{roi_fps:>10.1f}{1000 * roi_time / len(frames):>12.2f}")
+    
+    print("\n" + "="*60)
+    print(f"⚡ Speed-up: {roi_fps / full_fps:.2f}x")
+    print(f"🎯 Recall vs full mode: {recall:.3f} ({matched_faces}/{total_faces} faces)")
+    print("="*60)
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else 0
+    max_frames = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    benchmark_face_detection(source, max_frames)
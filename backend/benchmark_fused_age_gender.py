@@ -0,0 +1,122 @@
+import sys
+import multiprocessing as mp
+import numpy as np
+import psutil
+from benchmark_inference_backends import load_faces, time_calls
+
+# (label, fused, backend, options) - the first entry is the parity reference
+CONFIGURATIONS = [
+    ("pair opencv", False, "opencv", {}),
+    ("pair onnxruntime", False, "onnxruntime", {}),
+    ("fused opencv", True, "opencv", {}),
+    ("fused onnxruntime", True, "onnxruntime", {}),
+    ("fused onnxruntime parallel", True, "onnxruntime", {"execution_mode": "parallel"}),
+    ("fused onnxruntime int8", True, "onnxruntime-int8", {})
+]
+
+MEAN = (78.4263377603, 87.7689143744, 114.895847746)
+
+
+def measure(fused, backend, options, faces, iterations):
+    """
+    Load one configuration and time it (runs in a fresh process so the
+    resident memory delta belongs to this configuration alone)
+    
+    Returns:
+        dict with load/run memory, latencies and the batch outputs
+    """
+    import cv2
+    from utils.age_predictor import AgePredictor
+    from utils.gender_predictor import GenderPredictor
+    from utils.age_gender_predictor import AgeGenderPredictor
+    
+    process = psutil.Process()
+    baseline = process.memory_info().rss
+    
+    # Each run includes building the blob(s), which fusing halves
+    if fused:
+        model = AgeGenderPredictor(backend=backend, backend_options=options)
+        
+        def predict(images):
+            blob = cv2.dnn.blobFromImages(images, 1.0, (227, 227), MEAN, swapRB=False)
+            return model.backend.run_all(blob, model.OUTPUT_NAMES)
+    else:
+        age = AgePredictor(backend=backend, backend_options=options)
+        gender = GenderPredictor(backend=backend, backend_options=options)
+        
+        def predict(images):
+            age_blob = cv2.dnn.blobFromImages(images, 1.0, (227, 227), MEAN, swapRB=False)
+            gender_blob = cv2.dnn.blobFromImages(images, 1.0, (227, 227), MEAN, swapRB=False)
+            return [age.backend.run(age_blob), gender.backend.run(gender_blob)]
+    
+    loaded = process.memory_info().rss
+    single_ms = time_calls(lambda: predict(faces[:1]), iterations)
+    batch_ms = time_calls(lambda: predict(faces), max(iterations // 5, 3)) / len(faces)
+    outputs = [np.asarray(output) for output in predict(faces)]
+    
+    return {
+        "model_mb": (loaded - baseline) / 1024 / 1024,
+        "total_mb": (process.memory_info().rss - baseline) / 1024 / 1024,
+        "single_ms": single_ms,
+        "batch_ms": batch_ms,
+        "outputs": outputs
+    }
+
+
+def benchmark_fused_age_gender(image_dir="captured_images", iterations=50):
+    """Memory and latency of the fused age/gender model vs the separate pair"""
+    
+    print("="*60)
+    print("⏱️  Benchmarking Fused vs Separate Age/Gender Models (CPU)")
+    print("="*60)
+    print("\nUsage: python benchmark_fused_age_gender.py [image_dir] [iterations]")
+    print("  (defaults to captured_images and 50 iterations)\n")
+    
+    faces = load_faces(image_dir)
+    if faces:
+        print(f"📸 {len(faces)} face crops from {image_dir}\n")
+    else:
+        print(f"⚠️  No faces found in {image_dir}, using random crops\n")
+        rng = np.random.default_rng(0)
+        faces = [rng.integers(0, 256, (160, 160, 3), dtype=np.uint8) for _ in range(16)]
+    
+    context = mp.get_context("spawn")
+    results = []
+    reference = None
+    for label, fused, backend, options in CONFIGURATIONS:
+        try:
+            with context.Pool(1) as pool:
+                result = pool.apply(measure, (fused, backend, options, faces, iterations))
+        except Exception as e:
+            print(f"⏭️  Skipping {label}: {e}\n")
+            continue
+        
+        outputs = result["outputs"]
+        if reference is None:
+            reference = outputs
+        age_agree = np.mean(outputs[0].argmax(axis=1) == reference[0].argmax(axis=1)) * 100
+        gender_agree = np.mean(outputs[1].argmax(axis=1) == reference[1].argmax(axis=1)) * 100
+        max_diff = max(np.abs(outputs[0] - reference[0]).max(), np.abs(outputs[1] - reference[1]).max())
+        
+        results.append((label, result["model_mb"], result["total_mb"], np.mean(result["single_ms"]),
+                        np.percentile(result["single_ms"], 95), np.mean(result["batch_ms"]),
+                        age_agree, gender_agree, max_diff))
+    
+    print("\n" + "="*60)
+    print("📊 RESULTS (age + gender per face; parity vs the first row)")
+    print("="*60)
+    print(f"{'configuration':<28}{'load MB':>9}{'peak MB':>9}{'b1 ms':>8}{'b1 p95':>8}"
+          f"{'bN ms':>8}{'age %':>8}{'gen %':>8}{'max Δp':>9}")
+    for label, model_mb, total_mb, mean_ms, p95_ms, batch_ms, age_agree, gender_agree, max_diff in results:
+        print(f"{label:<28}{model_mb:>9.1f}{total_mb:>9.1f}{mean_ms:>8.2f}{p95_ms:>8.2f}"
+              f"{batch_ms:>8.2f}{age_agree:>8.1f}{gender_agree:>8.1f}{max_diff:>9.4f}")
+    print("="*60)
+    print("load MB = resident memory added by loading the model(s),")
+    print("peak MB = after the timed runs (adds activation buffers),")
+    print("b1 = one face per call, bN = per face in a batch of all crops")
+
+
+if __name__ == "__main__":
+    image_dir = sys.argv[1] if len(sys.argv) > 1 else "captured_images"
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    benchmark_fused_age_gender(image_dir, iterations)
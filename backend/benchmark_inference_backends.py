@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+import cv2
+import numpy as np
+from utils.face_detector import FaceDetector
+from utils.age_predictor import AgePredictor
+from utils.gender_predictor import GenderPredictor
+
+# (label, backend, options) - the first entry is the parity reference
+CONFIGURATIONS = [
+    ("opencv default", "opencv", {}),
+    ("opencv cpu", "opencv", {"backend": "opencv", "target": "cpu"}),
+    ("onnxruntime", "onnxruntime", {}),
+    ("onnxruntime 1 thread", "onnxruntime", {"intra_op_threads": 1}),
+    ("onnxruntime no graph opt", "onnxruntime", {"optimization_level": "disable"}),
+    ("onnxruntime int8", "onnxruntime-int8", {})
+]
+
+MEAN = (78.4263377603, 87.7689143744, 114.895847746)
+
+
+def load_faces(image_dir, max_faces=64):
+    """Detect face crops in a directory of images (e.g. captured selfies)"""
+    detector = FaceDetector(mode="full")
+    faces = []
+    if os.path.isdir(image_dir):
+        for filename in sorted(os.listdir(image_dir)):
+            image = cv2.imread(os.path.join(image_dir, filename))
+            if image is None:
+                continue
+            for (x, y, w, h) in detector.detect_faces(image):
+                faces.append(image[y:y+h, x:x+w])
+            if len(faces) >= max_faces:
+                break
+    return faces[:max_faces]
+
+
+def time_calls(func, iterations):
+    """Run func repeatedly and return per-call latencies in ms"""
+    func()  # warm-up
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def benchmark_inference_backends(image_dir="captured_images", iterations=50):
+    """Latency and accuracy parity of every age/gender backend on CPU"""
+    
+    print("="*60)
+    print("⏱️  Benchmarking Age/Gender Inference Backends (CPU)")
+    print("="*60)
+    print("\nUsage: python benchmark_inference_backends.py [image_dir] [iterations]")
+    print("  (defaults to captured_images and 50 iterations)\n")
+    
+    faces = load_faces(image_dir)
+    if faces:
+        print(f"📸 {len(faces)} face crops from {image_dir}\n")
+    else:
+        # Still measures latency and numeric parity, not label accuracy
+        print(f"⚠️  No faces found in {image_dir}, using random crops\n")
+        rng = np.random.default_rng(0)
+        faces = [rng.integers(0, 256, (160, 160, 3), dtype=np.uint8) for _ in range(16)]
+    
+    single_blob = cv2.dnn.blobFromImage(faces[0], 1.0, (227, 227), MEAN, swapRB=False)
+    batch_blob = cv2.dnn.blobFromImages(faces, 1.0, (227, 227), MEAN, swapRB=False)
+    
+    results = []
+    reference = None
+    for label, backend, options in CONFIGURATIONS:
+        try:
+            age = AgePredictor(backend=backend, backend_options=options)
+            gender = GenderPredictor(backend=backend, backend_options=options)
+        except Exception as e:
+            print(f"⏭️  Skipping {label}: {e}\n")
+            continue
+        
+        def run_single():
+            age.backend.run(single_blob)
+            gender.backend.run(single_blob)
+        
+        def run_batch():
+            age.backend.run(batch_blob)
+            gender.backend.run(batch_blob)
+        
+        single_ms = time_calls(run_single, iterations)
+        batch_ms = time_calls(run_batch, max(iterations // 5, 3)) / len(faces)
+        outputs = (age.backend.run(batch_blob), gender.backend.run(batch_blob))
+        
+        if reference is None:
+            reference = outputs
+        age_agree = np.mean(outputs[0].argmax(axis=1) == reference[0].argmax(axis=1)) * 100
+        gender_agree = np.mean(outputs[1].argmax(axis=1) == reference[1].argmax(axis=1)) * 100
+        max_diff = max(np.abs(outputs[0] - reference[0]).max(), np.abs(outputs[1] - reference[1]).max())
+        
+        results.append((label, np.mean(single_ms), np.percentile(single_ms, 95), np.mean(batch_ms),
+                        age_agree, gender_agree, max_diff))
+    
+    print("\n" + "="*60)
+    print("📊 RESULTS (age + gender per face; parity vs the first row)")
+    print("="*60)
+    print(f"{'backend':<26}{'b1 ms':>8}{'b1 p95':>8}{'bN ms':>8}{'age %':>8}{'gen %':>8}{'max Δp':>9}")
+    for label, mean_ms, p95_ms, batch_ms, age_agree, gender_agree, max_diff in results:
+        print(f"{label:<26}{mean_ms:>8.2f}{p95_ms:>8.2f}{batch_ms:>8.2f}"
+              f"{age_agree:>8.1f}{gender_agree:>8.1f}{max_diff:>9.1e}")
+    print("="*60)
+    print("b1 = one face per call, bN = per face in a batch of all crops,")
+    print("age %/gen % = top-1 agreement, max Δp = largest probability difference")
+
+
+if __name__ == "__main__":
+    image_dir = sys.argv[1] if len(sys.argv) > 1 else "captured_images"
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    benchmark_inference_backends(image_dir, iterations)
@@ -0,0 +1,139 @@
+import os
+import sys
+import cv2
+import numpy as np
+from benchmark_inference_backends import load_faces, time_calls
+from utils.face_detector import FaceDetector
+from utils.smile_detector import SmileDetector, SmileEngine, fit_smile_calibration
+
+# Face sizes (px) and faces per frame to sweep
+FACE_SIZES = (100, 200, 400)
+BATCH_SIZES = (1, 4, 8)
+
+
+def benchmark_smile_detection(image_dir="captured_images", iterations=30):
+    """Per-face latency of whole-face Haar smile scoring vs the mouth-region SmileEngine"""
+    
+    print("="*60)
+    print("⏱️  Benchmarking Smile Detection: whole face vs mouth region")
+    print("="*60)
+    print("\nUsage: python benchmark_smile_detection.py [image_dir] [iterations]")
+    print("  (defaults to captured_images and 30 iterations)\n")
+    
+    faces = load_faces(image_dir)
+    if faces:
+        print(f"📸 {len(faces)} face crops from {image_dir}\n")
+    else:
+        print(f"⚠️  No faces found in {image_dir}, using random crops\n")
+        rng = np.random.default_rng(0)
+        faces = [rng.integers(0, 256, (160, 160, 3), dtype=np.uint8) for _ in range(8)]
+    
+    detector = SmileDetector()
+    engine = SmileEngine()
+    
+    print(f"\n{'face px':>8}{'faces':>7}{'haar ms/face':>14}{'engine ms/face':>16}{'speed-up':>10}")
+    print("-"*55)
+    for size in FACE_SIZES:
+        resized = [cv2.resize(face, (size, size)) for face in faces]
+        for batch_size in BATCH_SIZES:
+            batch = [resized[i % len(resized)] for i in range(batch_size)]
+            
+            # Before: one full-crop cascade per face (as process_frame did)
+            haar_ms = time_calls(lambda: [detector.get_smile_score(face) for face in batch], iterations)
+            # After: one cascade call over the tiled mouth ROIs
+            engine_ms = time_calls(lambda: engine.score_batch(batch), iterations)
+            
+            haar_per_face = np.mean(haar_ms) / batch_size
+            engine_per_face = np.mean(engine_ms) / batch_size
+            print(f"{size:>8}{batch_size:>7}{haar_per_face:>14.3f}{engine_per_face:>16.3f}"
+                  f"{haar_per_face / engine_per_face:>9.2f}x")
+    
+    # Decisions at each engine's default threshold, on the original crops
+    haar_smiling = np.array([detector.get_smile_score(face) > 0.15 for face in faces])
+    engine_scores = engine.score_batch(faces)
+    engine_smiling = engine_scores > 0.5
+    
+    print("\n" + "="*60)
+    print(f"🎯 is_smiling agreement (haar > 0.15 vs engine > 0.5): "
+          f"{np.mean(haar_smiling == engine_smiling) * 100:.1f}% of {len(faces)} faces")
+    print(f"📈 Engine scores: min {engine_scores.min():.2f}, "
+          f"median {np.median(engine_scores):.2f}, max {engine_scores.max():.2f}")
+    print("="*60)
+    print("Engine cost should stay flat across face sizes (canonical ROI);")
+    print("its default score curve is hand-picked, fit one with --fit <dir>")
+
+
+def load_labelled_faces(label_dir):
+    """
+    Largest face of every image in a directory, or the whole image when no
+    face is found (the directory already holds face crops)
+    """
+    detector = FaceDetector(mode="full")
+    faces = []
+    for filename in sorted(os.listdir(label_dir)):
+        image = cv2.imread(os.path.join(label_dir, filename))
+        if image is None:
+            continue
+        boxes = detector.detect_faces(image)
+        if len(boxes) > 0:
+            x, y, w, h = max(boxes, key=lambda box: box[2] * box[3])
+            image = image[y:y+h, x:x+w]
+        faces.append(image)
+    return faces
+
+
+def fit_calibration(labelled_dir):
+    """Fit SmileEngine's logistic curve on smiling/ and not_smiling/ face images"""
+    
+    print("="*60)
+    print("📐 Fitting the SmileEngine score curve")
+    print("="*60)
+    print("\nUsage: python benchmark_smile_detection.py --fit <dir>")
+    print("  (<dir>/smiling and <dir>/not_smiling hold face images or crops)\n")
+    
+    engine = SmileEngine()
+    raw_scores = []
+    labels = []
+    for label, folder in ((1, "smiling"), (0, "not_smiling")):
+        label_dir = os.path.join(labelled_dir, folder)
+        if not os.path.isdir(label_dir):
+            print(f"❌ Error: {label_dir} not found")
+            return
+        faces = load_labelled_faces(label_dir)
+        raw = engine.raw_scores_batch(faces)
+        raw_scores.extend(raw)
+        labels.extend([label] * len(raw))
+        print(f"📸 {folder}: {len(raw)} faces, neighbours median {np.median(raw) if len(raw) else 0:.1f}, "
+              f"none found in {np.mean(raw == 0) * 100 if len(raw) else 0:.0f}%")
+    
+    raw_scores = np.array(raw_scores)
+    labels = np.array(labels)
+    if labels.min() == labels.max():
+        print("❌ Error: need faces in both folders")
+        return
+    
+    try:
+        midpoint, spread = fit_smile_calibration(raw_scores, labels)
+    except ValueError as e:
+        print(f"❌ Error: {e}; keeping the default curve")
+        return
+    fitted = SmileEngine(calibration=(midpoint, spread))
+    
+    print("\n" + "="*60)
+    print(f"{'curve':<12}{'midpoint':>10}{'spread':>9}{'accuracy':>10}{'log loss':>10}")
+    for name, curve in (("default", engine), ("fitted", fitted)):
+        scores = np.clip(curve.calibrate(raw_scores), 1e-6, 1 - 1e-6)
+        accuracy = np.mean((scores > 0.5) == labels) * 100
+        log_loss = -np.mean(labels * np.log(scores) + (1 - labels) * np.log(1 - scores))
+        print(f"{name:<12}{curve.calibration[0]:>10.2f}{curve.calibration[1]:>9.2f}{accuracy:>9.1f}%{log_loss:>10.3f}")
+    print("="*60)
+    print(f"Use SmileEngine(calibration=({midpoint:.2f}, {spread:.2f})) for calibrated scores")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--fit":
+        fit_calibration(sys.argv[2])
+    else:
+        image_dir = sys.argv[1] if len(sys.argv) > 1 else "captured_images"
+        iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+        benchmark_smile_detection(image_dir, iterations)
@@ -52,6 +52,36 @@ download_file(
     "models/emotion-ferplus-8.onnx"
 )
 
+# 6. ONNX Runtime artifacts for the age/gender nets (float and INT8)
+print("6. Converting Age/Gender Models for ONNX Runtime")
+try:
+    from utils.caffe_to_onnx import convert_caffe_to_onnx, fuse_caffe_nets, quantize_to_int8
+    
+    for name in ("age", "gender"):
+        prototxt = f"models/{name}_deploy.prototxt"
+        caffemodel = f"models/{name}_net.caffemodel"
+        onnx_path = f"models/{name}_net.onnx"
+        int8_path = f"models/{name}_net.int8.onnx"
+        
+        convert_caffe_to_onnx(prototxt, caffemodel, onnx_path)
+        print(f"✅ Converted: {onnx_path}")
+        quantize_to_int8(onnx_path, int8_path)
+        print(f"✅ Quantized: {int8_path}")
+    
+    # Both nets in one graph: one shared input blob, two output heads
+    fuse_caffe_nets(
+        [(f"{name}_", f"models/{name}_deploy.prototxt", f"models/{name}_net.caffemodel")
+         for name in ("age", "gender")],
+        "models/age_gender_net.onnx",
+        "AgeGenderNet"
+    )
+    print("✅ Fused: models/age_gender_net.onnx")
+    quantize_to_int8("models/age_gender_net.onnx", "models/age_gender_net.int8.onnx")
+    print("✅ Quantized: models/age_gender_net.int8.onnx")
+    print()
+except Exception as e:
+    print(f"❌ Error converting models (the opencv backend still works): {e}\n")
+
 print("="*60)
 print("✅ All models downloaded successfully!")
 print("="*60)
@@ -1,17 +1,30 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, File, UploadFile
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, File, UploadFile, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, Response
 import cv2
 import numpy as np
 import base64
 import json
 import os
+import shutil
+import struct
+import time
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
 from typing import List
 import psutil
-from utils.video_processor import VideoProcessor
+from utils.video_processor import VideoProcessor, settings_from_env
+from utils.camera_hub import CameraHub
+from utils.pacing_controller import PacingController
+from utils.processor_pool import ProcessorPool
+from utils.job_manager import JobManager, list_images
+from utils.gallery_index import GalleryIndex
+from utils.thumbnail_cache import ThumbnailCache
+from utils.capture_writer import CaptureWriter
 
 # Initialize FastAPI app
 app = FastAPI(title="Smilage - Smart Selfie API", version="1.0.0")
@@ -32,22 +45,183 @@ os.makedirs(CAPTURED_IMAGES_DIR, exist_ok=True)
 # Mount static files
 app.mount("/captured_images", StaticFiles(directory=CAPTURED_IMAGES_DIR), name="captured_images")
 
+# Services, executors and pools are created by init_services() at startup,
+# not at import: spawned job workers re-import this module (as __mp_main__
+# under `python main.py`) and must not open the gallery or start threads
+
+# SQLite index of the gallery, so listing never scans the directory.
+# Kept outside CAPTURED_IMAGES_DIR so the static mount does not serve it.
+GALLERY_DB_PATH = "gallery.db"
+gallery_index = None
+
+# Resized gallery variants (bounded LRU on disk), generated on their own threads
+THUMBNAIL_CACHE_DIR = "thumbnail_cache"
+THUMBNAIL_CACHE_MAX_MB = int(os.environ.get("SMILAGE_THUMBNAIL_CACHE_MB", 256))
+thumbnail_cache = None
+
 # Global video processor
 video_processor = None
 
-# Active camera state
-camera_active = False
-camera = None
+# Inference backend, fused age/gender, smile engine and scheduling policy
+# from SMILAGE_* environment variables; job and batch workers read the same
+PROCESSOR_SETTINGS = settings_from_env()
+
+# Write-behind capture persistence (created with the video processor).
+# SMILAGE_CAPTURE_FSYNC: none (default), file, or full (file + directory)
+CAPTURE_FSYNC = os.environ.get("SMILAGE_CAPTURE_FSYNC", "none")
+CAPTURE_MAX_PENDING = int(os.environ.get("SMILAGE_CAPTURE_MAX_PENDING", 8))
+capture_writer = None
+
+# Shared camera: opened once, fanned out to every /ws subscriber
+camera_hub = None
+
+# Default preview frame rate for /ws clients (override with ?fps=N)
+STREAM_TARGET_FPS = 30
+
+# Auto-capture saves the best pre-roll frame within this window around the
+# smile trigger (seconds; clients may override per connection)
+AUTO_CAPTURE_PRE_ROLL = 0.5
+AUTO_CAPTURE_POST_ROLL = 0.5
+
+# Dedicated executor for blocking CV work outside the streaming pipeline
+# (opening the camera, one-off inference, disk writes)
+cv_executor = None
+
+# cv2.dnn nets and ONNX sessions are not thread-safe; every caller that runs
+# the processor's models holds this lock
+processor_lock = threading.Lock()
+
+# Stateless single-image analysis: each concurrent request checks out its own
+# processor from the pool, decoded and analysed on a matching executor
+ANALYZE_POOL_SIZE = int(os.environ.get("SMILAGE_ANALYZE_POOL_SIZE", 2))
+analyze_pool = None
+analyze_executor = None
+
+# Bulk analysis jobs on a local process pool (one model stack per worker).
+# If set, server-side directory jobs must live under SMILAGE_JOB_INPUT_ROOT.
+JOBS_DIR = "jobs"
+JOB_INPUT_ROOT = os.environ.get("SMILAGE_JOB_INPUT_ROOT")
+job_manager = None
+
+
+def init_services():
+    """Create the gallery index, caches, executors and job manager"""
+    global gallery_index, thumbnail_cache, cv_executor, analyze_pool, analyze_executor, job_manager
+    gallery_index = GalleryIndex(GALLERY_DB_PATH, CAPTURED_IMAGES_DIR)
+    thumbnail_cache = ThumbnailCache(
+        CAPTURED_IMAGES_DIR,
+        THUMBNAIL_CACHE_DIR,
+        max_bytes=THUMBNAIL_CACHE_MAX_MB * 1024 * 1024
+    )
+    cv_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cv")
+    analyze_pool = ProcessorPool(
+        size=ANALYZE_POOL_SIZE,
+        factory=lambda: VideoProcessor(detection_mode="full", **PROCESSOR_SETTINGS)
+    )
+    analyze_executor = ThreadPoolExecutor(max_workers=ANALYZE_POOL_SIZE, thread_name_prefix="analyze")
+    job_manager = JobManager(jobs_dir=JOBS_DIR)
 
 
 def get_video_processor():
     """Get or create video processor instance"""
-    global video_processor
+    global video_processor, capture_writer
     if video_processor is None:
-        video_processor = VideoProcessor()
+        video_processor = VideoProcessor(**PROCESSOR_SETTINGS)
+        video_processor.gallery_index = gallery_index
+        video_processor.thumbnail_cache = thumbnail_cache
+        capture_writer = CaptureWriter(
+            video_processor,
+            max_pending=CAPTURE_MAX_PENDING,
+            fsync=CAPTURE_FSYNC
+        )
     return video_processor
 
 
+def get_camera_hub():
+    """Get or create the shared camera hub (loads models on first use)"""
+    global camera_hub
+    if camera_hub is None:
+        camera_hub = CameraHub(get_video_processor(), open_camera, lock=processor_lock)
+    return camera_hub
+
+
+async def run_blocking(func, *args):
+    """Run a blocking function on the CV executor and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cv_executor, func, *args)
+
+
+async def drain_queue(queue):
+    """Wait until an asyncio.Queue has been emptied by its consumer"""
+    while not queue.empty():
+        await asyncio.sleep(0.01)
+
+
+def open_camera():
+    """Open and configure the webcam (executor side)"""
+    cap = cv2.VideoCapture(0)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    cap.set(cv2.CAP_PROP_FPS, 30)
+    return cap
+
+
+def pack_binary_frame(header, jpeg):
+    """
+    Build a binary frame message: 4-byte big-endian header length, compact
+    JSON header, then the raw JPEG bytes
+    
+    Args:
+        header: JSON-serialisable dict (type, predictions, frame_number, ...)
+        jpeg: JPEG buffer from cv2.imencode
+        
+    Returns:
+        bytes ready for websocket.send_bytes
+    """
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    return b"".join([struct.pack(">I", len(header_bytes)), header_bytes, memoryview(jpeg)])
+
+
+def analyze_image_bytes(data):
+    """
+    Decode JPEG/PNG bytes and run the model stack on them (executor side)
+    
+    Returns:
+        dict: Predictions
+        
+    Raises:
+        ValueError: If the bytes are not a decodable image
+    """
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode image (expected JPEG or PNG)")
+    
+    with analyze_pool.acquire() as processor:
+        return processor.analyze_image(image)
+
+
+def save_uploads(job_id, files):
+    """
+    Copy uploaded files into a job's input directory (executor side)
+    
+    Returns:
+        List of saved image paths
+    """
+    input_dir = os.path.join(job_manager.job_dir(job_id), "inputs")
+    paths = []
+    for index, upload in enumerate(files):
+        filename = os.path.basename(upload.filename or "")
+        if not filename.lower().endswith(('.jpg', '.jpeg', '.png')):
+            continue
+        
+        # Index prefix keeps same-named uploads apart
+        path = os.path.join(input_dir, f"{index:06d}_{filename}")
+        with open(path, "wb") as out:
+            shutil.copyfileobj(upload.file, out)
+        paths.append(path)
+    return paths
+
+
 # ==================== ROOT & HEALTH ENDPOINTS ====================
 
 @app.get("/")
@@ -61,7 +235,10 @@ async def root():
             "docs": "/docs",
             "health": "/api/health",
             "websocket": "/ws",
-            "gallery": "/api/gallery"
+            "gallery": "/api/gallery",
+            "analyze": "/api/analyze",
+            "jobs": "/api/jobs",
+            "pipeline_stats": "/api/pipeline/stats"
         }
     }
 
@@ -72,7 +249,7 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "Smilage Smart Selfie",
-        "camera_active": camera_active
+        "camera_active": camera_hub is not None and camera_hub.active
     }
 
 
@@ -90,7 +267,8 @@ async def system_info():
         "memory_usage": f"{memory.percent}%",
         "memory_percent": memory.percent,
         "memory_available": f"{memory.available / (1024**3):.2f} GB",
-        "memory_total": f"{memory.total / (1024**3):.2f} GB"
+        "memory_total": f"{memory.total / (1024**3):.2f} GB",
+        "thumbnail_cache": thumbnail_cache.get_stats()
     }
 
 
@@ -100,7 +278,8 @@ async def system_info():
 async def update_smile_threshold(data: dict):
     """Update smile detection threshold"""
     threshold = data.get("threshold", 0.5)
-    processor = get_video_processor()
+    # The first call loads every model; keep that off the event loop
+    processor = await run_blocking(get_video_processor)
     new_threshold = processor.set_smile_threshold(threshold)
     
     return {
@@ -112,7 +291,9 @@ async def update_smile_threshold(data: dict):
 @app.get("/api/settings")
 async def get_settings():
     """Get current settings"""
-    processor = get_video_processor()
+    # The frontend calls this on page load, often before anything else has
+    # built the processor, and the first call loads every model
+    processor = await run_blocking(get_video_processor)
     
     return {
         "smile_threshold": processor.smile_threshold,
@@ -123,29 +304,56 @@ async def get_settings():
 # ==================== GALLERY ENDPOINTS ====================
 
 @app.get("/api/gallery")
-async def get_gallery():
-    """Get list of captured images"""
+async def get_gallery(
+    limit: int = None,
+    cursor: str = None,
+    sort: str = "created",
+    order: str = "desc",
+    emotion: str = None,
+    age_bucket: str = None,
+    gender: str = None,
+    is_smiling: bool = None,
+    min_faces: int = None,
+    max_faces: int = None,
+    min_smile: float = None,
+    max_smile: float = None,
+    min_blur: float = None,
+    max_blur: float = None,
+    since: datetime = None,
+    until: datetime = None
+):
+    """
+    Get list of captured images
+    
+    Pages with ?limit=N; pass the returned next_cursor as ?cursor= to get
+    the following page. Captures can be filtered on their stored
+    predictions, e.g. ?emotion=happiness&since=2024-05-01T00:00:00
+    """
     try:
-        files = []
-        for filename in os.listdir(CAPTURED_IMAGES_DIR):
-            if filename.endswith(('.jpg', '.jpeg', '.png')):
-                filepath = os.path.join(CAPTURED_IMAGES_DIR, filename)
-                stat = os.stat(filepath)
-                
-                files.append({
-                    "filename": filename,
-                    "url": f"/captured_images/{filename}",
-                    "size": stat.st_size,
-                    "created": datetime.fromtimestamp(stat.st_ctime).isoformat()
-                })
-        
-        # Sort by creation time (newest first)
-        files.sort(key=lambda x: x['created'], reverse=True)
+        if limit is not None:
+            limit = max(1, min(limit, 500))
+        filters = {
+            "emotion": emotion,
+            "age_bucket": age_bucket,
+            "gender": gender,
+            "is_smiling": is_smiling,
+            "min_faces": min_faces,
+            "max_faces": max_faces,
+            "min_smile": min_smile,
+            "max_smile": max_smile,
+            "min_blur": min_blur,
+            "max_blur": max_blur,
+            "since": since.timestamp() if since else None,
+            "until": until.timestamp() if until else None
+        }
+        rows, next_cursor = await run_blocking(gallery_index.query, limit, cursor, sort, order, filters)
+        files = [GalleryIndex.to_dict(row) for row in rows]
         
         return {
             "success": True,
-            "count": len(files),
-            "images": files
+            "count": await run_blocking(gallery_index.count, filters),
+            "images": files,
+            "next_cursor": next_cursor
         }
     except Exception as e:
         return {
@@ -155,6 +363,73 @@ async def get_gallery():
         }
 
 
+@app.get("/api/gallery/{filename}/predictions")
+async def get_image_predictions(filename: str):
+    """Get the predictions a captured image was taken with"""
+    predictions = gallery_index.get_predictions(filename)
+    if predictions is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "No predictions stored for this image"}
+        )
+    return {
+        "success": True,
+        "filename": filename,
+        "predictions": predictions
+    }
+
+
+@app.get("/api/gallery/thumbnail/{filename}")
+async def get_thumbnail(request: Request, filename: str, w: int = 320, format: str = "auto"):
+    """
+    Get a resized variant of a captured image
+    
+    w snaps up to the nearest width preset; format is jpeg, webp, or auto
+    (WebP when the browser accepts it). Responses carry ETag and
+    Last-Modified so browsers revalidate with a 304.
+    """
+    if format == "auto":
+        format = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+    
+    try:
+        loop = asyncio.get_running_loop()
+        path, media_type = await loop.run_in_executor(
+            thumbnail_cache.executor, thumbnail_cache.get, os.path.basename(filename), w, format
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    
+    if path is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "File not found"}
+        )
+    
+    stat = os.stat(path)
+    headers = {
+        "ETag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": "public, no-cache",
+        "Vary": "Accept"
+    }
+    
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = headers["ETag"] in [tag.strip() for tag in if_none_match.split(",")]
+    elif if_modified_since is not None:
+        try:
+            not_modified = int(stat.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            not_modified = False
+    else:
+        not_modified = False
+    
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
 @app.delete("/api/gallery/{filename}")
 async def delete_image(filename: str):
     """Delete a captured image"""
@@ -168,6 +443,8 @@ async def delete_image(filename: str):
             }
         
         os.remove(filepath)
+        gallery_index.remove(filename)
+        thumbnail_cache.remove(filename)
         
         return {
             "success": True,
@@ -190,6 +467,8 @@ async def clear_gallery():
                 filepath = os.path.join(CAPTURED_IMAGES_DIR, filename)
                 os.remove(filepath)
                 count += 1
+        gallery_index.clear()
+        thumbnail_cache.clear()
         
         return {
             "success": True,
@@ -224,27 +503,30 @@ async def download_image(filename: str):
 
 @app.post("/api/capture")
 async def manual_capture():
-    """Manually capture current frame"""
-    global camera
-    
-    if camera is None or not camera.isOpened():
-        return {
-            "success": False,
-            "error": "Camera not active"
-        }
+    """
+    Manually capture current frame
     
+    While streaming, saves the pipeline's latest frame, predictions and
+    JPEG as they are; otherwise opens the camera for a one-shot read.
+    """
     try:
-        ret, frame = camera.read()
+        hub = await run_blocking(get_camera_hub)
+        packet = await run_blocking(hub.latest_packet)
         
-        if not ret:
+        if packet is None:
             return {
                 "success": False,
                 "error": "Failed to capture frame"
             }
         
-        processor = get_video_processor()
-        predictions = processor.process_frame(frame)
-        capture_info = processor.capture_selfie(frame, predictions)
+        # Written in the background; poll /api/capture/{capture_id} for the result
+        predictions = packet["predictions"]
+        capture_info = capture_writer.submit_packet(packet)
+        if capture_info is None:
+            return {
+                "success": False,
+                "error": "Capture queue full, try again shortly"
+            }
         
         return {
             "success": True,
@@ -258,37 +540,347 @@ async def manual_capture():
         }
 
 
+@app.get("/api/capture/{capture_id}")
+async def capture_status(capture_id: str):
+    """Get the status (pending, saved or failed) of a recent capture"""
+    capture = capture_writer.get_capture(capture_id) if capture_writer is not None else None
+    if capture is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Unknown capture"}
+        )
+    return {
+        "success": True,
+        "image": capture
+    }
+
+
+# ==================== ANALYZE ENDPOINT ====================
+
+@app.post("/api/analyze")
+async def analyze_image(file: UploadFile = File(...)):
+    """Analyze a single uploaded JPEG/PNG image"""
+    data = await file.read()
+    
+    if not data:
+        return JSONResponse(
+            status_code=400,
+            content={"success": False, "error": "Empty upload"}
+        )
+    
+    try:
+        loop = asyncio.get_running_loop()
+        predictions = await loop.run_in_executor(analyze_executor, analyze_image_bytes, data)
+    except ValueError as e:
+        return JSONResponse(
+            status_code=400,
+            content={"success": False, "error": str(e)}
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"success": False, "error": str(e)}
+        )
+    
+    return {
+        "success": True,
+        "filename": file.filename,
+        "predictions": predictions
+    }
+
+
+# ==================== BATCH JOB ENDPOINTS ====================
+
+@app.post("/api/jobs")
+async def create_job(
+    files: List[UploadFile] = File(None),
+    directory: str = Form(None)
+):
+    """Start a bulk analysis job from uploaded images or a server-side directory"""
+    loop = asyncio.get_running_loop()
+    
+    if directory:
+        directory = os.path.abspath(directory)
+        if JOB_INPUT_ROOT and os.path.commonpath([directory, os.path.abspath(JOB_INPUT_ROOT)]) != os.path.abspath(JOB_INPUT_ROOT):
+            return JSONResponse(
+                status_code=403,
+                content={"success": False, "error": "Directory is outside the allowed input root"}
+            )
+        if not os.path.isdir(directory):
+            return JSONResponse(
+                status_code=400,
+                content={"success": False, "error": "Directory not found"}
+            )
+        
+        job_id = job_manager.new_job_id()
+        image_paths = await loop.run_in_executor(None, list_images, directory)
+        source = directory
+    elif files:
+        job_id = job_manager.new_job_id()
+        image_paths = await loop.run_in_executor(None, save_uploads, job_id, files)
+        source = "upload"
+    else:
+        return JSONResponse(
+            status_code=400,
+            content={"success": False, "error": "Provide files or a directory"}
+        )
+    
+    if not image_paths:
+        return JSONResponse(
+            status_code=400,
+            content={"success": False, "error": "No JPEG/PNG images found"}
+        )
+    
+    job = await loop.run_in_executor(None, job_manager.create_job, job_id, image_paths, source)
+    
+    return {
+        "success": True,
+        "job": job
+    }
+
+
+@app.get("/api/jobs")
+async def list_jobs():
+    """List all batch jobs"""
+    return {
+        "success": True,
+        "jobs": job_manager.list_jobs()
+    }
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Poll a batch job's progress"""
+    job = job_manager.get_job(job_id)
+    
+    if job is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Job not found"}
+        )
+    
+    return {
+        "success": True,
+        "job": job
+    }
+
+
+@app.get("/api/jobs/{job_id}/results")
+async def stream_job_results(job_id: str, follow: bool = True):
+    """
+    Stream a job's per-image results as JSONL
+    
+    With follow=true (default) the stream stays open, interleaving progress
+    lines, until the job stops running.
+    """
+    if job_manager.get_job(job_id) is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Job not found"}
+        )
+    
+    async def generate():
+        path = job_manager.results_path(job_id)
+        position = 0
+        last_processed = None
+        
+        while True:
+            job = job_manager.get_job(job_id)
+            
+            # Forward newly appended complete lines
+            if os.path.exists(path):
+                with open(path) as f:
+                    f.seek(position)
+                    while True:
+                        line = f.readline()
+                        if not line.endswith("\n"):
+                            break
+                        position = f.tell()
+                        yield line
+            
+            if job["processed"] != last_processed:
+                last_processed = job["processed"]
+                yield json.dumps({
+                    "type": "progress",
+                    "status": job["status"],
+                    "processed": job["processed"],
+                    "total": job["total"]
+                }) + "\n"
+            
+            if not follow or job["status"] != "running":
+                break
+            await asyncio.sleep(0.5)
+        
+        yield json.dumps({"type": "status", **job}) + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a running batch job (finished results are kept)"""
+    if job_manager.get_job(job_id) is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Job not found"}
+        )
+    
+    return {
+        "success": job_manager.cancel_job(job_id),
+        "job": job_manager.get_job(job_id)
+    }
+
+
+@app.post("/api/jobs/{job_id}/resume")
+async def resume_job(job_id: str):
+    """Resume a cancelled or interrupted batch job from where it stopped"""
+    loop = asyncio.get_running_loop()
+    job = await loop.run_in_executor(None, job_manager.resume_job, job_id)
+    
+    if job is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "Job not found"}
+        )
+    
+    return {
+        "success": True,
+        "job": job
+    }
+
+
+# ==================== PIPELINE STATS ENDPOINT ====================
+
+@app.get("/api/pipeline/stats")
+async def pipeline_stats():
+    """Get streaming pipeline queue depths, drop counters, timings and per-subscriber stats"""
+    if camera_hub is None:
+        return {
+            "active": False,
+            "subscribers": 0
+        }
+    
+    return camera_hub.get_stats()
+
+
 # ==================== WEBSOCKET ENDPOINT ====================
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time video streaming"""
-    global camera_active, camera
+    """
+    WebSocket endpoint for real-time video streaming
     
+    Connect with ?protocol=binary to receive frames as binary messages
+    (length-prefixed JSON header + raw JPEG) instead of base64-in-JSON.
+    
+    Connect with ?mode=predictions to receive only structured predictions
+    and draw the overlay client-side; add &preview_every=N to also receive
+    an annotated JPEG every Nth frame.
+    
+    Connect with ?fps=N to set the target preview frame rate. Slow clients
+    automatically get a lower JPEG quality and then a lower frame rate; the
+    chosen rate is reported in "pacing" messages.
+    
+    Smile is only evaluated while some client needs it: connect with
+    ?smile=0 (or send {"type": "subscribe", "smile": false}) to opt out;
+    arming auto-capture always needs it.
+    """
     await websocket.accept()
-    print("📡 WebSocket client connected")
+    protocol = "binary" if websocket.query_params.get("protocol") == "binary" else "json"
+    mode = "predictions" if websocket.query_params.get("mode") == "predictions" else "annotated"
+    try:
+        preview_every = max(int(websocket.query_params.get("preview_every", 0)), 0)
+    except ValueError:
+        preview_every = 0
+    try:
+        target_fps = float(websocket.query_params.get("fps", STREAM_TARGET_FPS))
+    except ValueError:
+        target_fps = STREAM_TARGET_FPS
+    encode_every = 1 if mode == "annotated" else preview_every
+    smile_subscribed = websocket.query_params.get("smile", "1") != "0"
+    print(f"📡 WebSocket client connected ({protocol} protocol, {mode} mode)")
+    
+    pacer = PacingController()
+    pacer.set_target_fps(target_fps)
     
-    # Initialize video processor
-    processor = get_video_processor()
+    await websocket.send_json({
+        "type": "protocol",
+        "protocol": protocol,
+        "mode": mode,
+        "preview_every": encode_every,
+        "pacing": pacer.get_state()
+    })
     
-    # Open camera
-    if camera is None:
-        camera = cv2.VideoCapture(0)
-        camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        camera.set(cv2.CAP_PROP_FPS, 30)
+    # Initialize hub and video processor (loads models, so keep it off the loop)
+    hub = await run_blocking(get_camera_hub)
+    processor = hub.processor
     
-    if not camera.isOpened():
+    # Join the shared stream; the first subscriber opens the camera
+    try:
+        subscription = await run_blocking(hub.subscribe, encode_every)
+    except RuntimeError as e:
         await websocket.send_json({
             "type": "error",
-            "message": "Failed to open camera"
+            "message": str(e)
         })
         await websocket.close()
         return
     
-    camera_active = True
+    pipeline = hub.pipeline
+    await run_blocking(hub.set_jpeg_quality, subscription, pacer.jpeg_quality)
+    
+    view_reason = f"view:{subscription.subscriber_id}"
+    auto_capture_reason = f"auto_capture:{subscription.subscriber_id}"
+    processor.set_smile_demand(view_reason, smile_subscribed)
+    
+    # All outgoing messages go through one sender task, so a slow socket
+    # never blocks the loop and outstanding bytes can be measured
+    send_queue = asyncio.Queue()
+    
+    def enqueue(message, is_frame=False):
+        """Queue a text/bytes message for the sender task"""
+        if is_frame:
+            pacer.send_started(len(message))
+        send_queue.put_nowait((message, is_frame))
+    
+    def enqueue_json(data):
+        """Queue a JSON control message for the sender task"""
+        enqueue(json.dumps(data))
+    
+    async def sender():
+        """Drain the send queue and feed send timings to the pacer"""
+        while True:
+            message, is_frame = await send_queue.get()
+            start = time.perf_counter()
+            if isinstance(message, bytes):
+                await websocket.send_bytes(message)
+            else:
+                await websocket.send_text(message)
+            
+            if is_frame and pacer.send_finished(len(message), time.perf_counter() - start):
+                # Rate changed: apply the new quality and tell the client
+                await run_blocking(hub.set_jpeg_quality, subscription, pacer.jpeg_quality)
+                await websocket.send_json({
+                    "type": "pacing",
+                    **pacer.get_state()
+                })
+    
+    sender_task = asyncio.create_task(sender())
+    
+    def on_capture_complete(result):
+        """Push a finished write-behind capture to this client (writer thread side)"""
+        loop.call_soon_threadsafe(enqueue_json, {
+            "type": "capture_saved" if result["status"] == "saved" else "capture_failed",
+            "image": result
+        })
+    
     auto_capture_enabled = False
+    pre_roll = AUTO_CAPTURE_PRE_ROLL
+    post_roll = AUTO_CAPTURE_POST_ROLL
+    trigger_time = None
     frame_count = 0
+    last_stats_time = 0.0
+    loop = asyncio.get_running_loop()
     
     try:
         while True:
@@ -306,85 +898,192 @@ async def websocket_endpoint(websocket: WebSocket):
                     print("🛑 Stop signal received")
                     break
                 elif msg_type == "capture":
-                    # Manual capture
-                    ret, frame = camera.read()
-                    if ret:
-                        predictions = processor.process_frame(frame)
-                        capture_info = processor.capture_selfie(frame, predictions)
-                        
-                        await websocket.send_json({
-                            "type": "capture_success",
-                            "image": capture_info
+                    # Manual capture from the pipeline's latest frame, predictions and JPEG
+                    _, packet = pipeline.encoded.peek()
+                    if packet is None:
+                        # Nothing processed yet (camera still starting)
+                        enqueue_json({
+                            "type": "capture_failed",
+                            "image": {"status": "failed", "error": "No frame available yet"}
                         })
+                    else:
+                        capture_info = capture_writer.submit_packet(packet, on_capture_complete)
+                        
+                        if capture_info is None:
+                            enqueue_json({
+                                "type": "capture_busy",
+                                "captures": capture_writer.get_stats()
+                            })
+                        else:
+                            enqueue_json({
+                                "type": "capture_success",
+                                "image": capture_info
+                            })
                 elif msg_type == "auto_capture":
                     auto_capture_enabled = data.get("enabled", False)
+                    if "pre_roll_ms" in data:
+                        pre_roll = max(float(data["pre_roll_ms"]), 0.0) / 1000
+                    if "post_roll_ms" in data:
+                        post_roll = max(float(data["post_roll_ms"]), 0.0) / 1000
+                    # The window must fit in the pipeline's pre-roll ring
+                    pre_roll, post_roll, clamped = pipeline.ring.clamp_window(pre_roll, post_roll, STREAM_TARGET_FPS)
+                    if clamped:
+                        print(f"⚠️ Auto-capture window clamped to the pre-roll ring: "
+                              f"{pre_roll * 1000:.0f} ms before, {post_roll * 1000:.0f} ms after")
+                    enqueue_json({
+                        "type": "auto_capture_window",
+                        "pre_roll_ms": round(pre_roll * 1000),
+                        "post_roll_ms": round(post_roll * 1000),
+                        "clamped": clamped
+                    })
+                    trigger_time = None
+                    processor.set_smile_demand(auto_capture_reason, auto_capture_enabled)
                     print(f"🤖 Auto-capture: {auto_capture_enabled}")
+                elif msg_type == "subscribe":
+                    if "smile" in data:
+                        processor.set_smile_demand(view_reason, bool(data["smile"]))
                 elif msg_type == "settings":
                     if "smile_threshold" in data:
                         processor.set_smile_threshold(data["smile_threshold"])
+                elif msg_type == "pacing":
+                    if "target_fps" in data:
+                        pacer.set_target_fps(data["target_fps"])
+                        enqueue_json({
+                            "type": "pacing",
+                            **pacer.get_state()
+                        })
                         
             except asyncio.TimeoutError:
                 pass
             except json.JSONDecodeError:
                 pass
             
-            # Read frame from camera
-            ret, frame = camera.read()
-            
-            if not ret:
-                await websocket.send_json({
-                    "type": "error",
-                    "message": "Failed to read frame"
-                })
+            # A failed send (e.g. disconnect) ends the stream
+            if sender_task.done():
+                sender_task.result()
                 break
             
-            frame_count += 1
+            # Sleep only for what is left of this frame period
+            delay = pacer.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
             
-            # Process frame
-            predictions = processor.process_frame(frame)
+            # Take the freshest encoded frame; older ones are dropped for this client
+            packet = await loop.run_in_executor(
+                None, subscription.next_packet, pipeline, 0.1
+            )
             
-            # Auto-capture on smile
-            if auto_capture_enabled and len(predictions["faces"]) > 0:
-                for face in predictions["faces"]:
-                    if face["is_smiling"] and face["is_clear"]:
-                        capture_info = processor.capture_selfie(frame, predictions)
-                        
-                        await websocket.send_json({
-                            "type": "auto_capture",
-                            "image": capture_info
-                        })
-                        
-                        # Disable auto-capture temporarily
-                        auto_capture_enabled = False
-                        break
+            if packet is None:
+                if pipeline.error:
+                    enqueue_json({
+                        "type": "error",
+                        "message": pipeline.error
+                    })
+                    break
+                continue
             
-            # Draw predictions on frame
-            annotated_frame = processor.draw_predictions(frame.copy(), predictions)
+            pacer.frame_scheduled()
+            frame_count += 1
+            predictions = packet["predictions"]
             
-            # Encode frame
-            frame_base64 = processor.encode_frame_to_base64(annotated_frame)
+            # Auto-capture on smile (held back while the writer is backed up).
+            # The trigger opens a window; once it closes, the best frame in it
+            # is taken from the pipeline's pre-roll without re-running models.
+            if auto_capture_enabled and trigger_time is None and not capture_writer.congested:
+                if any(face["is_smiling"] and face["is_clear"] for face in predictions["faces"]):
+                    trigger_time = packet["captured_at"]
             
-            # Send frame and predictions
-            await websocket.send_json({
+            if trigger_time is not None and packet["captured_at"] >= trigger_time + post_roll:
+                best = await loop.run_in_executor(
+                    None, pipeline.ring.select_best, trigger_time - pre_roll, trigger_time + post_roll
+                )
+                if best is None:
+                    best = {
+                        "frame": packet["frame"],
+                        "predictions": predictions,
+                        "frame_number": packet["frame_number"],
+                        "timestamp": packet["captured_at"],
+                        "score": None,
+                        "candidates": 0
+                    }
+                
+                capture_info = capture_writer.submit(best["frame"], best["predictions"], on_capture_complete)
+                if capture_info is not None:
+                    enqueue_json({
+                        "type": "auto_capture",
+                        "image": capture_info,
+                        "best_shot": {
+                            "frame_number": best["frame_number"],
+                            "offset_ms": round((best["timestamp"] - trigger_time) * 1000, 1),
+                            "score": best["score"],
+                            "candidates": best["candidates"]
+                        }
+                    })
+                    
+                    # Disable auto-capture temporarily
+                    auto_capture_enabled = False
+                    processor.set_smile_demand(auto_capture_reason, False)
+                trigger_time = None
+            
+            # Backpressure: skip the frame while too many bytes are in flight
+            if pacer.outstanding_bytes > pacer.max_outstanding_bytes:
+                pacer.frame_skipped()
+                continue
+            
+            # Send frame and predictions (same encoded JPEG for every subscriber)
+            jpeg = subscription.take_jpeg(packet)
+            header = {
                 "type": "frame",
-                "frame": frame_base64,
                 "predictions": predictions,
-                "frame_number": frame_count
-            })
+                "frame_number": frame_count,
+                "latency_ms": round((time.time() - packet["captured_at"]) * 1000, 1)
+            }
             
-            # Small delay to control frame rate
-            await asyncio.sleep(0.033)  # ~30 FPS
+            if jpeg is None:
+                # Predictions-only frame; the client draws the overlay
+                header["type"] = "predictions"
+                enqueue(json.dumps(header, separators=(',', ':')), is_frame=True)
+            elif protocol == "binary":
+                enqueue(pack_binary_frame(header, jpeg), is_frame=True)
+            else:
+                header["frame"] = base64.b64encode(jpeg).decode('utf-8')
+                enqueue(json.dumps(header), is_frame=True)
+            
+            # Report pipeline and pacing stats once per second
+            now = time.time()
+            if now - last_stats_time >= 1.0:
+                last_stats_time = now
+                subscription.stats["pacing"] = pacer.get_state()
+                enqueue_json({
+                    "type": "stats",
+                    "pipeline": pipeline.get_stats(),
+                    "pacing": pacer.get_state(),
+                    "subscriber": subscription.get_stats(),
+                    "captures": capture_writer.get_stats(),
+                    "inference": processor.scheduler.get_stats(),
+                    "age_gender_refresh": processor.age_gender_refresh.get_stats(),
+                    "subscribers": len(hub.subscriptions)
+                })
             
     except WebSocketDisconnect:
         print("📡 WebSocket client disconnected")
     except Exception as e:
         print(f"❌ WebSocket error: {e}")
     finally:
-        camera_active = False
-        if camera is not None:
-            camera.release()
-            camera = None
-        print("🎥 Camera released")
+        # Let queued messages (e.g. a final error) go out before stopping
+        if not sender_task.done():
+            try:
+                await asyncio.wait_for(drain_queue(send_queue), timeout=1.0)
+            except asyncio.TimeoutError:
+                pass
+            sender_task.cancel()
+        
+        processor.set_smile_demand(view_reason, False)
+        processor.set_smile_demand(auto_capture_reason, False)
+        
+        # The last subscriber out releases the camera
+        await run_blocking(hub.unsubscribe, subscription)
+        print(f"📡 Subscriber {subscription.subscriber_id} left ({len(hub.subscriptions)} remaining)")
 
 
 # ==================== STARTUP & SHUTDOWN ====================
@@ -399,14 +1098,30 @@ async def startup_event():
     print("📚 Docs: http://localhost:8000/docs")
     print("🔌 WebSocket: ws://localhost:8000/ws")
     print("="*60)
+    
+    init_services()
+    
+    # Catch gallery changes made while the server was down, then watch
+    added, removed = await run_blocking(gallery_index.reconcile)
+    print(f"🖼️  Gallery index: {gallery_index.count()} images ({added} added, {removed} removed)")
+    gallery_index.start_watcher()
+    
+    # Pick up batch jobs interrupted by the last shutdown
+    job_manager.load_existing()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
-    global camera
-    if camera is not None:
-        camera.release()
+    if camera_hub is not None:
+        camera_hub.shutdown()
+    cv_executor.shutdown(wait=False)
+    analyze_executor.shutdown(wait=False)
+    job_manager.shutdown()
+    if capture_writer is not None:
+        capture_writer.shutdown()
+    gallery_index.close()
+    thumbnail_cache.shutdown()
     print("👋 Smilage backend shut down")
 
 
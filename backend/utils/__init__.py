@@ -1,15 +1,29 @@
 from .face_detector import FaceDetector
 from .age_predictor import AgePredictor
 from .gender_predictor import GenderPredictor
+from .age_gender_predictor import AgeGenderPredictor
 from .emotion_predictor import EmotionPredictor
-from .smile_detector import SmileDetector
+from .smile_detector import SmileDetector, SmileEngine
+from .face_tracker import FaceTracker
+from .frame_context import FrameContext
 from .video_processor import VideoProcessor
+from .frame_pipeline import FramePipeline, LatestSlot
+from .camera_hub import CameraHub
+from .processor_pool import ProcessorPool
 
 __all__ = [
     'FaceDetector',
     'AgePredictor',
     'GenderPredictor',
+    'AgeGenderPredictor',
     'EmotionPredictor',
     'SmileDetector',
-    'VideoProcessor'
+    'SmileEngine',
+    'FaceTracker',
+    'FrameContext',
+    'VideoProcessor',
+    'FramePipeline',
+    'LatestSlot',
+    'CameraHub',
+    'ProcessorPool'
 ]
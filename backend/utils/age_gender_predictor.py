@@ -0,0 +1,89 @@
+import cv2
+import numpy as np
+from .age_predictor import AgePredictor
+from .gender_predictor import GenderPredictor
+from .inference_backend import create_fused_backend
+from .frame_context import as_bgr
+
+class AgeGenderPredictor:
+    """
+    Age and gender from one fused ONNX model (see download_models.py)
+    
+    Both Caffe nets take the same 227x227 mean-subtracted blob, so the fused
+    model builds that blob once and runs both heads in a single session call.
+    """
+    
+    AGE_RANGES = AgePredictor.AGE_RANGES
+    GENDER_LIST = GenderPredictor.GENDER_LIST
+    
+    # Output heads of the fused graph
+    OUTPUT_NAMES = ["age_prob", "gender_prob"]
+    
+    def __init__(
+        self,
+        backend="onnxruntime",
+        backend_options=None,
+        onnx_path="models/age_gender_net.onnx",
+        int8_path="models/age_gender_net.int8.onnx"
+    ):
+        """
+        Initialize fused age/gender predictor
+        
+        Args:
+            backend: "opencv", "onnxruntime" or "onnxruntime-int8"
+            backend_options: Extra options for the backend (see inference_backend)
+            onnx_path: Fused float model
+            int8_path: Fused quantized model for the onnxruntime-int8 backend
+        """
+        try:
+            self.backend = create_fused_backend(backend, onnx_path, int8_path, **(backend_options or {}))
+            print(f"✅ Age/Gender Predictor (fused) initialized successfully [{self.backend.description}]")
+        except Exception as e:
+            raise Exception(f"Failed to load fused age/gender model: {e}")
+    
+    def predict_age_gender_batch(self, face_images):
+        """
+        Predict age and gender for several faces in a single forward pass
+        
+        Args:
+            face_images: List of face images (BGR format) or FrameContext crops
+        
+        Returns:
+            (age_results, gender_results): Lists of (age_range, confidence)
+            and (gender, confidence) tuples, one per face
+        """
+        if len(face_images) == 0:
+            return [], []
+        
+        # One NCHW blob shared by both heads
+        blob = cv2.dnn.blobFromImages(
+            [as_bgr(face) for face in face_images],
+            scalefactor=1.0,
+            size=(227, 227),
+            mean=(78.4263377603, 87.7689143744, 114.895847746),
+            swapRB=False
+        )
+        
+        age_predictions, gender_predictions = self.backend.run_all(blob, self.OUTPUT_NAMES)
+        
+        return (
+            self._top1(age_predictions, self.AGE_RANGES),
+            self._top1(gender_predictions, self.GENDER_LIST)
+        )
+    
+    def predict_age_gender(self, face_image):
+        """
+        Predict age and gender for one face
+        
+        Returns:
+            (age_range, age_confidence, gender, gender_confidence)
+        """
+        age_results, gender_results = self.predict_age_gender_batch([face_image])
+        return age_results[0] + gender_results[0]
+    
+    @staticmethod
+    def _top1(predictions, labels):
+        """Vectorized argmax -> list of (label, confidence)"""
+        indices = predictions.argmax(axis=1)
+        confidences = predictions[np.arange(len(indices)), indices]
+        return [(labels[index], float(confidence)) for index, confidence in zip(indices, confidences)]
@@ -1,5 +1,7 @@
 import cv2
 import numpy as np
+from .inference_backend import create_backend
+from .frame_context import as_bgr
 
 class AgePredictor:
     """
@@ -15,7 +17,11 @@ class AgePredictor:
     def __init__(
         self,
         prototxt_path="models/age_deploy.prototxt",
-        model_path="models/age_net.caffemodel"
+        model_path="models/age_net.caffemodel",
+        backend="opencv",
+        backend_options=None,
+        onnx_path="models/age_net.onnx",
+        int8_path="models/age_net.int8.onnx"
     ):
         """
         Initialize age predictor
@@ -23,10 +29,17 @@ class AgePredictor:
         Args:
             prototxt_path: Path to model architecture file
             model_path: Path to model weights file
+            backend: "opencv", "onnxruntime" or "onnxruntime-int8"
+            backend_options: Extra options for the backend (see inference_backend)
+            onnx_path: Converted model for the onnxruntime backend
+            int8_path: Quantized model for the onnxruntime-int8 backend
         """
         try:
-            self.age_net = cv2.dnn.readNetFromCaffe(prototxt_path, model_path)
-            print("✅ Age Predictor initialized successfully")
+            self.backend = create_backend(
+                backend, prototxt_path, model_path, onnx_path, int8_path,
+                **(backend_options or {})
+            )
+            print(f"✅ Age Predictor initialized successfully [{self.backend.description}]")
         except Exception as e:
             raise Exception(f"Failed to load age model: {e}")
     
@@ -35,7 +48,7 @@ class AgePredictor:
         Predict age from face image
         
         Args:
-            face_image: Face image (BGR format)
+            face_image: Face image (BGR format) or FrameContext crop
             
         Returns:
             age_range: Predicted age range as string
@@ -43,18 +56,15 @@ class AgePredictor:
         """
         # Prepare the face image for the model
         blob = cv2.dnn.blobFromImage(
-            face_image,
+            as_bgr(face_image),
             scalefactor=1.0,
             size=(227, 227),
             mean=(78.4263377603, 87.7689143744, 114.895847746),
             swapRB=False
         )
         
-        # Feed the image to the network
-        self.age_net.setInput(blob)
-        
-        # Get predictions
-        predictions = self.age_net.forward()
+        # Feed the image to the network and get predictions
+        predictions = self.backend.run(blob)
         
         # Get the age range with highest confidence
         age_index = predictions[0].argmax()
@@ -63,18 +73,56 @@ class AgePredictor:
         
         return age_range, float(confidence)
     
-    def get_age_midpoint(self, age_range):
+    def predict_age_batch(self, face_images):
         """
-        Convert age range to midpoint value
+        Predict age for several faces in a single forward pass
         
         Args:
-            age_range: Age range string like "(25-32)"
+            face_images: List of face images (BGR format) or FrameContext crops
             
         Returns:
-            Midpoint age value
+            List of (age_range, confidence) tuples, one per face
         """
-        # Remove parentheses and split
-        ages = age_range.strip('()').split('-')
-        low = int(ages[0])
-        high = int(ages[1])
-        return (low + high) // 2
+        if len(face_images) == 0:
+            return []
+        
+        # One NCHW blob for the whole batch
+        blob = cv2.dnn.blobFromImages(
+            [as_bgr(face) for face in face_images],
+            scalefactor=1.0,
+            size=(227, 227),
+            mean=(78.4263377603, 87.7689143744, 114.895847746),
+            swapRB=False
+        )
+        
+        predictions = self.backend.run(blob)
+        
+        # Vectorized argmax across the batch
+        indices = predictions.argmax(axis=1)
+        confidences = predictions[np.arange(len(indices)), indices]
+        
+        return [
+            (self.AGE_RANGES[index], float(confidence))
+            for index, confidence in zip(indices, confidences)
+        ]
+    
+    def get_age_midpoint(self, age_range):
+        """Convert age range to midpoint value (see age_midpoint)"""
+        return age_midpoint(age_range)
+
+
+def age_midpoint(age_range):
+    """
+    Convert age range to midpoint value
+    
+    Args:
+        age_range: Age range string like "(25-32)"
+        
+    Returns:
+        Midpoint age value
+    """
+    # Remove parentheses and split
+    ages = age_range.strip('()').split('-')
+    low = int(ages[0])
+    high = int(ages[1])
+    return (low + high) // 2
@@ -0,0 +1,231 @@
+import re
+import cv2
+import numpy as np
+
+
+def parse_prototxt(path):
+    """
+    Parse a Caffe deploy prototxt into nested dicts
+    
+    Repeated fields (layer, bottom, dim, ...) become lists.
+    
+    Args:
+        path: Prototxt file
+    
+    Returns:
+        dict: Parsed message
+    """
+    with open(path) as f:
+        text = re.sub(r"#.*", "", f.read())
+    tokens = re.findall(r'"[^"]*"|[{}:]|[^\s{}:"]+', text)
+    
+    def parse_value(token):
+        if token.startswith('"'):
+            return token[1:-1]
+        try:
+            return float(token) if any(c in token for c in ".eE") else int(token)
+        except ValueError:
+            return token
+    
+    def parse_message(pos):
+        message = {}
+        while pos < len(tokens) and tokens[pos] != "}":
+            key = tokens[pos]
+            if tokens[pos + 1] == ":" and tokens[pos + 2] != "{":
+                value, pos = parse_value(tokens[pos + 2]), pos + 3
+            else:
+                pos += 2 if tokens[pos + 1] == "{" else 3
+                value, pos = parse_message(pos)
+                pos += 1
+            message.setdefault(key, []).append(value)
+        return message, pos
+    
+    message, _ = parse_message(0)
+    return message
+
+
+def _field(message, key, default=None):
+    """First value of a (possibly repeated) prototxt field"""
+    values = message.get(key)
+    return values[0] if values else default
+
+
+def build_caffe_graph(prototxt_path, model_path, input_name="data", prefix=""):
+    """
+    Translate a Caffe classification net into ONNX nodes and initializers
+    
+    Supports the layer types of the age/gender nets: Input, Convolution,
+    ReLU, Pooling, LRN, InnerProduct, Dropout and Softmax. Weights are read
+    through cv2.dnn, so Caffe itself is not needed.
+    
+    Args:
+        prototxt_path: Caffe architecture file
+        model_path: Caffe weights file
+        input_name: ONNX tensor feeding the first layer
+        prefix: Prefix for node and tensor names (lets several nets share a graph)
+    
+    Returns:
+        (nodes, initializers, output_name)
+    """
+    from onnx import helper, numpy_helper
+    
+    net = cv2.dnn.readNetFromCaffe(prototxt_path, model_path)
+    layers = parse_prototxt(prototxt_path)["layer"]
+    
+    nodes = []
+    initializers = []
+    # Caffe blob name -> current ONNX tensor (in-place layers rebind it)
+    tensors = {}
+    output_name = None
+    
+    def add_initializer(name, array):
+        initializers.append(numpy_helper.from_array(np.ascontiguousarray(array, dtype=np.float32), name))
+        return name
+    
+    for layer in layers:
+        name = _field(layer, "name")
+        layer_type = _field(layer, "type")
+        top = _field(layer, "top")
+        bottom = _field(layer, "bottom")
+        out = f"{prefix}{name}"
+        
+        if layer_type == "Input":
+            tensors[top] = input_name
+            continue
+        
+        source = tensors[bottom]
+        
+        if layer_type == "Convolution":
+            params = _field(layer, "convolution_param", {})
+            kernel = _field(params, "kernel_size")
+            stride = _field(params, "stride", 1)
+            pad = _field(params, "pad", 0)
+            weights = net.getParam(name, 0)
+            bias = net.getParam(name, 1).reshape(-1)
+            nodes.append(helper.make_node(
+                "Conv",
+                [source, add_initializer(f"{out}_W", weights), add_initializer(f"{out}_B", bias)],
+                [out],
+                name=out,
+                kernel_shape=[kernel, kernel],
+                strides=[stride, stride],
+                pads=[pad] * 4,
+                group=_field(params, "group", 1)
+            ))
+        elif layer_type == "ReLU":
+            nodes.append(helper.make_node("Relu", [source], [out], name=out))
+        elif layer_type == "Pooling":
+            params = _field(layer, "pooling_param", {})
+            if _field(params, "pool", "MAX") != "MAX":
+                raise ValueError(f"Unsupported pooling in {name}")
+            kernel = _field(params, "kernel_size")
+            stride = _field(params, "stride", 1)
+            pad = _field(params, "pad", 0)
+            # Caffe rounds pooled sizes up
+            nodes.append(helper.make_node(
+                "MaxPool", [source], [out], name=out,
+                kernel_shape=[kernel, kernel], strides=[stride, stride],
+                pads=[pad] * 4, ceil_mode=1
+            ))
+        elif layer_type == "LRN":
+            params = _field(layer, "lrn_param", {})
+            nodes.append(helper.make_node(
+                "LRN", [source], [out], name=out,
+                size=_field(params, "local_size", 5),
+                alpha=float(_field(params, "alpha", 1.0)),
+                beta=float(_field(params, "beta", 0.75)),
+                bias=float(_field(params, "k", 1.0))
+            ))
+        elif layer_type == "InnerProduct":
+            flat = f"{out}_flat"
+            nodes.append(helper.make_node("Flatten", [source], [flat], name=flat, axis=1))
+            weights = net.getParam(name, 0)
+            bias = net.getParam(name, 1).reshape(-1)
+            nodes.append(helper.make_node(
+                "Gemm",
+                [flat, add_initializer(f"{out}_W", weights), add_initializer(f"{out}_B", bias)],
+                [out],
+                name=out,
+                transB=1
+            ))
+        elif layer_type == "Dropout":
+            # Identity at inference time
+            tensors[top] = source
+            continue
+        elif layer_type == "Softmax":
+            nodes.append(helper.make_node("Softmax", [source], [out], name=out, axis=1))
+        else:
+            raise ValueError(f"Unsupported Caffe layer type {layer_type} ({name})")
+        
+        tensors[top] = out
+        output_name = out
+    
+    return nodes, initializers, output_name
+
+
+def convert_caffe_to_onnx(prototxt_path, model_path, onnx_path, opset=13):
+    """
+    Convert a Caffe age/gender net to ONNX with a dynamic batch dimension
+    
+    Args:
+        prototxt_path: Caffe architecture file
+        model_path: Caffe weights file
+        onnx_path: Output .onnx file
+        opset: ONNX opset version
+    """
+    name = parse_prototxt(prototxt_path)["name"][0]
+    fuse_caffe_nets([("", prototxt_path, model_path)], onnx_path, name, opset)
+
+
+def fuse_caffe_nets(nets, onnx_path, graph_name="FusedNet", opset=13):
+    """
+    Merge Caffe nets that take the same input blob into one ONNX graph
+    
+    Every net becomes a branch fed by the shared "data" input, with its own
+    output head named <prefix>prob, so one blob and one run produce all
+    predictions.
+    
+    Args:
+        nets: List of (prefix, prototxt_path, model_path)
+        onnx_path: Output .onnx file
+        graph_name: ONNX graph name
+        opset: ONNX opset version
+    """
+    import onnx
+    from onnx import helper, TensorProto
+    
+    nodes = []
+    initializers = []
+    outputs = []
+    for prefix, prototxt_path, model_path in nets:
+        net_nodes, net_initializers, output_name = build_caffe_graph(
+            prototxt_path, model_path, input_name="data", prefix=prefix
+        )
+        nodes += net_nodes
+        initializers += net_initializers
+        num_classes = net_initializers[-1].dims[0]
+        outputs.append(helper.make_tensor_value_info(output_name, TensorProto.FLOAT, ["N", num_classes]))
+    
+    graph = helper.make_graph(
+        nodes,
+        graph_name,
+        [helper.make_tensor_value_info("data", TensorProto.FLOAT, ["N", 3, 227, 227])],
+        outputs,
+        initializers
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", opset)])
+    onnx.checker.check_model(model)
+    onnx.save(model, onnx_path)
+
+
+def quantize_to_int8(onnx_path, int8_path):
+    """
+    Quantize an ONNX model's weights to INT8 (dynamic quantization)
+    
+    Args:
+        onnx_path: Float model
+        int8_path: Output quantized model
+    """
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    
+    quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QUInt8)
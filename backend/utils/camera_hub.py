@@ -0,0 +1,267 @@
+import threading
+import time
+from .frame_pipeline import FramePipeline
+
+
+class Subscription:
+    """
+    One viewer of the shared camera stream
+    
+    Every subscriber reads the pipeline's newest encoded packet on its own
+    schedule; packets it was too slow to pick up are dropped for it alone.
+    """
+    
+    def __init__(self, subscriber_id, encode_every=1):
+        """
+        Initialize subscription
+        
+        Args:
+            subscriber_id: Unique integer ID
+            encode_every: Send an annotated JPEG every Nth packet; 0 for predictions only
+        """
+        self.subscriber_id = subscriber_id
+        self.encode_every = encode_every
+        self.jpeg_quality = None
+        
+        self.last_seq = 0
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self.frames_since_jpeg = 0
+        
+        # Extra per-client stats supplied by the owner (e.g. pacing state)
+        self.stats = {}
+    
+    def next_packet(self, pipeline, timeout=None):
+        """
+        Wait for a packet newer than the last one this subscriber saw
+        
+        Args:
+            pipeline: Running FramePipeline
+            timeout: Seconds to wait
+        
+        Returns:
+            Packet dict, or None on timeout or when the pipeline stopped
+        """
+        seq, packet = pipeline.encoded.get(self.last_seq, timeout)
+        if packet is None:
+            return None
+        
+        if self.last_seq:
+            self.frames_dropped += seq - self.last_seq - 1
+        self.last_seq = seq
+        self.frames_received += 1
+        return packet
+    
+    def take_jpeg(self, packet):
+        """
+        Pick the JPEG to send with this packet, honouring encode_every and
+        this subscriber's JPEG quality
+        
+        Returns:
+            The packet's JPEG buffer, or None to send predictions only
+        """
+        self.frames_since_jpeg += 1
+        if self.encode_every <= 0 or packet["jpeg"] is None:
+            return None
+        if self.frames_since_jpeg < self.encode_every:
+            return None
+        
+        self.frames_since_jpeg = 0
+        return packet.get("jpeg_variants", {}).get(self.jpeg_quality, packet["jpeg"])
+    
+    def get_stats(self):
+        """Get per-subscriber counters"""
+        return {
+            "id": self.subscriber_id,
+            "encode_every": self.encode_every,
+            "jpeg_quality": self.jpeg_quality,
+            "frames_received": self.frames_received,
+            "frames_dropped": self.frames_dropped,
+            **self.stats
+        }
+
+
+class CameraHub:
+    """
+    Shared camera with fan-out to multiple subscribers
+    
+    The device is opened and the pipeline started for the first subscriber,
+    inference runs once per frame for everyone, and the device is released
+    when the last subscriber leaves.
+    """
+    
+    def __init__(self, processor, open_camera, lock=None):
+        """
+        Initialize camera hub
+        
+        Args:
+            processor: VideoProcessor shared by all subscribers
+            open_camera: Callable returning an opened cv2.VideoCapture
+            lock: Lock guarding the processor's models
+        """
+        self.processor = processor
+        self.open_camera = open_camera
+        self.lock = lock or threading.Lock()
+        
+        self.state_lock = threading.Lock()
+        self.camera = None
+        self.pipeline = None
+        self.subscriptions = {}
+        self.next_id = 1
+    
+    @property
+    def active(self):
+        """True while the camera pipeline is running"""
+        return self.pipeline is not None and self.pipeline.running
+    
+    def subscribe(self, encode_every=1):
+        """
+        Add a subscriber, opening the camera if needed (blocking)
+        
+        Args:
+            encode_every: Send an annotated JPEG every Nth packet; 0 for predictions only
+        
+        Returns:
+            Subscription
+        
+        Raises:
+            RuntimeError: If the camera cannot be opened
+        """
+        with self.state_lock:
+            if not self.active:
+                self._start()
+            
+            subscription = Subscription(self.next_id, encode_every)
+            self.next_id += 1
+            self.subscriptions[subscription.subscriber_id] = subscription
+            self._update_encoding()
+            return subscription
+    
+    def unsubscribe(self, subscription):
+        """Remove a subscriber; the last one out releases the camera (blocking)"""
+        with self.state_lock:
+            self.subscriptions.pop(subscription.subscriber_id, None)
+            if not self.subscriptions:
+                self._stop()
+            else:
+                self._update_encoding()
+    
+    def set_jpeg_quality(self, subscription, quality):
+        """Update the JPEG quality a subscriber asks for"""
+        with self.state_lock:
+            subscription.jpeg_quality = quality
+            self._update_encoding()
+    
+    def latest_packet(self, warmup_frames=5):
+        """
+        Get the newest processed frame for a capture (blocking)
+        
+        While streaming this is the pipeline's latest packet, so no model or
+        encoder runs again. Without a stream, the camera is opened for a
+        single read and the frame is analyzed once.
+        
+        Args:
+            warmup_frames: Frames discarded after opening so exposure settles
+        
+        Returns:
+            Packet dict (frame, predictions, jpeg, jpeg_quality, frame_number,
+            captured_at), or None if no frame is available
+        
+        Raises:
+            RuntimeError: If the camera cannot be opened or read
+        """
+        with self.state_lock:
+            if self.active:
+                _, packet = self.pipeline.encoded.peek()
+                return packet
+            
+            camera = self.open_camera()
+            try:
+                if not camera.isOpened():
+                    raise RuntimeError("Failed to open camera")
+                for _ in range(warmup_frames):
+                    camera.read()
+                ret, frame = camera.read()
+            finally:
+                camera.release()
+            if not ret:
+                raise RuntimeError("Failed to capture frame")
+            
+            with self.lock:
+                predictions = self.processor.analyze_image(frame)
+            return {
+                "frame": frame,
+                "predictions": predictions,
+                "jpeg": None,
+                "jpeg_quality": None,
+                "frame_number": None,
+                "captured_at": time.time()
+            }
+    
+    def shutdown(self):
+        """Stop the pipeline and release the camera regardless of subscribers"""
+        with self.state_lock:
+            self.subscriptions = {}
+            self._stop()
+    
+    def _start(self):
+        """Open the camera and start the shared pipeline"""
+        # A pipeline that died on a read error still holds the old device
+        self._stop()
+        
+        camera = self.open_camera()
+        if not camera.isOpened():
+            camera.release()
+            raise RuntimeError("Failed to open camera")
+        
+        self.camera = camera
+        self.pipeline = FramePipeline(camera, self.processor, lock=self.lock)
+        self.pipeline.start()
+        print("🎥 Camera opened")
+    
+    def _stop(self):
+        """Stop the pipeline and release the camera"""
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            self.pipeline = None
+        if self.camera is not None:
+            self.camera.release()
+            self.camera = None
+            print("🎥 Camera released")
+    
+    def _update_encoding(self):
+        """
+        Encode as often as the most demanding subscriber needs, at the
+        highest quality any subscriber asks for, so each frame is annotated
+        once for everyone; subscribers whose pacer lowered their quality get
+        an extra encode at that quality
+        """
+        if self.pipeline is None:
+            return
+        
+        subscriptions = list(self.subscriptions.values())
+        intervals = [s.encode_every for s in subscriptions if s.encode_every > 0]
+        qualities = {
+            s.jpeg_quality for s in subscriptions
+            if s.encode_every > 0 and s.jpeg_quality is not None
+        }
+        top = max(qualities) if qualities else None
+        
+        self.pipeline.encode_every = min(intervals) if intervals else 0
+        self.pipeline.jpeg_quality = top
+        self.pipeline.variant_qualities = tuple(sorted(qualities - {top}))
+    
+    def get_stats(self):
+        """
+        Get hub, pipeline and per-subscriber statistics
+        
+        Returns:
+            dict: Hub statistics
+        """
+        with self.state_lock:
+            return {
+                "active": self.active,
+                "subscribers": len(self.subscriptions),
+                "pipeline": self.pipeline.get_stats() if self.pipeline is not None else None,
+                "clients": [s.get_stats() for s in self.subscriptions.values()]
+            }
@@ -0,0 +1,262 @@
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+import cv2
+
+FSYNC_POLICIES = ("none", "file", "full")
+
+
+def unique_capture_filename(capture_dir, reserved=()):
+    """
+    Build a capture file name that cannot clash with an existing one
+    
+    Names keep the selfie_<date>_<time> prefix, with microseconds so several
+    captures in the same second get different names, plus a counter if a
+    name is still taken.
+    
+    Args:
+        capture_dir: Directory the capture will be written to
+        reserved: Names handed out but not yet on disk
+    
+    Returns:
+        File name (without directory)
+    """
+    base = f"selfie_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+    filename = f"{base}.jpg"
+    suffix = 1
+    while filename in reserved or os.path.exists(os.path.join(capture_dir, filename)):
+        filename = f"{base}_{suffix}.jpg"
+        suffix += 1
+    return filename
+
+
+class CaptureWriter:
+    """
+    Write-behind persistence of captures
+    
+    submit() only reserves a file name and queues the frame; worker threads
+    draw the overlay, encode, write and (optionally) fsync, then update the
+    gallery index and thumbnail cache. The queue is bounded: when it is full
+    submit() returns None so callers can back off instead of piling up frames.
+    """
+    
+    def __init__(
+        self,
+        processor,
+        workers=2,
+        max_pending=8,
+        fsync="none",
+        jpeg_quality=95,
+        min_reuse_quality=80,
+        history=256
+    ):
+        """
+        Initialize capture writer
+        
+        Args:
+            processor: VideoProcessor providing capture_dir, draw_predictions,
+                gallery_index and thumbnail_cache
+            workers: Writer threads
+            max_pending: Captures queued or being written before submit() refuses more
+            fsync: "none" (leave it to the OS), "file" (fsync the image) or
+                "full" (fsync the image and its directory entry)
+            jpeg_quality: JPEG quality of captures encoded here
+            min_reuse_quality: Lowest quality at which an already encoded
+                stream JPEG is saved as-is instead of re-encoded; defaults to
+                the /ws pacer's top quality, so captures from a client that
+                keeps up reuse the stream JPEG
+            history: Finished captures kept for status lookups
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        
+        self.processor = processor
+        self.max_pending = max_pending
+        self.fsync = fsync
+        self.jpeg_quality = jpeg_quality
+        self.min_reuse_quality = min_reuse_quality
+        self.history = history
+        
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.reserved = set()
+        self.captures = OrderedDict()
+        
+        self.written = 0
+        self.reused_jpegs = 0
+        self.failed = 0
+        self.rejected = 0
+        self.write_ms = 0.0
+        
+        self.threads = [
+            threading.Thread(target=self._worker, name=f"capture-writer-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+    
+    @property
+    def congested(self):
+        """True when the queue is full and new captures would be refused"""
+        return self.pending >= self.max_pending
+    
+    def submit_packet(self, packet, on_complete=None):
+        """
+        Queue a capture of a pipeline packet, reusing its annotated JPEG when
+        it was encoded at min_reuse_quality or better (otherwise the frame
+        is re-encoded at jpeg_quality on the writer thread)
+        
+        Returns:
+            dict: Pending capture handle, or None if the queue is full
+        """
+        jpeg = packet.get("jpeg")
+        quality = packet.get("jpeg_quality")
+        if jpeg is not None and quality is not None and quality < self.min_reuse_quality:
+            jpeg = None
+        return self.submit(packet["frame"], packet["predictions"], on_complete, jpeg=jpeg)
+    
+    def submit(self, frame, predictions, on_complete=None, jpeg=None):
+        """
+        Queue a capture for writing (non-blocking)
+        
+        Args:
+            frame: BGR frame; must not be modified afterwards
+            predictions: Predictions dict to draw and store
+            on_complete: Called from a writer thread with the finished capture
+            jpeg: Already annotated and encoded JPEG of the frame, written as-is
+        
+        Returns:
+            dict: Pending capture handle, or None if the queue is full
+        """
+        capture_dir = self.processor.capture_dir
+        with self.lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                return None
+            
+            filename = unique_capture_filename(capture_dir, self.reserved)
+            self.reserved.add(filename)
+            self.pending += 1
+            
+            capture = {
+                "capture_id": uuid.uuid4().hex[:12],
+                "status": "pending",
+                "filename": filename,
+                "filepath": os.path.join(capture_dir, filename),
+                "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S"),
+                "error": None
+            }
+            self.captures[capture["capture_id"]] = capture
+            handle = dict(capture)
+        
+        self.jobs.put((capture, frame, predictions, jpeg, on_complete))
+        return handle
+    
+    def get_capture(self, capture_id):
+        """
+        Get the status of a recent capture
+        
+        Returns:
+            dict, or None if unknown (or dropped from the history)
+        """
+        with self.lock:
+            capture = self.captures.get(capture_id)
+            return dict(capture) if capture is not None else None
+    
+    def get_stats(self):
+        """Get queue depth and write counters"""
+        with self.lock:
+            return {
+                "pending": self.pending,
+                "max_pending": self.max_pending,
+                "congested": self.pending >= self.max_pending,
+                "written": self.written,
+                "reused_jpegs": self.reused_jpegs,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_write_ms": round(self.write_ms, 2),
+                "fsync": self.fsync
+            }
+    
+    def shutdown(self, timeout=5.0):
+        """Finish queued captures, then stop the writer threads"""
+        for _ in self.threads:
+            self.jobs.put(None)
+        deadline = time.monotonic() + timeout
+        for thread in self.threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+    
+    def _worker(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            
+            capture, frame, predictions, jpeg, on_complete = job
+            start = time.perf_counter()
+            try:
+                self._write(capture["filepath"], frame, predictions, jpeg)
+                status, error = "saved", None
+            except Exception as e:
+                print(f"❌ Capture {capture['filename']} failed: {e}")
+                status, error = "failed", str(e)
+            
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self.lock:
+                capture["status"] = status
+                capture["error"] = error
+                self.reserved.discard(capture["filename"])
+                self.pending -= 1
+                if status == "saved":
+                    self.written += 1
+                    self.reused_jpegs += 1 if jpeg is not None else 0
+                    self.write_ms = elapsed_ms if self.written == 1 else 0.8 * self.write_ms + 0.2 * elapsed_ms
+                else:
+                    self.failed += 1
+                while len(self.captures) > self.history:
+                    self.captures.popitem(last=False)
+                result = dict(capture)
+            
+            if status == "saved":
+                if self.processor.gallery_index is not None:
+                    self.processor.gallery_index.add(capture["filename"], predictions)
+                if self.processor.thumbnail_cache is not None:
+                    self.processor.thumbnail_cache.generate_async(capture["filename"])
+            
+            if on_complete is not None:
+                try:
+                    on_complete({**result, "predictions": predictions})
+                except Exception as e:
+                    print(f"⚠️ Capture completion callback failed: {e}")
+    
+    def _write(self, filepath, frame, predictions, jpeg=None):
+        """Draw, encode (unless a JPEG was supplied) and durably write one capture"""
+        if jpeg is not None:
+            buffer = jpeg
+        else:
+            annotated_frame = self.processor.draw_predictions(frame.copy(), predictions)
+            ok, buffer = cv2.imencode(".jpg", annotated_frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ok:
+                raise RuntimeError("JPEG encoding failed")
+        
+        # Write to a temporary name and rename, so the gallery never lists a partial file
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buffer)
+            if self.fsync != "none":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+        
+        if self.fsync == "full":
+            dir_fd = os.open(os.path.dirname(filepath) or ".", os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
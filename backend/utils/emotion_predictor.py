@@ -1,6 +1,7 @@
 import cv2
 import numpy as np
 import onnxruntime as ort
+from .frame_context import as_gray
 
 class EmotionPredictor:
     """
@@ -23,6 +24,11 @@ class EmotionPredictor:
         try:
             self.session = ort.InferenceSession(model_path)
             self.input_name = self.session.get_inputs()[0].name
+            
+            # Models exported with a fixed batch dimension of 1 cannot take
+            # an (N, 1, 64, 64) tensor, so batches are fed one row at a time
+            batch_dim = self.session.get_inputs()[0].shape[0]
+            self.supports_batch = not isinstance(batch_dim, int) or batch_dim != 1
             print("✅ Emotion Predictor initialized successfully")
         except Exception as e:
             raise Exception(f"Failed to load emotion model: {e}")
@@ -32,28 +38,28 @@ class EmotionPredictor:
         Apply softmax to convert logits to probabilities
         
         Args:
-            x: Input array (logits)
+            x: Input array (logits), shape (C,) or (N, C)
             
         Returns:
-            Probability distribution (sums to 1.0)
+            Probability distribution along the last axis (sums to 1.0)
         """
-        exp_x = np.exp(x - np.max(x))  # Subtract max for numerical stability
-        return exp_x / exp_x.sum()
+        exp_x = np.exp(x - np.max(x, axis=-1, keepdims=True))  # Subtract max for numerical stability
+        return exp_x / exp_x.sum(axis=-1, keepdims=True)
     
     def predict_emotion(self, face_image):
         """
         Predict emotion from face image
         
         Args:
-            face_image: Face image (BGR format)
+            face_image: Face image (BGR format) or FrameContext crop
             
         Returns:
             emotion: Predicted emotion label
             confidence: Confidence score (0-1)
             all_scores: Dictionary of all emotion scores (probabilities)
         """
-        # Convert to grayscale
-        gray = cv2.cvtColor(face_image, cv2.COLOR_BGR2GRAY)
+        # Convert to grayscale (reused when given a FrameContext)
+        gray = as_gray(face_image)
         
         # Resize to model input size (64x64)
         resized = cv2.resize(gray, (64, 64))
@@ -84,6 +90,50 @@ class EmotionPredictor:
         
         return emotion, confidence, all_scores
     
+    def predict_emotion_batch(self, face_images):
+        """
+        Predict emotions for several faces with a single (N, 1, 64, 64) tensor
+        
+        Args:
+            face_images: List of face images (BGR format) or FrameContext crops
+            
+        Returns:
+            List of (emotion, confidence, all_scores) tuples, one per face
+        """
+        if len(face_images) == 0:
+            return []
+        
+        # Build the whole batch: (N, 64, 64) -> (N, 1, 64, 64)
+        input_data = np.stack([
+            cv2.resize(as_gray(face), (64, 64))
+            for face in face_images
+        ]).astype(np.float32) / 255.0
+        input_data = input_data[:, np.newaxis, :, :]
+        
+        # Run inference
+        if self.supports_batch:
+            logits = self.session.run(None, {self.input_name: input_data})[0]
+        else:
+            logits = np.concatenate([
+                self.session.run(None, {self.input_name: input_data[i:i + 1]})[0]
+                for i in range(len(input_data))
+            ])
+        
+        # Vectorized softmax and argmax over the batch
+        probabilities = self.softmax(logits.reshape(len(face_images), -1))
+        emotion_indices = probabilities.argmax(axis=1)
+        confidences = probabilities[np.arange(len(emotion_indices)), emotion_indices]
+        
+        results = []
+        for probs, emotion_index, confidence in zip(probabilities, emotion_indices, confidences):
+            all_scores = {
+                label: float(prob)
+                for label, prob in zip(self.EMOTION_LABELS, probs)
+            }
+            results.append((self.EMOTION_LABELS[emotion_index], float(confidence), all_scores))
+        
+        return results
+    
     def is_smiling(self, emotion, confidence, threshold=0.5):
         """
         Check if the person is smiling
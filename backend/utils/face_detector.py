@@ -1,23 +1,49 @@
 import cv2
 import numpy as np
+from .face_tracker import FaceTracker
+from .frame_context import FrameContext, as_gray
 
 class FaceDetector:
     """
     Face detection using OpenCV Haar Cascades
     """
     
-    def __init__(self, cascade_path="models/haarcascade_frontalface_default.xml"):
+    def __init__(
+        self,
+        cascade_path="models/haarcascade_frontalface_default.xml",
+        mode="full",
+        downscale=0.5,
+        full_search_interval=10,
+        roi_padding=0.5
+    ):
         """
         Initialize face detector with Haar Cascade
         
         Args:
             cascade_path: Path to Haar Cascade XML file
+            mode: "full" searches the whole frame every call, "roi" searches a
+                downscaled frame every N calls and padded ROIs in between
+            downscale: Scale of the image used for the full-frame search in "roi" mode
+            full_search_interval: Frames between full-frame searches in "roi" mode
+            roi_padding: ROI padding around previous faces, as a fraction of face size
         """
         self.face_cascade = cv2.CascadeClassifier(cascade_path)
         
         if self.face_cascade.empty():
             raise Exception(f"Failed to load cascade classifier from {cascade_path}")
         
+        if mode not in ("full", "roi"):
+            raise ValueError(f"Unknown detection mode: {mode}")
+        
+        self.mode = mode
+        self.downscale = downscale
+        self.full_search_interval = full_search_interval
+        self.roi_padding = roi_padding
+        
+        # ROI mode state
+        self.previous_faces = []
+        self.frames_since_full_search = 0
+        
         print("✅ Face Detector initialized successfully")
     
     def detect_faces(self, frame):
@@ -25,13 +51,16 @@ class FaceDetector:
         Detect faces in a frame
         
         Args:
-            frame: Input image (BGR format)
+            frame: Input image (BGR format) or FrameContext
             
         Returns:
             List of face rectangles (x, y, w, h)
         """
-        # Convert to grayscale for better detection
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.mode == "roi":
+            return self.detect_faces_roi(frame)
+        
+        # Grayscale for better detection (shared when given a FrameContext)
+        gray = as_gray(frame)
         
         # Detect faces
         faces = self.face_cascade.detectMultiScale(
@@ -43,6 +72,104 @@ class FaceDetector:
         
         return faces
     
+    def detect_faces_roi(self, frame):
+        """
+        Detect faces using a downscaled full-frame search every N frames and
+        padded ROIs around the previous faces in between
+        
+        Args:
+            frame: Input image (BGR format) or FrameContext
+            
+        Returns:
+            Array of face rectangles (x, y, w, h) in full-resolution coordinates
+        """
+        context = FrameContext.wrap(frame)
+        gray = context.gray
+        
+        faces = None
+        if self.previous_faces and self.frames_since_full_search < self.full_search_interval:
+            faces = self._detect_in_rois(gray, self.previous_faces)
+            self.frames_since_full_search += 1
+            
+            # Tracking lost - fall back to a full search right away
+            if len(faces) < len(self.previous_faces):
+                faces = None
+        
+        if faces is None:
+            faces = self._detect_downscaled(context)
+            self.frames_since_full_search = 0
+        
+        self.previous_faces = [tuple(int(v) for v in face) for face in faces]
+        return np.array(self.previous_faces, dtype=np.int32).reshape(-1, 4)
+    
+    def reset(self):
+        """Forget previous faces so the next ROI-mode call does a full search"""
+        self.previous_faces = []
+        self.frames_since_full_search = 0
+    
+    def _detect_downscaled(self, context):
+        """
+        Full-frame search on a downscaled image, mapped back to full resolution
+        """
+        scale = self.downscale
+        small = context.level(scale)
+        min_side = max(int(round(30 * scale)), 12)
+        
+        faces = self.face_cascade.detectMultiScale(
+            small,
+            scaleFactor=1.1,
+            minNeighbors=5,
+            minSize=(min_side, min_side)
+        )
+        
+        return [
+            (int(x / scale), int(y / scale), int(w / scale), int(h / scale))
+            for (x, y, w, h) in faces
+        ]
+    
+    def _detect_in_rois(self, gray, previous_faces):
+        """
+        Re-detect faces only inside padded ROIs around the previous boxes
+        """
+        frame_h, frame_w = gray.shape[:2]
+        found = []
+        
+        for (px, py, pw, ph) in previous_faces:
+            pad_x = int(pw * self.roi_padding)
+            pad_y = int(ph * self.roi_padding)
+            x0, y0 = max(px - pad_x, 0), max(py - pad_y, 0)
+            x1, y1 = min(px + pw + pad_x, frame_w), min(py + ph + pad_y, frame_h)
+            
+            # Limit the scale search to sizes near the previous face
+            min_side = max(int(min(pw, ph) * 0.7), 30)
+            max_side = int(max(pw, ph) * 1.4)
+            
+            roi_faces = self.face_cascade.detectMultiScale(
+                gray[y0:y1, x0:x1],
+                scaleFactor=1.1,
+                minNeighbors=5,
+                minSize=(min_side, min_side),
+                maxSize=(max_side, max_side)
+            )
+            
+            # Keep the detection closest to the previous face, offset to frame coordinates
+            if len(roi_faces) > 0:
+                center = np.array([px + pw / 2.0 - x0, py + ph / 2.0 - y0])
+                best = min(
+                    roi_faces,
+                    key=lambda f: np.hypot(*(np.array([f[0] + f[2] / 2.0, f[1] + f[3] / 2.0]) - center))
+                )
+                x, y, w, h = best
+                found.append((int(x + x0), int(y + y0), int(w), int(h)))
+        
+        # Drop duplicates from overlapping ROIs
+        faces = []
+        for face in found:
+            if all(FaceTracker.iou(face, kept) < 0.5 for kept in faces):
+                faces.append(face)
+        
+        return faces
+    
     def draw_faces(self, frame, faces):
         """
         Draw rectangles around detected faces
@@ -79,15 +206,34 @@ class FaceDetector:
         Check if face image is blurry using Laplacian variance
         
         Args:
-            face_image: Face image
+            face_image: Face image (BGR or grayscale) or FrameContext crop
             threshold: Blur threshold (lower = more blurry)
             
         Returns:
             is_clear: Boolean indicating if image is clear
             blur_score: Numeric blur score
         """
-        gray = cv2.cvtColor(face_image, cv2.COLOR_BGR2GRAY)
+        gray = as_gray(face_image)
         blur_score = cv2.Laplacian(gray, cv2.CV_64F).var()
         is_clear = blur_score > threshold
         
         return is_clear, blur_score
+    
+    def check_blur_batch(self, frame, face_rects, threshold=100):
+        """
+        Blur check for every face in a frame at once
+        
+        Uses the frame's SharpnessMap (one float32 Laplacian and its integral
+        images), so each face costs O(1) instead of a Laplacian per crop.
+        
+        Args:
+            frame: Input image (BGR format) or FrameContext
+            face_rects: Face rectangles (x, y, w, h)
+            threshold: Blur threshold (lower = more blurry)
+            
+        Returns:
+            is_clear: Boolean array, one per face
+            blur_scores: Float array of blur scores, one per face
+        """
+        blur_scores = FrameContext.wrap(frame).sharpness.variances(face_rects)
+        return blur_scores > threshold, blur_scores
@@ -0,0 +1,149 @@
+import numpy as np
+
+
+class Track:
+    """
+    A single tracked face with its own prediction cache
+    """
+    
+    def __init__(self, track_id, bbox, frame_number):
+        """
+        Create a new track
+        
+        Args:
+            track_id: Stable integer ID
+            bbox: Face rectangle (x, y, w, h)
+            frame_number: Frame the track was first seen on
+        """
+        self.track_id = track_id
+        self.bbox = tuple(int(v) for v in bbox)
+        self.first_seen = frame_number
+        self.last_seen = frame_number
+        self.hits = 1
+        self.missed = 0
+        
+        # Per-person prediction cache (age, gender, emotion, ...)
+        self.cache = {}
+    
+    def update(self, bbox, frame_number):
+        """Move the track to a newly matched detection"""
+        self.bbox = tuple(int(v) for v in bbox)
+        self.last_seen = frame_number
+        self.hits += 1
+        self.missed = 0
+
+
+class FaceTracker:
+    """
+    Lightweight IoU/centroid tracker that gives detected faces stable IDs
+    """
+    
+    def __init__(self, iou_threshold=0.3, max_center_distance=0.5, max_missed=5):
+        """
+        Initialize face tracker
+        
+        Args:
+            iou_threshold: Minimum IoU to match a detection to a track
+            max_center_distance: Centroid fallback, as a fraction of the face size
+            max_missed: Frames a track may go unmatched before it is evicted
+        """
+        self.iou_threshold = iou_threshold
+        self.max_center_distance = max_center_distance
+        self.max_missed = max_missed
+        
+        self.tracks = {}
+        self.next_id = 1
+        self.frame_number = 0
+    
+    @staticmethod
+    def iou(box_a, box_b):
+        """
+        Intersection over union of two (x, y, w, h) rectangles
+        """
+        ax, ay, aw, ah = box_a
+        bx, by, bw, bh = box_b
+        
+        inter_w = min(ax + aw, bx + bw) - max(ax, bx)
+        inter_h = min(ay + ah, by + bh) - max(ay, by)
+        if inter_w <= 0 or inter_h <= 0:
+            return 0.0
+        
+        inter = inter_w * inter_h
+        return inter / float(aw * ah + bw * bh - inter)
+    
+    @staticmethod
+    def center_distance(box_a, box_b):
+        """
+        Centroid distance normalised by the larger face size
+        """
+        ax, ay, aw, ah = box_a
+        bx, by, bw, bh = box_b
+        
+        dx = (ax + aw / 2.0) - (bx + bw / 2.0)
+        dy = (ay + ah / 2.0) - (by + bh / 2.0)
+        return np.hypot(dx, dy) / float(max(aw, ah, bw, bh))
+    
+    def update(self, boxes):
+        """
+        Match this frame's detections to existing tracks
+        
+        Args:
+            boxes: List of face rectangles (x, y, w, h)
+        
+        Returns:
+            List of Track objects, in the same order as boxes
+        """
+        self.frame_number += 1
+        boxes = [tuple(int(v) for v in box) for box in boxes]
+        track_ids = list(self.tracks.keys())
+        
+        # Score every (detection, track) pair
+        candidates = []
+        for det_index, box in enumerate(boxes):
+            for track_id in track_ids:
+                track_box = self.tracks[track_id].bbox
+                overlap = self.iou(box, track_box)
+                if overlap >= self.iou_threshold:
+                    candidates.append((overlap, det_index, track_id))
+                else:
+                    distance = self.center_distance(box, track_box)
+                    if distance <= self.max_center_distance:
+                        # Rank centroid-only matches below any IoU match
+                        candidates.append((-distance, det_index, track_id))
+        
+        # Greedy assignment, best score first
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        assigned = [None] * len(boxes)
+        used_tracks = set()
+        for _, det_index, track_id in candidates:
+            if assigned[det_index] is not None or track_id in used_tracks:
+                continue
+            track = self.tracks[track_id]
+            track.update(boxes[det_index], self.frame_number)
+            assigned[det_index] = track
+            used_tracks.add(track_id)
+        
+        # Unmatched detections start new tracks
+        for det_index, box in enumerate(boxes):
+            if assigned[det_index] is None:
+                track = Track(self.next_id, box, self.frame_number)
+                self.tracks[track.track_id] = track
+                self.next_id += 1
+                assigned[det_index] = track
+                used_tracks.add(track.track_id)
+        
+        # Age out tracks that disappeared, dropping their cache with them
+        for track_id in track_ids:
+            if track_id in used_tracks:
+                continue
+            track = self.tracks[track_id]
+            track.missed += 1
+            if track.missed > self.max_missed:
+                del self.tracks[track_id]
+        
+        return assigned
+    
+    def reset(self):
+        """Forget all tracks"""
+        self.tracks = {}
+        self.next_id = 1
@@ -0,0 +1,90 @@
+import cv2
+from .sharpness import SharpnessMap
+
+
+class FrameContext:
+    """
+    One frame plus images derived from it, computed once and shared
+    
+    The grayscale image is converted on first use and reused by the face
+    detector, blur check, emotion and smile models. crop() returns a context
+    over zero-copy views of the frame and its grayscale, so per-face
+    predictors never convert again. Downscaled grayscale levels (e.g. the
+    face detector's full-frame search) are cached per scale, and the
+    SharpnessMap for blur scoring is built once on demand.
+    """
+    
+    def __init__(self, frame, gray=None):
+        """
+        Initialize frame context
+        
+        Args:
+            frame: Image (BGR format, or already grayscale)
+            gray: Precomputed grayscale of frame, if any
+        """
+        self.frame = frame
+        self._gray = gray if gray is not None else (frame if frame.ndim == 2 else None)
+        self._levels = {}
+        self._sharpness = None
+    
+    @classmethod
+    def wrap(cls, image):
+        """Return image itself if it is already a FrameContext, else wrap it"""
+        return image if isinstance(image, cls) else cls(image)
+    
+    @property
+    def shape(self):
+        return self.frame.shape
+    
+    @property
+    def gray(self):
+        """Grayscale image (converted on first access)"""
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+        return self._gray
+    
+    @property
+    def sharpness(self):
+        """SharpnessMap of the grayscale image (built on first access)"""
+        if self._sharpness is None:
+            self._sharpness = SharpnessMap(self.gray)
+        return self._sharpness
+    
+    def level(self, scale):
+        """
+        Downscaled grayscale pyramid level
+        
+        Args:
+            scale: Resize factor, e.g. 0.5
+        
+        Returns:
+            Grayscale image resized with INTER_AREA (cached per scale)
+        """
+        if scale == 1.0:
+            return self.gray
+        if scale not in self._levels:
+            self._levels[scale] = cv2.resize(self.gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return self._levels[scale]
+    
+    def crop(self, x, y, w, h):
+        """
+        Context for a region of this frame
+        
+        Both the BGR and grayscale images are views (no pixel copies); the
+        grayscale is converted for the whole frame first if needed.
+        """
+        return FrameContext(self.frame[y:y+h, x:x+w], self.gray[y:y+h, x:x+w])
+
+
+def as_gray(image):
+    """Grayscale of a FrameContext, BGR ndarray or grayscale ndarray"""
+    if isinstance(image, FrameContext):
+        return image.gray
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def as_bgr(image):
+    """BGR ndarray of a FrameContext or ndarray"""
+    return image.frame if isinstance(image, FrameContext) else image
@@ -0,0 +1,260 @@
+import threading
+import time
+from .frame_ring import FrameRing
+
+
+class LatestSlot:
+    """
+    Single-item, thread-safe mailbox where the newest item always wins
+    
+    A producer never blocks: putting a new item replaces one that was not
+    consumed yet and counts it as dropped.
+    """
+    
+    def __init__(self, name):
+        """
+        Initialize slot
+        
+        Args:
+            name: Stage name used in stats
+        """
+        self.name = name
+        self.condition = threading.Condition()
+        self.item = None
+        self.seq = 0
+        self.consumed_seq = 0
+        self.puts = 0
+        self.drops = 0
+        self.closed = False
+    
+    def put(self, item):
+        """Publish a new item, replacing any unconsumed one"""
+        with self.condition:
+            if self.seq > self.consumed_seq:
+                self.drops += 1
+            self.item = item
+            self.seq += 1
+            self.puts += 1
+            self.condition.notify_all()
+    
+    def get(self, last_seq=None, timeout=None):
+        """
+        Wait for an item newer than last_seq
+        
+        Args:
+            last_seq: Sequence already seen (defaults to the last consumed one)
+            timeout: Seconds to wait, or None to wait forever
+        
+        Returns:
+            (seq, item), or (None, None) on timeout or when closed
+        """
+        with self.condition:
+            if last_seq is None:
+                last_seq = self.consumed_seq
+            
+            ready = self.condition.wait_for(
+                lambda: self.seq > last_seq or self.closed,
+                timeout
+            )
+            if not ready or self.seq <= last_seq:
+                return None, None
+            
+            self.consumed_seq = max(self.consumed_seq, self.seq)
+            return self.seq, self.item
+    
+    def peek(self):
+        """Return (seq, item) of the newest item without consuming it"""
+        with self.condition:
+            return self.seq, self.item
+    
+    def depth(self):
+        """Number of items waiting to be consumed (0 or 1)"""
+        with self.condition:
+            return 1 if self.seq > self.consumed_seq else 0
+    
+    def close(self):
+        """Wake up all waiting consumers"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class FramePipeline:
+    """
+    Staged capture -> inference -> encode pipeline
+    
+    Each stage runs on its own thread and always works on the freshest
+    output of the previous stage, so a slow stage drops stale frames
+    instead of letting them queue up.
+    """
+    
+    def __init__(self, camera, processor, lock=None, encode_every=1, ring_capacity=32):
+        """
+        Initialize pipeline
+        
+        Args:
+            camera: Opened cv2.VideoCapture
+            processor: VideoProcessor used for inference, drawing and encoding
+            lock: Lock guarding the processor's models (shared with other callers)
+            encode_every: Annotate and JPEG-encode every Nth processed frame;
+                0 streams predictions only
+            ring_capacity: Processed frames kept for best-shot auto-capture
+        """
+        self.camera = camera
+        self.processor = processor
+        self.lock = lock or threading.Lock()
+        self.encode_every = encode_every
+        self.encoder_count = 0
+        
+        # JPEG quality for encoded frames (None = OpenCV default), plus lower
+        # qualities encoded alongside it for slow clients
+        self.jpeg_quality = None
+        self.variant_qualities = ()
+        
+        # Stage outputs
+        self.captured = LatestSlot("capture")
+        self.processed = LatestSlot("inference")
+        self.encoded = LatestSlot("encode")
+        self.slots = (self.captured, self.processed, self.encoded)
+        
+        # Pre-roll of processed frames with their predictions
+        self.ring = FrameRing(ring_capacity)
+        
+        self.running = False
+        self.error = None
+        self.threads = []
+        self.frame_count = 0
+        
+        # Moving averages
+        self.stage_ms = {slot.name: 0.0 for slot in self.slots}
+        self.latency_ms = 0.0
+        self.fps = 0.0
+        self.last_output_time = None
+    
+    def start(self):
+        """Start the stage threads"""
+        self.running = True
+        for name, target in (
+            ("grabber", self._grab_loop),
+            ("inference", self._inference_loop),
+            ("encoder", self._encode_loop)
+        ):
+            thread = threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+    
+    def stop(self):
+        """Stop all stages and wait for their threads"""
+        self.running = False
+        for slot in self.slots:
+            slot.close()
+        for thread in self.threads:
+            thread.join(timeout=2)
+        self.threads = []
+    
+    def _record(self, stage, start):
+        """Update the moving average duration of a stage"""
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stage_ms[stage] = 0.9 * self.stage_ms[stage] + 0.1 * elapsed
+    
+    def _fail(self, message):
+        """Stop the pipeline because a stage failed"""
+        print(f"❌ Pipeline error: {message}")
+        self.error = message
+        self.running = False
+        for slot in self.slots:
+            slot.close()
+    
+    def _grab_loop(self):
+        """Read the camera as fast as it delivers, keeping only the newest frame"""
+        while self.running:
+            start = time.perf_counter()
+            ret, frame = self.camera.read()
+            
+            if not ret:
+                self._fail("Failed to read frame")
+                break
+            
+            self.frame_count += 1
+            self._record("capture", start)
+            self.captured.put({
+                "frame": frame,
+                "frame_number": self.frame_count,
+                "captured_at": time.time()
+            })
+    
+    def _inference_loop(self):
+        """Run the model stack on the freshest captured frame"""
+        while self.running:
+            _, packet = self.captured.get(timeout=0.5)
+            if packet is None:
+                continue
+            
+            start = time.perf_counter()
+            try:
+                with self.lock:
+                    predictions = self.processor.process_frame(packet["frame"])
+            except Exception as e:
+                self._fail(str(e))
+                break
+            
+            self._record("inference", start)
+            self.processed.put(dict(packet, predictions=predictions))
+            self.ring.push(packet["frame"], predictions, packet["frame_number"], packet["captured_at"])
+    
+    def _encode_loop(self):
+        """Annotate and encode the freshest processed frame"""
+        while self.running:
+            _, packet = self.processed.get(timeout=0.5)
+            if packet is None:
+                continue
+            
+            self.encoder_count += 1
+            jpeg = None
+            jpeg_quality = self.jpeg_quality
+            variants = {}
+            
+            # Predictions-only frames skip the copy, annotation and encode
+            if self.encode_every > 0 and self.encoder_count % self.encode_every == 0:
+                start = time.perf_counter()
+                annotated_frame = self.processor.draw_predictions(packet["frame"].copy(), packet["predictions"])
+                jpeg = self.processor.encode_frame_to_jpeg(annotated_frame, jpeg_quality)
+                # Annotated once, encoded again only for qualities slow clients asked for
+                for quality in self.variant_qualities:
+                    variants[quality] = self.processor.encode_frame_to_jpeg(annotated_frame, quality)
+                self._record("encode", start)
+            
+            now = time.time()
+            self.latency_ms = 0.9 * self.latency_ms + 0.1 * (now - packet["captured_at"]) * 1000
+            if self.last_output_time is not None:
+                interval = max(now - self.last_output_time, 1e-6)
+                self.fps = 0.9 * self.fps + 0.1 / interval
+            self.last_output_time = now
+            
+            # The encoded slot doubles as the atomically swapped "latest frame,
+            # predictions and JPEG" that manual capture saves from
+            self.encoded.put(dict(packet, jpeg=jpeg, jpeg_quality=jpeg_quality, jpeg_variants=variants))
+    
+    def get_stats(self):
+        """
+        Get per-stage queue depths, drop counters and timings
+        
+        Returns:
+            dict: Pipeline statistics
+        """
+        return {
+            "running": self.running,
+            "frames_captured": self.frame_count,
+            "fps": round(self.fps, 1),
+            "latency_ms": round(self.latency_ms, 1),
+            "preroll_mb": round(self.ring.memory_bytes() / (1024 * 1024), 1),
+            "stages": {
+                slot.name: {
+                    "produced": slot.puts,
+                    "dropped": slot.drops,
+                    "queue_depth": slot.depth(),
+                    "avg_ms": round(self.stage_ms[slot.name], 2)
+                }
+                for slot in self.slots
+            }
+        }
@@ -0,0 +1,207 @@
+import threading
+
+import cv2
+import numpy as np
+from .sharpness import SharpnessMap
+
+
+def eye_region_box(bbox):
+    """
+    Eyes band of a face: 20% to 50% of its height, inner 80% of its width
+    
+    Open, in-focus eyes put strong edges (iris, lashes, lids) in this band;
+    closed or blurred eyes flatten it.
+    
+    Args:
+        bbox: Face box dict with x, y, w, h
+    
+    Returns:
+        (x, y, w, h) of the band
+    """
+    x, y, w, h = bbox["x"], bbox["y"], bbox["w"], bbox["h"]
+    x0, y0 = x + int(0.1 * w), y + int(0.2 * h)
+    return (x0, y0, x + int(0.9 * w) - x0, y + int(0.5 * h) - y0)
+
+
+def eye_bands_region(faces, shape):
+    """
+    Smallest region holding every face's eyes band, plus a 1-pixel margin
+    so the Laplacian inside the bands sees the same neighbours as on the
+    full frame
+    
+    Args:
+        faces: Face predictions with bbox dicts
+        shape: Frame shape
+    
+    Returns:
+        (x0, y0, x1, y1), clipped to the frame
+    """
+    boxes = np.array([eye_region_box(face["bbox"]) for face in faces])
+    height, width = shape[:2]
+    x0 = int(np.clip(boxes[:, 0].min() - 1, 0, width))
+    y0 = int(np.clip(boxes[:, 1].min() - 1, 0, height))
+    x1 = int(np.clip((boxes[:, 0] + boxes[:, 2]).max() + 1, 0, width))
+    y1 = int(np.clip((boxes[:, 1] + boxes[:, 3]).max() + 1, 0, height))
+    return x0, y0, x1, y1
+
+
+def score_frame(frame, predictions):
+    """
+    Best-shot score of a processed frame: sharpness x smile x eyes-region
+    quality, averaged over faces, using the predictions already computed
+    
+    Only the region around the eyes bands is converted and filtered, so
+    scoring costs a fraction of a full-frame Laplacian.
+    
+    Returns:
+        Score (0 when there are no faces)
+    """
+    faces = predictions["faces"]
+    if not faces:
+        return 0.0
+    
+    # Every face's eyes band from one Laplacian of the region holding them
+    x0, y0, x1, y1 = eye_bands_region(faces, frame.shape)
+    if x1 <= x0 or y1 <= y0:
+        return 0.0
+    sharpness_map = SharpnessMap(cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY))
+    boxes = np.array([eye_region_box(face["bbox"]) for face in faces]) - np.array([x0, y0, 0, 0])
+    eye_variance = sharpness_map.variances(boxes)
+    eye_quality = eye_variance / (eye_variance + 50.0)
+    
+    blur = np.array([face["blur_score"] for face in faces])
+    smile = np.maximum([face["smile_score"] for face in faces], 0.0)
+    return float(np.mean(blur / (blur + 100.0) * smile * eye_quality))
+
+
+class FrameRing:
+    """
+    Fixed-memory ring of the most recent processed frames
+    
+    Frames are copied into one preallocated (capacity, H, W, 3) array, so
+    keeping the pre-roll costs a memcpy per frame and no allocations. Each
+    slot keeps the frame's predictions and best-shot score (computed on
+    push, outside the lock), so picking the best shot around an
+    auto-capture trigger needs no extra inference and never holds the lock
+    for more than one frame copy.
+    """
+    
+    def __init__(self, capacity=32):
+        """
+        Initialize frame ring
+        
+        Args:
+            capacity: Number of frames kept
+        """
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        
+        # Allocated on the first push, once the frame size is known
+        self.frames = None
+        self.frame_numbers = np.full(capacity, -1, dtype=np.int64)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.scores = np.zeros(capacity, dtype=np.float32)
+        self.predictions = [None] * capacity
+        
+        self.next_index = 0
+        self.count = 0
+    
+    def push(self, frame, predictions, frame_number, timestamp):
+        """Score a processed frame and copy it into the oldest slot"""
+        score = score_frame(frame, predictions)
+        with self.lock:
+            if self.frames is None or self.frames.shape[1:] != frame.shape:
+                if self.frames is not None:
+                    print(f"ℹ️ Frame size changed to {frame.shape[1]}x{frame.shape[0]}, resetting pre-roll")
+                self.frames = np.empty((self.capacity,) + frame.shape, dtype=frame.dtype)
+                self.frame_numbers[:] = -1
+                self.count = 0
+            
+            index = self.next_index
+            np.copyto(self.frames[index], frame)
+            self.frame_numbers[index] = frame_number
+            self.timestamps[index] = timestamp
+            self.scores[index] = score
+            self.predictions[index] = predictions
+            
+            self.next_index = (index + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+    
+    def latest_timestamp(self):
+        """Capture time of the newest frame, or None when empty"""
+        with self.lock:
+            if self.count == 0:
+                return None
+            return float(self.timestamps[(self.next_index - 1) % self.capacity])
+    
+    def window_seconds(self, fps=30.0):
+        """
+        Longest capture window the ring can cover
+        
+        Args:
+            fps: Frame rate assumed until the ring has measured one
+        
+        Returns:
+            Seconds spanned by a full ring at the measured (or assumed) rate
+        """
+        with self.lock:
+            if self.count >= 2:
+                newest = (self.next_index - 1) % self.capacity
+                oldest = (self.next_index - self.count) % self.capacity
+                interval = (self.timestamps[newest] - self.timestamps[oldest]) / (self.count - 1)
+                if interval > 0:
+                    return float(interval * (self.capacity - 1))
+        return (self.capacity - 1) / fps
+    
+    def clamp_window(self, pre_roll, post_roll, fps=30.0):
+        """
+        Fit a pre/post-roll window into what the ring holds
+        
+        The post-roll is kept when possible and the pre-roll shortened,
+        since the pre-roll frames are the oldest in the ring when the
+        window closes.
+        
+        Returns:
+            (pre_roll, post_roll, clamped)
+        """
+        window = self.window_seconds(fps)
+        if pre_roll + post_roll <= window:
+            return pre_roll, post_roll, False
+        post_roll = min(post_roll, window)
+        return window - post_roll, post_roll, True
+    
+    def select_best(self, start_time, end_time):
+        """
+        Pick the highest-scoring frame captured in [start_time, end_time]
+        
+        Frames were scored on push, so this only compares stored scores.
+        
+        Returns:
+            dict with a copy of the frame, its predictions, frame_number,
+            timestamp and score, or None if no frame falls in the window
+        """
+        with self.lock:
+            if self.count == 0:
+                return None
+            
+            candidates = np.flatnonzero(
+                (self.frame_numbers >= 0) &
+                (self.timestamps >= start_time) &
+                (self.timestamps <= end_time)
+            )
+            if candidates.size == 0:
+                return None
+            
+            best = candidates[np.argmax(self.scores[candidates])]
+            return {
+                "frame": self.frames[best].copy(),
+                "predictions": self.predictions[best],
+                "frame_number": int(self.frame_numbers[best]),
+                "timestamp": float(self.timestamps[best]),
+                "score": round(float(self.scores[best]), 4),
+                "candidates": int(candidates.size)
+            }
+    
+    def memory_bytes(self):
+        """Bytes held by the preallocated frame array"""
+        return 0 if self.frames is None else self.frames.nbytes
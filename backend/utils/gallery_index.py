@@ -0,0 +1,427 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Sortable columns exposed through the API
+SORT_COLUMNS = {
+    "created": "created",
+    "filename": "filename",
+    "size": "size",
+    "smile_score": "smile_score",
+    "blur_score": "blur_score"
+}
+
+# Prediction summary columns, filled in for captures (NULL for files that
+# appeared on disk without going through capture_selfie)
+METADATA_COLUMNS = [
+    ("face_count", "INTEGER"),
+    ("emotion", "TEXT"),
+    ("smile_score", "REAL"),
+    ("blur_score", "REAL"),
+    ("age_bucket", "TEXT"),
+    ("gender", "TEXT"),
+    ("is_smiling", "INTEGER"),
+    ("predictions", "TEXT")
+]
+
+
+# Query-string filters -> (column, operator)
+FILTERS = {
+    "emotion": ("emotion", "="),
+    "age_bucket": ("age_bucket", "="),
+    "gender": ("gender", "="),
+    "is_smiling": ("is_smiling", "="),
+    "min_faces": ("face_count", ">="),
+    "max_faces": ("face_count", "<="),
+    "min_smile": ("smile_score", ">="),
+    "max_smile": ("smile_score", "<="),
+    "min_blur": ("blur_score", ">="),
+    "max_blur": ("blur_score", "<="),
+    "since": ("created", ">="),
+    "until": ("created", "<")
+}
+
+# Columns returned by gallery listings (the full predictions JSON is not)
+LIST_COLUMNS = ", ".join(
+    ["filename", "size", "created"] +
+    [column for column, _ in METADATA_COLUMNS if column != "predictions"]
+)
+
+# File stats change on reconcile; metadata written at capture time is kept
+UPSERT_SQL = """
+    INSERT INTO images (filename, size, created) VALUES (?, ?, ?)
+    ON CONFLICT (filename) DO UPDATE SET size = excluded.size, created = excluded.created
+"""
+
+
+def summarize_predictions(predictions):
+    """
+    Reduce a predictions dict to the indexed metadata columns
+    
+    Per-face fields come from the largest (primary) face.
+    
+    Args:
+        predictions: Predictions dict from VideoProcessor.process_frame
+    
+    Returns:
+        dict: Column name -> value
+    """
+    faces = predictions.get("faces", [])
+    summary = {
+        "face_count": len(faces),
+        "emotion": None,
+        "smile_score": None,
+        "blur_score": None,
+        "age_bucket": None,
+        "gender": None,
+        "is_smiling": None,
+        "predictions": json.dumps(predictions)
+    }
+    
+    if faces:
+        primary = max(faces, key=lambda f: f["bbox"]["w"] * f["bbox"]["h"])
+        summary.update({
+            "emotion": primary["emotion"],
+            "smile_score": primary["smile_score"],
+            "blur_score": primary["blur_score"],
+            "age_bucket": primary["age"],
+            "gender": primary["gender"],
+            "is_smiling": int(any(f["is_smiling"] for f in faces))
+        })
+    return summary
+
+
+class GalleryIndex:
+    """
+    Persistent SQLite index of the captured images directory
+    
+    Keeps the gallery listing off the filesystem: captures and deletes
+    update the index directly, a reconcile at startup catches changes made
+    while the server was down, and a watcher picks up files added or removed
+    behind the server's back.
+    """
+    
+    def __init__(self, db_path, images_dir):
+        """
+        Initialize gallery index
+        
+        Args:
+            db_path: SQLite database file
+            images_dir: Directory holding the captured images
+        """
+        self.db_path = db_path
+        self.images_dir = images_dir
+        self.lock = threading.Lock()
+        
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                filename TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL
+            )
+        """)
+        
+        # Databases created before metadata was stored get the new columns
+        existing = {row["name"] for row in self.conn.execute("PRAGMA table_info(images)")}
+        for column, column_type in METADATA_COLUMNS:
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE images ADD COLUMN {column} {column_type}")
+        
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_images_created ON images (created, filename)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_images_size ON images (size, filename)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_images_smile ON images (smile_score, filename)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_images_blur ON images (blur_score, filename)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_images_emotion ON images (emotion, created, filename)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_images_age ON images (age_bucket, created, filename)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_images_faces ON images (face_count, created, filename)")
+        self.conn.commit()
+        
+        self.observer = None
+        self.watch_thread = None
+        self.watch_stop = threading.Event()
+    
+    def add(self, filename, predictions=None):
+        """
+        Index (or re-index) an image that exists on disk
+        
+        Args:
+            filename: Image file name inside images_dir
+            predictions: Predictions the image was captured with; stored as
+                searchable metadata (existing metadata is kept if None)
+        
+        Returns:
+            True if the file was indexed
+        """
+        filepath = os.path.join(self.images_dir, filename)
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return False
+        
+        with self.lock:
+            self.conn.execute(UPSERT_SQL, (filename, stat.st_size, stat.st_ctime))
+            if predictions is not None:
+                summary = summarize_predictions(predictions)
+                assignments = ", ".join(f"{column} = :{column}" for column in summary)
+                self.conn.execute(
+                    f"UPDATE images SET {assignments} WHERE filename = :filename",
+                    {**summary, "filename": filename}
+                )
+            self.conn.commit()
+        return True
+    
+    def get_predictions(self, filename):
+        """
+        Get the predictions an image was captured with
+        
+        Returns:
+            dict, or None if the image is unknown or has no stored predictions
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT predictions FROM images WHERE filename = ?", (filename,)
+            ).fetchone()
+        if row is None or row["predictions"] is None:
+            return None
+        return json.loads(row["predictions"])
+    
+    def remove(self, filename):
+        """Drop an image from the index"""
+        with self.lock:
+            self.conn.execute("DELETE FROM images WHERE filename = ?", (filename,))
+            self.conn.commit()
+    
+    def clear(self):
+        """Drop every image from the index"""
+        with self.lock:
+            self.conn.execute("DELETE FROM images")
+            self.conn.commit()
+    
+    def reconcile(self):
+        """
+        Bring the index in line with the directory
+        
+        Returns:
+            (added, removed) counts
+        """
+        on_disk = {}
+        with os.scandir(self.images_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(IMAGE_EXTENSIONS):
+                    stat = entry.stat()
+                    on_disk[entry.name] = (stat.st_size, stat.st_ctime)
+        
+        with self.lock:
+            indexed = {
+                row[0]: (row[1], row[2])
+                for row in self.conn.execute("SELECT filename, size, created FROM images")
+            }
+            
+            changed = [
+                (name, size, created) for name, (size, created) in on_disk.items()
+                if indexed.get(name) != (size, created)
+            ]
+            removed = [(name,) for name in indexed if name not in on_disk]
+            
+            self.conn.executemany(UPSERT_SQL, changed)
+            self.conn.executemany("DELETE FROM images WHERE filename = ?", removed)
+            self.conn.commit()
+        
+        return len(changed), len(removed)
+    
+    def query(self, limit=None, cursor=None, sort="created", order="desc", filters=None):
+        """
+        Page through the index with keyset (cursor) pagination
+        
+        Args:
+            limit: Page size, or None for everything
+            cursor: Opaque cursor from a previous page's next_cursor
+            sort: One of SORT_COLUMNS
+            order: "asc" or "desc"
+            filters: Optional dict of metadata filters:
+                emotion, age_bucket, gender (exact match),
+                is_smiling (bool), min_faces, max_faces,
+                min_smile, max_smile, min_blur, max_blur,
+                since, until (Unix timestamps on the capture time)
+        
+        Returns:
+            (rows, next_cursor), rows as sqlite3.Row
+        
+        Raises:
+            ValueError: On an unknown sort/order/filter or a malformed cursor
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Unknown sort column: {sort}")
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Unknown sort order: {order}")
+        
+        column = SORT_COLUMNS[sort]
+        direction = "DESC" if order == "desc" else "ASC"
+        comparison = "<" if order == "desc" else ">"
+        
+        conditions, params = self._filter_conditions(filters or {})
+        if column not in ("created", "filename", "size"):
+            # Files without metadata cannot be ordered by it
+            conditions.append(f"{column} IS NOT NULL")
+        if cursor:
+            last_value, last_filename = self._decode_cursor(cursor)
+            # filename breaks ties so pages never overlap or skip rows
+            conditions.append(f"({column}, filename) {comparison} (?, ?)")
+            params += [last_value, last_filename]
+        
+        sql = f"SELECT {LIST_COLUMNS} FROM images"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {column} {direction}, filename {direction}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        
+        next_cursor = None
+        if limit is not None and len(rows) == limit:
+            last = rows[-1]
+            next_cursor = self._encode_cursor(last[column], last["filename"])
+        
+        return rows, next_cursor
+    
+    def count(self, filters=None):
+        """Number of indexed images, optionally matching metadata filters"""
+        conditions, params = self._filter_conditions(filters or {})
+        sql = "SELECT COUNT(*) FROM images"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()[0]
+    
+    @staticmethod
+    def _filter_conditions(filters):
+        """Translate a filters dict into SQL conditions and parameters"""
+        conditions = []
+        params = []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            if name not in FILTERS:
+                raise ValueError(f"Unknown filter: {name}")
+            column, operator = FILTERS[name]
+            conditions.append(f"{column} {operator} ?")
+            params.append(int(value) if isinstance(value, bool) else value)
+        return conditions, params
+    
+    @staticmethod
+    def to_dict(row):
+        """Convert an index row into the gallery API's image schema"""
+        image = {
+            "filename": row["filename"],
+            "url": f"/captured_images/{row['filename']}",
+            "thumbnail_url": f"/api/gallery/thumbnail/{row['filename']}",
+            "size": row["size"],
+            "created": datetime.fromtimestamp(row["created"]).isoformat(),
+            "metadata": None
+        }
+        if row["face_count"] is not None:
+            image["metadata"] = {
+                "face_count": row["face_count"],
+                "emotion": row["emotion"],
+                "smile_score": row["smile_score"],
+                "blur_score": row["blur_score"],
+                "age_bucket": row["age_bucket"],
+                "gender": row["gender"],
+                "is_smiling": bool(row["is_smiling"]) if row["is_smiling"] is not None else None
+            }
+        return image
+    
+    @staticmethod
+    def _encode_cursor(value, filename):
+        raw = json.dumps([value, filename]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+    
+    @staticmethod
+    def _decode_cursor(cursor):
+        try:
+            value, filename = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return value, filename
+        except Exception:
+            raise ValueError("Malformed cursor")
+    
+    def start_watcher(self, poll_interval=10.0):
+        """
+        Watch the directory for changes made outside the API
+        
+        Uses inotify (or the platform equivalent) through the watchdog
+        package from requirements.txt. Without it, falls back to a full
+        reconcile every poll_interval seconds.
+        """
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            Observer = None
+        
+        if Observer is not None:
+            index = self
+            
+            class Handler(FileSystemEventHandler):
+                def on_created(self, event):
+                    index._on_fs_change(event.src_path, added=True)
+                
+                def on_modified(self, event):
+                    index._on_fs_change(event.src_path, added=True)
+                
+                def on_deleted(self, event):
+                    index._on_fs_change(event.src_path, added=False)
+                
+                def on_moved(self, event):
+                    index._on_fs_change(event.src_path, added=False)
+                    index._on_fs_change(event.dest_path, added=True)
+            
+            self.observer = Observer()
+            self.observer.schedule(Handler(), self.images_dir, recursive=False)
+            self.observer.daemon = True
+            self.observer.start()
+            return
+        
+        print(f"⚠️ watchdog is not installed, rescanning the gallery every {poll_interval:.0f}s")
+        
+        def poll():
+            while not self.watch_stop.wait(poll_interval):
+                try:
+                    self.reconcile()
+                except Exception as e:
+                    print(f"⚠️ Gallery reconcile failed: {e}")
+        
+        self.watch_thread = threading.Thread(target=poll, name="gallery-watcher", daemon=True)
+        self.watch_thread.start()
+    
+    def _on_fs_change(self, path, added):
+        """Apply one watcher event to the index"""
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.images_dir):
+            return
+        filename = os.path.basename(path)
+        if not filename.endswith(IMAGE_EXTENSIONS):
+            return
+        if added:
+            self.add(filename)
+        else:
+            self.remove(filename)
+    
+    def close(self):
+        """Stop the watcher and close the database"""
+        self.watch_stop.set()
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer = None
+        with self.lock:
+            self.conn.close()
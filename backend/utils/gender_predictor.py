@@ -1,5 +1,7 @@
 import cv2
 import numpy as np
+from .inference_backend import create_backend
+from .frame_context import as_bgr
 
 class GenderPredictor:
     """
@@ -12,7 +14,11 @@ class GenderPredictor:
     def __init__(
         self,
         prototxt_path="models/gender_deploy.prototxt",
-        model_path="models/gender_net.caffemodel"
+        model_path="models/gender_net.caffemodel",
+        backend="opencv",
+        backend_options=None,
+        onnx_path="models/gender_net.onnx",
+        int8_path="models/gender_net.int8.onnx"
     ):
         """
         Initialize gender predictor
@@ -20,10 +26,17 @@ class GenderPredictor:
         Args:
             prototxt_path: Path to model architecture file
             model_path: Path to model weights file
+            backend: "opencv", "onnxruntime" or "onnxruntime-int8"
+            backend_options: Extra options for the backend (see inference_backend)
+            onnx_path: Converted model for the onnxruntime backend
+            int8_path: Quantized model for the onnxruntime-int8 backend
         """
         try:
-            self.gender_net = cv2.dnn.readNetFromCaffe(prototxt_path, model_path)
-            print("✅ Gender Predictor initialized successfully")
+            self.backend = create_backend(
+                backend, prototxt_path, model_path, onnx_path, int8_path,
+                **(backend_options or {})
+            )
+            print(f"✅ Gender Predictor initialized successfully [{self.backend.description}]")
         except Exception as e:
             raise Exception(f"Failed to load gender model: {e}")
     
@@ -32,7 +45,7 @@ class GenderPredictor:
         Predict gender from face image
         
         Args:
-            face_image: Face image (BGR format)
+            face_image: Face image (BGR format) or FrameContext crop
             
         Returns:
             gender: Predicted gender ('Male' or 'Female')
@@ -40,18 +53,15 @@ class GenderPredictor:
         """
         # Prepare the face image for the model
         blob = cv2.dnn.blobFromImage(
-            face_image,
+            as_bgr(face_image),
             scalefactor=1.0,
             size=(227, 227),
             mean=(78.4263377603, 87.7689143744, 114.895847746),
             swapRB=False
         )
         
-        # Feed the image to the network
-        self.gender_net.setInput(blob)
-        
-        # Get predictions
-        predictions = self.gender_net.forward()
+        # Feed the image to the network and get predictions
+        predictions = self.backend.run(blob)
         
         # Get the gender with highest confidence
         gender_index = predictions[0].argmax()
@@ -59,3 +69,36 @@ class GenderPredictor:
         gender = self.GENDER_LIST[gender_index]
         
         return gender, float(confidence)
+    
+    def predict_gender_batch(self, face_images):
+        """
+        Predict gender for several faces in a single forward pass
+        
+        Args:
+            face_images: List of face images (BGR format) or FrameContext crops
+            
+        Returns:
+            List of (gender, confidence) tuples, one per face
+        """
+        if len(face_images) == 0:
+            return []
+        
+        # One NCHW blob for the whole batch
+        blob = cv2.dnn.blobFromImages(
+            [as_bgr(face) for face in face_images],
+            scalefactor=1.0,
+            size=(227, 227),
+            mean=(78.4263377603, 87.7689143744, 114.895847746),
+            swapRB=False
+        )
+        
+        predictions = self.backend.run(blob)
+        
+        # Vectorized argmax across the batch
+        indices = predictions.argmax(axis=1)
+        confidences = predictions[np.arange(len(indices)), indices]
+        
+        return [
+            (self.GENDER_LIST[index], float(confidence))
+            for index, confidence in zip(indices, confidences)
+        ]
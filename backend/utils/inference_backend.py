@@ -0,0 +1,228 @@
+import os
+import cv2
+import numpy as np
+import onnxruntime as ort
+
+# Backends selectable for the Caffe age/gender nets
+BACKENDS = ("opencv", "onnxruntime", "onnxruntime-int8")
+
+# cv2.dnn backend/target names accepted in backend options
+OPENCV_BACKENDS = {
+    "default": cv2.dnn.DNN_BACKEND_DEFAULT,
+    "opencv": cv2.dnn.DNN_BACKEND_OPENCV,
+    "openvino": cv2.dnn.DNN_BACKEND_INFERENCE_ENGINE,
+    "cuda": cv2.dnn.DNN_BACKEND_CUDA
+}
+OPENCV_TARGETS = {
+    "cpu": cv2.dnn.DNN_TARGET_CPU,
+    "opencl": cv2.dnn.DNN_TARGET_OPENCL,
+    "opencl_fp16": cv2.dnn.DNN_TARGET_OPENCL_FP16,
+    "cuda": cv2.dnn.DNN_TARGET_CUDA,
+    "cuda_fp16": cv2.dnn.DNN_TARGET_CUDA_FP16
+}
+
+
+class OpenCVDNNBackend:
+    """
+    Caffe model run through cv2.dnn with an explicit backend and target
+    """
+    
+    def __init__(self, prototxt_path, model_path, backend="default", target="cpu"):
+        """
+        Initialize OpenCV DNN backend
+        
+        Args:
+            prototxt_path: Path to model architecture file
+            model_path: Path to model weights file
+            backend: Key of OPENCV_BACKENDS
+            target: Key of OPENCV_TARGETS
+        """
+        if backend not in OPENCV_BACKENDS:
+            raise ValueError(f"Unknown OpenCV DNN backend: {backend}")
+        if target not in OPENCV_TARGETS:
+            raise ValueError(f"Unknown OpenCV DNN target: {target}")
+        
+        self.net = cv2.dnn.readNetFromCaffe(prototxt_path, model_path)
+        self.net.setPreferableBackend(OPENCV_BACKENDS[backend])
+        self.net.setPreferableTarget(OPENCV_TARGETS[target])
+        self.description = f"opencv ({backend}/{target})"
+    
+    def run(self, blob):
+        """
+        Forward an NCHW blob
+        
+        Returns:
+            (N, C) output probabilities
+        """
+        self.net.setInput(blob)
+        return self.net.forward()
+
+
+class OpenCVONNXBackend:
+    """
+    ONNX model with one or more outputs run through cv2.dnn
+    """
+    
+    def __init__(self, model_path, backend="default", target="cpu"):
+        """
+        Initialize OpenCV DNN backend for an ONNX model
+        
+        Args:
+            model_path: Path to the .onnx file
+            backend: Key of OPENCV_BACKENDS
+            target: Key of OPENCV_TARGETS
+        """
+        if backend not in OPENCV_BACKENDS:
+            raise ValueError(f"Unknown OpenCV DNN backend: {backend}")
+        if target not in OPENCV_TARGETS:
+            raise ValueError(f"Unknown OpenCV DNN target: {target}")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"{model_path} not found, run download_models.py to convert it")
+        
+        self.net = cv2.dnn.readNetFromONNX(model_path)
+        self.net.setPreferableBackend(OPENCV_BACKENDS[backend])
+        self.net.setPreferableTarget(OPENCV_TARGETS[target])
+        self.output_names = list(self.net.getUnconnectedOutLayersNames())
+        self.description = f"opencv ({os.path.basename(model_path)}, {backend}/{target})"
+    
+    def run_all(self, blob, output_names=None):
+        """
+        Forward an NCHW blob once and collect every requested output
+        
+        Returns:
+            List of output arrays, in output_names order
+        """
+        self.net.setInput(blob)
+        return list(self.net.forward(output_names or self.output_names))
+    
+    def run(self, blob):
+        """Forward an NCHW blob and return the first output"""
+        return self.run_all(blob)[0]
+
+
+class ONNXRuntimeBackend:
+    """
+    Converted (optionally INT8-quantized) model run through ONNX Runtime
+    """
+    
+    OPTIMIZATION_LEVELS = ("disable", "basic", "extended", "all")
+    
+    def __init__(
+        self,
+        model_path,
+        optimization_level="all",
+        intra_op_threads=0,
+        inter_op_threads=0,
+        execution_mode="sequential"
+    ):
+        """
+        Initialize ONNX Runtime backend
+        
+        Args:
+            model_path: Path to the .onnx file (see download_models.py)
+            optimization_level: Graph optimization level, one of OPTIMIZATION_LEVELS
+            intra_op_threads: Threads inside an operator (0 = ONNX Runtime default)
+            inter_op_threads: Threads across operators (0 = ONNX Runtime default)
+            execution_mode: "sequential", or "parallel" to run independent
+                branches (e.g. the two heads of a fused model) concurrently
+        """
+        if optimization_level not in self.OPTIMIZATION_LEVELS:
+            raise ValueError(f"Unknown graph optimization level: {optimization_level}")
+        if execution_mode not in ("sequential", "parallel"):
+            raise ValueError(f"Unknown execution mode: {execution_mode}")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"{model_path} not found, run download_models.py to convert it")
+        
+        options = ort.SessionOptions()
+        options.execution_mode = (
+            ort.ExecutionMode.ORT_PARALLEL if execution_mode == "parallel"
+            else ort.ExecutionMode.ORT_SEQUENTIAL
+        )
+        options.graph_optimization_level = {
+            "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        }[optimization_level]
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_names = [output.name for output in self.session.get_outputs()]
+        
+        # Same fixed-batch fallback as the emotion model
+        batch_dim = self.session.get_inputs()[0].shape[0]
+        self.supports_batch = not isinstance(batch_dim, int) or batch_dim != 1
+        self.description = f"onnxruntime ({os.path.basename(model_path)}, {optimization_level})"
+    
+    def run_all(self, blob, output_names=None):
+        """
+        Forward an NCHW blob once and collect every requested output
+        
+        Returns:
+            List of output arrays, in output_names order
+        """
+        blob = blob.astype(np.float32, copy=False)
+        output_names = output_names or self.output_names
+        if self.supports_batch or len(blob) == 1:
+            return self.session.run(output_names, {self.input_name: blob})
+        
+        rows = [self.session.run(output_names, {self.input_name: blob[i:i + 1]}) for i in range(len(blob))]
+        return [np.concatenate(outputs) for outputs in zip(*rows)]
+    
+    def run(self, blob):
+        """
+        Forward an NCHW blob
+        
+        Returns:
+            (N, C) output probabilities
+        """
+        return self.run_all(blob)[0]
+
+
+def create_backend(kind, prototxt_path, model_path, onnx_path, int8_path, **options):
+    """
+    Build the inference backend for one of the Caffe nets
+    
+    Args:
+        kind: One of BACKENDS
+        prototxt_path: Caffe architecture file (opencv)
+        model_path: Caffe weights file (opencv)
+        onnx_path: Converted float model (onnxruntime)
+        int8_path: Quantized model (onnxruntime-int8)
+        **options: Backend-specific options (backend/target for opencv;
+            optimization_level/intra_op_threads/inter_op_threads for onnxruntime)
+    
+    Returns:
+        Backend with a run(blob) method
+    """
+    if kind == "opencv":
+        return OpenCVDNNBackend(prototxt_path, model_path, **options)
+    if kind == "onnxruntime":
+        return ONNXRuntimeBackend(onnx_path, **options)
+    if kind == "onnxruntime-int8":
+        return ONNXRuntimeBackend(int8_path, **options)
+    raise ValueError(f"Unknown inference backend: {kind} (expected one of {', '.join(BACKENDS)})")
+
+
+def create_fused_backend(kind, onnx_path, int8_path, **options):
+    """
+    Build the inference backend for a multi-output (fused) ONNX model
+    
+    Args:
+        kind: One of BACKENDS; "opencv" loads the ONNX model into cv2.dnn
+        onnx_path: Fused float model
+        int8_path: Fused quantized model (onnxruntime-int8)
+        **options: Backend-specific options (see create_backend)
+    
+    Returns:
+        Backend with run_all(blob, output_names) and run(blob) methods
+    """
+    if kind == "opencv":
+        return OpenCVONNXBackend(onnx_path, **options)
+    if kind == "onnxruntime":
+        return ONNXRuntimeBackend(onnx_path, **options)
+    if kind == "onnxruntime-int8":
+        return ONNXRuntimeBackend(int8_path, **options)
+    raise ValueError(f"Unknown inference backend: {kind} (expected one of {', '.join(BACKENDS)})")
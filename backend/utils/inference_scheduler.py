@@ -0,0 +1,188 @@
+import copy
+import threading
+
+# Cheap gates run first on every face; each expensive stage then runs
+# for a face only when its gates pass and it is due, or when its cached
+# result is older than the stage's staleness budget.
+#   interval: frames between runs while the gates pass (None = the
+#       caller's refresh rule decides, e.g. the adaptive age/gender refresh)
+#   gated: whether the blur gate applies to the stage
+#   max_staleness: frames a gated-off face may keep its cached result
+#       (None = keep it indefinitely)
+#   on_demand: only run while someone needs the result (e.g. smile while
+#       auto-capture is armed or a client subscribes)
+DEFAULT_POLICY = {
+    "gates": {
+        "min_face_size": 50,
+        "min_blur": 30.0
+    },
+    "stages": {
+        "emotion": {"interval": 1, "gated": True, "max_staleness": 15, "on_demand": False},
+        "age_gender": {"interval": None, "gated": True, "max_staleness": 90, "on_demand": False},
+        "smile": {"interval": 1, "gated": False, "max_staleness": None, "on_demand": True}
+    }
+}
+
+STAGE_COUNTERS = ("runs", "stale_runs", "skipped_gate", "skipped_fresh", "skipped_demand")
+
+
+def merge_policy(overrides=None):
+    """
+    DEFAULT_POLICY with overrides applied per gate and per stage field
+    
+    Args:
+        overrides: Partial policy, e.g. {"stages": {"emotion": {"interval": 3}}}
+    
+    Returns:
+        Complete policy dict
+    """
+    policy = copy.deepcopy(DEFAULT_POLICY)
+    overrides = overrides or {}
+    
+    for key, value in overrides.get("gates", {}).items():
+        if key not in policy["gates"]:
+            raise ValueError(f"Unknown inference gate: {key}")
+        policy["gates"][key] = value
+    
+    for stage, fields in overrides.get("stages", {}).items():
+        if stage not in policy["stages"]:
+            raise ValueError(f"Unknown inference stage: {stage}")
+        for key, value in fields.items():
+            if key not in policy["stages"][stage]:
+                raise ValueError(f"Unknown option {key} for inference stage {stage}")
+            policy["stages"][stage][key] = value
+    
+    return policy
+
+
+class InferenceScheduler:
+    """
+    Decides per face and per frame which model stages to run
+    
+    The scheduler only plans and counts; the caller runs the models and
+    records each run as track.cache["<stage>_frame"], which is what
+    staleness is measured against.
+    """
+    
+    def __init__(self, policy=None):
+        """
+        Initialize inference scheduler
+        
+        Args:
+            policy: Partial policy overriding DEFAULT_POLICY (see merge_policy)
+        """
+        self.policy = merge_policy(policy)
+        self.lock = threading.Lock()
+        self.reset_stats()
+    
+    def reset_stats(self):
+        """Zero all gate and stage counters"""
+        with self.lock:
+            self.gate_stats = {"faces": 0, "size_rejected": 0, "blur_rejected": 0}
+            self.stage_stats = {
+                stage: dict.fromkeys(STAGE_COUNTERS, 0)
+                for stage in self.policy["stages"]
+            }
+    
+    def size_gate(self, w, h):
+        """
+        First gate: is the face large enough to analyze at all
+        
+        Returns:
+            True if the face should be kept
+        """
+        min_size = self.policy["gates"]["min_face_size"]
+        passed = w >= min_size and h >= min_size
+        with self.lock:
+            self.gate_stats["faces"] += 1
+            if not passed:
+                self.gate_stats["size_rejected"] += 1
+        return passed
+    
+    def blur_gate(self, blur_scores):
+        """
+        Second gate: are the faces sharp enough for the gated stages
+        
+        Args:
+            blur_scores: Blur score per kept face
+        
+        Returns:
+            List of booleans, one per face
+        """
+        min_blur = self.policy["gates"]["min_blur"]
+        passed = [float(score) >= min_blur for score in blur_scores]
+        with self.lock:
+            self.gate_stats["blur_rejected"] += passed.count(False)
+        return passed
+    
+    def plan(self, stage, tracks, gates_passed, frame_count, due=None, demanded=True):
+        """
+        Pick the faces a stage must run on this frame
+        
+        Args:
+            stage: Stage name from the policy
+            tracks: Track per face (their caches hold "<stage>_frame")
+            gates_passed: Result of blur_gate, one per face
+            frame_count: Current frame number
+            due: Optional refresh rule track -> bool, used instead of the
+                stage interval while the gates pass
+            demanded: Whether anyone needs an on-demand stage right now
+        
+        Returns:
+            List of face indices to run the stage on
+        """
+        config = self.policy["stages"][stage]
+        counters = dict.fromkeys(STAGE_COUNTERS, 0)
+        selected = []
+        
+        for i, track in enumerate(tracks):
+            if config["on_demand"] and not demanded:
+                counters["skipped_demand"] += 1
+                continue
+            
+            last_frame = track.cache.get(f"{stage}_frame")
+            if last_frame is None:
+                # Nothing cached yet: always run so every face has a result
+                selected.append(i)
+                counters["runs"] += 1
+                continue
+            
+            staleness = frame_count - last_frame
+            if gates_passed[i] or not config["gated"]:
+                if due is not None:
+                    is_due = due(track)
+                else:
+                    is_due = staleness >= (config["interval"] or 1)
+                
+                if is_due:
+                    selected.append(i)
+                    counters["runs"] += 1
+                else:
+                    counters["skipped_fresh"] += 1
+            elif config["max_staleness"] is not None and staleness > config["max_staleness"]:
+                selected.append(i)
+                counters["runs"] += 1
+                counters["stale_runs"] += 1
+            else:
+                counters["skipped_gate"] += 1
+        
+        with self.lock:
+            for key, value in counters.items():
+                self.stage_stats[stage][key] += value
+        return selected
+    
+    def get_stats(self):
+        """
+        Gate and per-stage counters since start (or the last reset)
+        
+        Returns:
+            dict with "gates" and "stages"; each stage also reports its
+            skip rate
+        """
+        with self.lock:
+            stages = {}
+            for stage, counters in self.stage_stats.items():
+                skipped = counters["skipped_gate"] + counters["skipped_fresh"] + counters["skipped_demand"]
+                total = skipped + counters["runs"]
+                stages[stage] = dict(counters, skip_rate=round(skipped / total, 3) if total else 0.0)
+            return {"gates": dict(self.gate_stats), "stages": stages}
@@ -0,0 +1,390 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+import cv2
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Per-worker-process model stack, loaded once by init_worker
+_worker_processor = None
+
+
+def init_worker():
+    """Load the model stack once per worker process"""
+    global _worker_processor
+    from .video_processor import VideoProcessor, settings_from_env
+    
+    # One OpenCV thread per process; the pool provides the parallelism
+    cv2.setNumThreads(1)
+    # Same models and policy as the server's /api/analyze processors
+    _worker_processor = VideoProcessor(detection_mode="full", **settings_from_env())
+
+
+def analyze_file(path):
+    """
+    Analyze one image file in a worker process
+    
+    Args:
+        path: Image file path
+    
+    Returns:
+        dict: {"success": True, "predictions": ...} or {"success": False, "error": ...}
+    """
+    try:
+        image = cv2.imread(path)
+        if image is None:
+            return {"success": False, "error": "Could not decode image"}
+        return {"success": True, "predictions": _worker_processor.analyze_image(image)}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def analyze_frames(frames):
+    """
+    Analyze consecutive video frames in a worker process
+    
+    Tracks and cached age/gender carry over between the frames of the
+    batch, but not from the previous batch this worker handled, so track
+    IDs are only unique within one call.
+    
+    Args:
+        frames: List of frames (BGR format), in order
+    
+    Returns:
+        List of predictions, one per frame
+    """
+    _worker_processor.tracker.reset()
+    _worker_processor.detector.reset()
+    # No live client registers smile demand in a worker, so force it on
+    return [_worker_processor.process_frame(frame, smile=True) for frame in frames]
+
+
+def list_images(directory):
+    """
+    Recursively list image files under a directory, in a stable order
+    
+    Args:
+        directory: Directory to walk
+    
+    Returns:
+        Sorted list of image paths
+    """
+    paths = []
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(root, filename))
+    return sorted(paths)
+
+
+class JobManager:
+    """
+    Bulk photo analysis jobs on a local process pool
+    
+    Each job lives in its own directory with a manifest.json (inputs and
+    status) and an append-only results.jsonl (one line per image), so a job
+    interrupted by a restart or a cancel resumes from the last finished image.
+    """
+    
+    def __init__(self, jobs_dir="jobs", workers=None):
+        """
+        Initialize job manager
+        
+        Args:
+            jobs_dir: Directory holding job manifests, uploads and results
+            workers: Worker processes (defaults to the CPU count)
+        """
+        self.jobs_dir = jobs_dir
+        self.workers = workers or os.cpu_count() or 1
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        
+        self.executor = None
+        self.jobs = {}
+        self.cancel_events = {}
+        self.lock = threading.Lock()
+        self.shutting_down = False
+    
+    def job_dir(self, job_id):
+        """Directory of a job"""
+        return os.path.join(self.jobs_dir, job_id)
+    
+    def results_path(self, job_id):
+        """JSONL results file of a job"""
+        return os.path.join(self.job_dir(job_id), "results.jsonl")
+    
+    def _manifest_path(self, job_id):
+        """Manifest file of a job"""
+        return os.path.join(self.job_dir(job_id), "manifest.json")
+    
+    def new_job_id(self):
+        """Reserve a job ID and create its directory"""
+        job_id = uuid.uuid4().hex[:12]
+        os.makedirs(os.path.join(self.job_dir(job_id), "inputs"), exist_ok=True)
+        return job_id
+    
+    def create_job(self, job_id, image_paths, source):
+        """
+        Register a job and start processing it
+        
+        Args:
+            job_id: ID from new_job_id
+            image_paths: Image files to analyze
+            source: Description of the input ("upload" or a directory path)
+        
+        Returns:
+            dict: Job status
+        """
+        job = {
+            "job_id": job_id,
+            "source": source,
+            "status": "queued",
+            "total": len(image_paths),
+            "processed": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "images_per_sec": 0.0,
+            "created_at": datetime.now().isoformat(),
+            "finished_at": None,
+            "error": None,
+            "images": list(image_paths)
+        }
+        
+        with self.lock:
+            self.jobs[job_id] = job
+        self._save_manifest(job)
+        self._start(job)
+        return self.get_job(job_id)
+    
+    def get_job(self, job_id):
+        """
+        Get a job's status (without the input list)
+        
+        Returns:
+            dict, or None if the job does not exist
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            return {k: v for k, v in job.items() if k != "images"}
+    
+    def list_jobs(self):
+        """Get the status of every known job, newest first"""
+        with self.lock:
+            job_ids = list(self.jobs.keys())
+        jobs = [self.get_job(job_id) for job_id in job_ids]
+        return sorted(jobs, key=lambda j: j["created_at"], reverse=True)
+    
+    def cancel_job(self, job_id):
+        """
+        Cancel a running job; finished results are kept and it can be resumed
+        
+        Returns:
+            True if a running job was signalled
+        """
+        with self.lock:
+            event = self.cancel_events.get(job_id)
+        if event is None:
+            return False
+        event.set()
+        return True
+    
+    def resume_job(self, job_id):
+        """
+        Resume a cancelled, failed or interrupted job from where it stopped
+        
+        Returns:
+            dict: Job status, or None if the job does not exist
+        """
+        # Check and claim under one lock so concurrent resumes start one dispatcher
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            event = None
+            if job_id not in self.cancel_events and job["status"] != "completed":
+                event = self._claim(job)
+        if event is not None:
+            self._launch(job, event)
+        return self.get_job(job_id)
+    
+    def load_existing(self):
+        """Load jobs from disk and resume those interrupted by a shutdown"""
+        for job_id in sorted(os.listdir(self.jobs_dir)):
+            try:
+                with open(self._manifest_path(job_id)) as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                continue
+            
+            with self.lock:
+                self.jobs[job_id] = job
+            
+            if job["status"] in ("queued", "running", "interrupted"):
+                print(f"🔁 Resuming interrupted job {job_id}")
+                self._start(job)
+    
+    def shutdown(self):
+        """Stop all jobs (they resume on the next start) and the process pool"""
+        self.shutting_down = True
+        with self.lock:
+            events = list(self.cancel_events.values())
+        for event in events:
+            event.set()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+    
+    def _get_executor(self):
+        """Create the process pool on first use"""
+        with self.lock:
+            if self.executor is None:
+                # Spawn, not fork: the server process already runs threads
+                # (gallery watcher, thumbnails, capture writer, pipeline) and
+                # forking them can deadlock the workers
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=init_worker
+                )
+            return self.executor
+    
+    def _save_manifest(self, job):
+        """Atomically write a job's manifest"""
+        with self.lock:
+            data = json.dumps(job)
+        path = self._manifest_path(job["job_id"])
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    
+    def _load_results(self, job):
+        """
+        Read finished results, dropping a partial last line from a crash
+        
+        Returns:
+            Set of indices already processed
+        """
+        path = self.results_path(job["job_id"])
+        if not os.path.exists(path):
+            return set()
+        
+        valid_lines = []
+        done = set()
+        succeeded = 0
+        with open(path) as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue
+                if result["index"] in done:
+                    continue
+                done.add(result["index"])
+                succeeded += 1 if result["success"] else 0
+                valid_lines.append(line if line.endswith("\n") else line + "\n")
+        
+        with open(path, "w") as f:
+            f.writelines(valid_lines)
+        
+        with self.lock:
+            job["processed"] = len(done)
+            job["succeeded"] = succeeded
+            job["failed"] = len(done) - succeeded
+        return done
+    
+    def _start(self, job):
+        """Start the job's dispatcher thread"""
+        with self.lock:
+            event = self._claim(job)
+        self._launch(job, event)
+    
+    def _claim(self, job):
+        """
+        Mark a job as running (the caller holds self.lock)
+        
+        Returns:
+            The job's cancel event
+        """
+        event = threading.Event()
+        self.cancel_events[job["job_id"]] = event
+        job["status"] = "running"
+        job["error"] = None
+        job["finished_at"] = None
+        return event
+    
+    def _launch(self, job, event):
+        """Run a claimed job on its own dispatcher thread"""
+        thread = threading.Thread(
+            target=self._run,
+            args=(job, event),
+            name=f"job-{job['job_id']}",
+            daemon=True
+        )
+        thread.start()
+    
+    def _run(self, job, cancel_event):
+        """Feed a job's pending images to the process pool and record results"""
+        job_id = job["job_id"]
+        try:
+            done = self._load_results(job)
+            pending = deque(
+                (index, path) for index, path in enumerate(job["images"])
+                if index not in done
+            )
+            self._save_manifest(job)
+            
+            executor = self._get_executor()
+            max_in_flight = self.workers * 2
+            in_flight = {}
+            start = time.perf_counter()
+            processed_here = 0
+            
+            with open(self.results_path(job_id), "a") as results:
+                while (pending or in_flight) and not cancel_event.is_set():
+                    # Keep a bounded number of images in flight so cancel is quick
+                    while pending and len(in_flight) < max_in_flight:
+                        index, path = pending.popleft()
+                        in_flight[executor.submit(analyze_file, path)] = (index, path)
+                    
+                    finished, _ = wait(list(in_flight), timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        index, path = in_flight.pop(future)
+                        result = {"type": "result", "index": index, "path": path, **future.result()}
+                        results.write(json.dumps(result) + "\n")
+                        processed_here += 1
+                        
+                        with self.lock:
+                            job["processed"] += 1
+                            job["succeeded" if result["success"] else "failed"] += 1
+                            job["images_per_sec"] = round(processed_here / (time.perf_counter() - start), 2)
+                    results.flush()
+            
+            for future in in_flight:
+                future.cancel()
+            
+            with self.lock:
+                if self.shutting_down:
+                    job["status"] = "interrupted"
+                elif cancel_event.is_set():
+                    job["status"] = "cancelled"
+                else:
+                    job["status"] = "completed"
+        except Exception as e:
+            print(f"❌ Job {job_id} failed: {e}")
+            with self.lock:
+                job["status"] = "failed"
+                job["error"] = str(e)
+        finally:
+            with self.lock:
+                job["finished_at"] = datetime.now().isoformat()
+                self.cancel_events.pop(job_id, None)
+            self._save_manifest(job)
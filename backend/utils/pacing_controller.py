@@ -0,0 +1,156 @@
+import time
+
+
+class PacingController:
+    """
+    Adaptive frame pacing and backpressure for one streaming client
+    
+    Frames are scheduled on a fixed period derived from the current FPS, so
+    the time spent preparing a frame is subtracted from the wait. Slow
+    consumers (high send latency or bytes still in flight) first get a lower
+    JPEG quality and then a lower preview FPS; both recover once the client
+    keeps up again. Inference is not affected.
+    """
+    
+    def __init__(
+        self,
+        target_fps=30.0,
+        min_fps=5.0,
+        jpeg_quality=80,
+        min_jpeg_quality=40,
+        max_outstanding_bytes=512 * 1024,
+        adapt_interval=0.5
+    ):
+        """
+        Initialize pacing controller
+        
+        Args:
+            target_fps: Preview FPS to aim for when the client keeps up
+            min_fps: Lowest preview FPS for slow clients
+            jpeg_quality: JPEG quality used when the client keeps up
+            min_jpeg_quality: Lowest JPEG quality for slow clients
+            max_outstanding_bytes: In-flight bytes above which the client counts as congested
+            adapt_interval: Minimum seconds between rate changes
+        """
+        self.min_fps = min_fps
+        self.max_jpeg_quality = jpeg_quality
+        self.min_jpeg_quality = min_jpeg_quality
+        self.max_outstanding_bytes = max_outstanding_bytes
+        self.adapt_interval = adapt_interval
+        
+        self.target_fps = target_fps
+        self.fps = target_fps
+        self.jpeg_quality = jpeg_quality
+        
+        self.send_ms = 0.0
+        self.outstanding_bytes = 0
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        
+        self.next_frame_time = None
+        self.last_adapt_time = 0.0
+    
+    def set_target_fps(self, fps):
+        """Update the target FPS requested by the client"""
+        self.target_fps = max(self.min_fps, float(fps))
+        self.fps = min(self.fps, self.target_fps) if self.frames_sent else self.target_fps
+        return self.target_fps
+    
+    def delay(self, now=None):
+        """
+        Seconds to wait before the next frame is due
+        
+        Args:
+            now: Current time.monotonic() value
+        
+        Returns:
+            Remaining time of the current frame period (0 if already due)
+        """
+        now = time.monotonic() if now is None else now
+        if self.next_frame_time is None:
+            return 0.0
+        return max(self.next_frame_time - now, 0.0)
+    
+    def frame_scheduled(self, now=None):
+        """Advance the schedule by one frame period after a frame goes out"""
+        now = time.monotonic() if now is None else now
+        period = 1.0 / self.fps
+        
+        if self.next_frame_time is None or now - self.next_frame_time > period:
+            # Too far behind (or first frame) - restart the schedule from now
+            self.next_frame_time = now + period
+        else:
+            self.next_frame_time += period
+    
+    def frame_skipped(self):
+        """Count a frame dropped because the previous send is still in flight"""
+        self.frames_skipped += 1
+    
+    def send_started(self, nbytes):
+        """Record bytes handed to the socket"""
+        self.outstanding_bytes += nbytes
+    
+    def send_finished(self, nbytes, seconds):
+        """
+        Record a completed send and adapt the rate
+        
+        Returns:
+            True if the FPS or JPEG quality changed
+        """
+        self.outstanding_bytes = max(self.outstanding_bytes - nbytes, 0)
+        self.send_ms = 0.8 * self.send_ms + 0.2 * seconds * 1000
+        self.frames_sent += 1
+        return self.adapt()
+    
+    def adapt(self, now=None):
+        """
+        Lower quality/FPS for a congested client, raise them when it keeps up
+        
+        Returns:
+            True if the FPS or JPEG quality changed
+        """
+        now = time.monotonic() if now is None else now
+        if now - self.last_adapt_time < self.adapt_interval:
+            return False
+        
+        budget_ms = 1000.0 / self.fps
+        congested = (
+            self.send_ms > 0.5 * budget_ms or
+            self.outstanding_bytes > self.max_outstanding_bytes
+        )
+        fps, quality = self.fps, self.jpeg_quality
+        
+        if congested:
+            # Cheapest fix first: smaller frames, then fewer frames
+            if self.jpeg_quality > self.min_jpeg_quality:
+                self.jpeg_quality = max(self.jpeg_quality - 10, self.min_jpeg_quality)
+            else:
+                self.fps = max(self.fps * 0.8, self.min_fps)
+        elif self.send_ms < 0.2 * budget_ms:
+            # Recover FPS first, then quality
+            if self.fps < self.target_fps:
+                self.fps = min(self.fps * 1.1, self.target_fps)
+            elif self.jpeg_quality < self.max_jpeg_quality:
+                self.jpeg_quality = min(self.jpeg_quality + 5, self.max_jpeg_quality)
+        
+        changed = fps != self.fps or quality != self.jpeg_quality
+        if changed:
+            self.last_adapt_time = now
+        return changed
+    
+    def get_state(self):
+        """
+        Get the chosen rate and the client's backpressure metrics
+        
+        Returns:
+            dict: Pacing state
+        """
+        return {
+            "target_fps": round(self.target_fps, 1),
+            "fps": round(self.fps, 1),
+            "jpeg_quality": int(self.jpeg_quality),
+            "send_ms": round(self.send_ms, 2),
+            "outstanding_bytes": int(self.outstanding_bytes),
+            "frames_sent": self.frames_sent,
+            "frames_skipped": self.frames_skipped
+        }
@@ -0,0 +1,85 @@
+import queue
+import threading
+from contextlib import contextmanager
+from .video_processor import VideoProcessor
+
+
+class ProcessorPool:
+    """
+    Fixed-size pool of VideoProcessor instances
+    
+    cv2.dnn nets and ONNX sessions must not be used from several threads at
+    once, so each concurrent request checks out its own processor.
+    Processors are created lazily up to the pool size.
+    """
+    
+    def __init__(self, size=2, factory=None):
+        """
+        Initialize processor pool
+        
+        Args:
+            size: Maximum number of processors
+            factory: Callable creating a processor (defaults to a full-frame
+                detection VideoProcessor for standalone images)
+        """
+        self.size = size
+        self.factory = factory or (lambda: VideoProcessor(detection_mode="full"))
+        self.available = queue.Queue()
+        self.created = 0
+        self.lock = threading.Lock()
+    
+    @contextmanager
+    def acquire(self, timeout=None):
+        """
+        Check out a processor for the duration of a with-block
+        
+        Args:
+            timeout: Seconds to wait for a free processor, or None to wait forever
+        
+        Raises:
+            queue.Empty: If no processor became free within the timeout
+        """
+        processor = self._get(timeout)
+        try:
+            yield processor
+        finally:
+            self.available.put(processor)
+    
+    def warm_up(self):
+        """Create every processor up front so the first requests don't pay for model loading"""
+        with self.lock:
+            missing = self.size - self.created
+            self.created += missing
+        
+        for _ in range(missing):
+            self.available.put(self.factory())
+    
+    def _get(self, timeout):
+        """Take a free processor, creating one if the pool is not full yet"""
+        try:
+            return self.available.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self.lock:
+            create = self.created < self.size
+            if create:
+                self.created += 1
+        
+        if create:
+            try:
+                return self.factory()
+            except Exception:
+                with self.lock:
+                    self.created -= 1
+                raise
+        
+        return self.available.get(timeout=timeout)
+    
+    def get_stats(self):
+        """Get pool size and utilisation"""
+        return {
+            "size": self.size,
+            "created": self.created,
+            "available": self.available.qsize()
+        }
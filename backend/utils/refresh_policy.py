@@ -0,0 +1,185 @@
+import threading
+import time
+
+
+class AdaptiveRefresh:
+    """
+    Confidence-adaptive refresh interval for a per-track prediction
+    
+    Each track keeps its own interval. While a face keeps getting the same
+    labels at high confidence, the interval grows geometrically up to
+    max_interval. It drops back to min_interval when confidence falls or
+    labels change, and the prediction is re-run immediately when the box
+    changes scale or the face's brightness shifts (lighting change).
+    
+    State lives in track.cache under "<name>_..." keys, next to the
+    cached prediction itself.
+    """
+    
+    def __init__(
+        self,
+        name="age_gender",
+        min_interval=5,
+        max_interval=240,
+        backoff=2.0,
+        min_confidence=0.6,
+        confidence_drop=0.15,
+        scale_change=1.5,
+        brightness_shift=25.0,
+        reference_interval=30
+    ):
+        """
+        Initialize adaptive refresh policy
+        
+        Args:
+            name: Cache key prefix (the scheduler stage name)
+            min_interval: Frames between runs for new or uncertain faces
+            max_interval: Upper bound of the backed-off interval
+            backoff: Interval multiplier after each stable, confident result
+            min_confidence: Lowest confidence (of all outputs) counted as confident
+            confidence_drop: Fall in confidence since the last run that resets the interval
+            scale_change: Box area ratio (either way) that forces a refresh
+            brightness_shift: Change in mean face brightness (0-255) that forces a refresh
+            reference_interval: Fixed interval the savings are reported against
+        """
+        self.name = name
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.min_confidence = min_confidence
+        self.confidence_drop = confidence_drop
+        self.scale_change = scale_change
+        self.brightness_shift = brightness_shift
+        self.reference_interval = reference_interval
+        
+        self.lock = threading.Lock()
+        self.stats = {
+            "face_frames": 0,
+            "invocations": 0,
+            "backoffs": 0,
+            "resets": {"new": 0, "confidence": 0, "labels": 0, "scale": 0, "lighting": 0}
+        }
+        self.started_at = None
+    
+    def observe(self, face_count):
+        """Count the faces on a processed frame (the savings baseline)"""
+        with self.lock:
+            if self.started_at is None:
+                self.started_at = time.monotonic()
+            self.stats["face_frames"] += face_count
+    
+    def due(self, track, frame_count, brightness):
+        """
+        Decide whether a track's prediction must be re-run on this frame
+        
+        Args:
+            track: Track from the face tracker
+            frame_count: Current frame number
+            brightness: Mean grayscale value of the face crop
+        
+        Returns:
+            True for new tracks, expired intervals, scale or lighting changes
+        """
+        cache = track.cache
+        if f"{self.name}_frame" not in cache:
+            return True
+        
+        _, _, cached_w, cached_h = cache[f"{self.name}_bbox"]
+        _, _, w, h = track.bbox
+        scale = (w * h) / float(max(cached_w * cached_h, 1))
+        if scale > self.scale_change or scale < 1.0 / self.scale_change:
+            self._reset(cache, "scale")
+            return True
+        
+        if abs(brightness - cache[f"{self.name}_brightness"]) > self.brightness_shift:
+            self._reset(cache, "lighting")
+            return True
+        
+        return frame_count - cache[f"{self.name}_frame"] >= cache[f"{self.name}_interval"]
+    
+    def record(self, track, frame_count, brightness, labels, confidences):
+        """
+        Store a fresh run and adapt the track's interval
+        
+        Args:
+            track: Track the prediction was made for
+            frame_count: Current frame number
+            brightness: Mean grayscale value of the face crop
+            labels: Tuple of predicted labels (e.g. age range, gender)
+            confidences: Tuple of their confidences
+        """
+        cache = track.cache
+        confidence = min(confidences)
+        previous_labels = cache.get(f"{self.name}_labels")
+        previous_confidence = cache.get(f"{self.name}_confidence")
+        # Scale or lighting reset that made due() force this run
+        forced = cache.pop(f"{self.name}_forced", None)
+        
+        if previous_labels is None:
+            interval, reason = self.min_interval, "new"
+        elif forced is not None:
+            # Stay at the minimum after a forced refresh; due() counted the reset
+            interval, reason = self.min_interval, forced
+        elif labels != previous_labels:
+            interval, reason = self.min_interval, "labels"
+        elif confidence < self.min_confidence or previous_confidence - confidence > self.confidence_drop:
+            interval, reason = self.min_interval, "confidence"
+        else:
+            # Stable and confident: back off
+            interval = min(cache[f"{self.name}_interval"] * self.backoff, self.max_interval)
+            reason = None
+        
+        cache.update({
+            f"{self.name}_frame": frame_count,
+            f"{self.name}_bbox": track.bbox,
+            f"{self.name}_brightness": float(brightness),
+            f"{self.name}_labels": labels,
+            f"{self.name}_confidence": confidence,
+            f"{self.name}_interval": interval
+        })
+        
+        with self.lock:
+            self.stats["invocations"] += 1
+            if reason is None:
+                self.stats["backoffs"] += 1
+            elif forced is None:
+                self.stats["resets"][reason] += 1
+    
+    def _reset(self, cache, reason):
+        """Drop a track's interval back to the minimum and force a run"""
+        cache[f"{self.name}_interval"] = self.min_interval
+        cache[f"{self.name}_forced"] = reason
+        with self.lock:
+            self.stats["resets"][reason] += 1
+    
+    def get_stats(self):
+        """
+        Invocation counts and savings since the first frame
+        
+        Returns:
+            dict with face_frames, invocations, the invocations a fixed
+            reference_interval would have made, and per-minute savings
+            against it and against running on every frame
+        """
+        with self.lock:
+            stats = {
+                "face_frames": self.stats["face_frames"],
+                "invocations": self.stats["invocations"],
+                "backoffs": self.stats["backoffs"],
+                "resets": dict(self.stats["resets"])
+            }
+            started_at = self.started_at
+        
+        minutes = (time.monotonic() - started_at) / 60 if started_at else 0.0
+        fixed = stats["face_frames"] / self.reference_interval
+        stats.update({
+            "minutes": round(minutes, 2),
+            "fixed_interval": self.reference_interval,
+            "fixed_invocations": round(fixed),
+            "invocations_per_minute": round(stats["invocations"] / minutes, 1) if minutes else 0.0,
+            "saved_vs_fixed_per_minute": round((fixed - stats["invocations"]) / minutes, 1) if minutes else 0.0,
+            "saved_vs_every_frame_per_minute": (
+                round((stats["face_frames"] - stats["invocations"]) / minutes, 1) if minutes else 0.0
+            )
+        })
+        return stats
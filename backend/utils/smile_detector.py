@@ -1,4 +1,6 @@
 import cv2
+import numpy as np
+from .frame_context import as_gray
 
 class SmileDetector:
     """
@@ -25,7 +27,7 @@ class SmileDetector:
         Detect smile in face image
         
         Args:
-            face_image: Face image (BGR or grayscale)
+            face_image: Face image (BGR or grayscale) or FrameContext crop
             min_neighbors: Detection sensitivity (higher = stricter)
             
         Returns:
@@ -33,10 +35,7 @@ class SmileDetector:
             confidence: Number of smile detections (higher = more confident)
         """
         # Convert to grayscale if needed
-        if len(face_image.shape) == 3:
-            gray = cv2.cvtColor(face_image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = face_image
+        gray = as_gray(face_image)
         
         # Detect smiles
         smiles = self.smile_cascade.detectMultiScale(
@@ -57,7 +56,7 @@ class SmileDetector:
         Get normalized smile score (0.0 to 1.0)
         
         Args:
-            face_image: Face image
+            face_image: Face image (BGR or grayscale) or FrameContext crop
             
         Returns:
             smile_score: Float between 0.0 (not smiling) and 1.0 (smiling)
@@ -69,3 +68,188 @@ class SmileDetector:
         smile_score = min(confidence / 5.0, 1.0)
         
         return smile_score
+
+
+class SmileEngine:
+    """
+    Smile scoring restricted to the mouth region of each face
+    
+    The smile cascade only runs on a lower-face ROI resized to one canonical
+    size, so each face costs the same however close the person stands, and
+    the number of cascade neighbours means the same thing at every distance.
+    That neighbour count is mapped through a logistic curve to a continuous
+    score in (0, 1). score_batch() tiles all faces' ROIs into one image and
+    runs a single detectMultiScale2 call for the whole frame.
+    
+    The default curve is hand-picked, not fitted to data, so its scores
+    rank faces but are not probabilities. Fit one on labelled face crops
+    with fit_smile_calibration (python benchmark_smile_detection.py --fit)
+    and pass it as calibration to get calibrated scores.
+    """
+    
+    def __init__(
+        self,
+        cascade_path="models/haarcascade_smile.xml",
+        roi=(0.15, 0.55, 0.85, 0.95),
+        canonical_size=(96, 56),
+        min_neighbors=3,
+        calibration=(8.0, 2.5)
+    ):
+        """
+        Initialize smile engine
+        
+        Args:
+            cascade_path: Path to Haar Cascade XML file
+            roi: Mouth region as (x0, y0, x1, y1) fractions of the face box
+            canonical_size: (width, height) every ROI is resized to
+            min_neighbors: Neighbours needed before a detection counts
+            calibration: (midpoint, spread) of the logistic mapping from
+                neighbour count to score; the default is hand-picked, fit
+                one with fit_smile_calibration
+        """
+        self.smile_cascade = cv2.CascadeClassifier(cascade_path)
+        
+        if self.smile_cascade.empty():
+            raise Exception(f"Failed to load smile cascade from {cascade_path}")
+        
+        self.roi = roi
+        self.canonical_size = canonical_size
+        self.min_neighbors = min_neighbors
+        self.calibration = calibration
+        
+        # Blank border around each tile keeps detections from straddling faces
+        self.tile_gap = 8
+        
+        print("✅ Smile Engine initialized successfully")
+    
+    def mouth_roi(self, face_image):
+        """
+        Lower-face ROI of a face, resized to the canonical size
+        
+        Args:
+            face_image: Face image (BGR or grayscale) or FrameContext crop
+            
+        Returns:
+            Grayscale (height, width) image at canonical_size
+        """
+        gray = as_gray(face_image)
+        h, w = gray.shape[:2]
+        x0, y0, x1, y1 = self.roi
+        region = gray[int(y0 * h):max(int(y1 * h), int(y0 * h) + 1), int(x0 * w):max(int(x1 * w), int(x0 * w) + 1)]
+        return cv2.resize(region, self.canonical_size, interpolation=cv2.INTER_AREA)
+    
+    def raw_scores_batch(self, face_images):
+        """
+        Strongest smile detection per face, as a cascade neighbour count
+        
+        Args:
+            face_images: List of face images or FrameContext crops
+            
+        Returns:
+            (N,) float array, 0 where no smile was found
+        """
+        count = len(face_images)
+        if count == 0:
+            return np.zeros(0)
+        
+        width, height = self.canonical_size
+        gap = self.tile_gap
+        stride = height + gap
+        
+        # Stack the canonical ROIs vertically with a blank gap between them
+        mosaic = np.zeros((gap + count * stride, width + 2 * gap), dtype=np.uint8)
+        for i, face_image in enumerate(face_images):
+            top = gap + i * stride
+            mosaic[top:top + height, gap:gap + width] = self.mouth_roi(face_image)
+        
+        smiles, neighbours = self.smile_cascade.detectMultiScale2(
+            mosaic,
+            scaleFactor=1.1,
+            minNeighbors=self.min_neighbors,
+            minSize=(36, 18),
+            maxSize=(width, height)
+        )
+        
+        raw = np.zeros(count)
+        for (x, y, w, h), n in zip(smiles, np.ravel(neighbours)):
+            tile, offset = divmod(int(y) - gap, stride)
+            # Keep only detections that lie inside one tile
+            if 0 <= tile < count and offset + h <= height:
+                raw[tile] = max(raw[tile], n)
+        return raw
+    
+    def calibrate(self, raw_scores):
+        """Map neighbour counts to scores in (0, 1) through the logistic curve"""
+        midpoint, spread = self.calibration
+        scores = 1.0 / (1.0 + np.exp(-(np.asarray(raw_scores, dtype=np.float64) - midpoint) / spread))
+        # No detection at all is never a smile
+        return np.where(np.asarray(raw_scores) > 0, scores, 0.0)
+    
+    def score_batch(self, face_images):
+        """
+        Smile scores for every face of a frame in one cascade call
+        
+        Args:
+            face_images: List of face images or FrameContext crops
+            
+        Returns:
+            (N,) float array of scores in [0, 1)
+        """
+        return self.calibrate(self.raw_scores_batch(face_images))
+    
+    def get_smile_score(self, face_image):
+        """Smile score (0.0 to 1.0) of one face"""
+        return float(self.score_batch([face_image])[0])
+
+
+def fit_smile_calibration(raw_scores, labels, iterations=50, regularization=1.0):
+    """
+    Fit SmileEngine's logistic calibration to labelled faces
+    
+    Args:
+        raw_scores: Neighbour counts from SmileEngine.raw_scores_batch
+        labels: 1 for smiling faces, 0 otherwise
+        iterations: Newton steps
+        regularization: L2 penalty on the slope; keeps the fit finite when
+            the labelled set is perfectly separable
+        
+    Returns:
+        (midpoint, spread) to pass as SmileEngine(calibration=...)
+    
+    Raises:
+        ValueError: If the fitted slope is not positive, i.e. the raw scores
+            are constant (e.g. the cascade found nothing on any face) or do
+            not rise with smiling; keep the default curve in that case
+    """
+    x = np.asarray(raw_scores, dtype=np.float64)
+    y = np.asarray(labels, dtype=np.float64)
+    
+    def loss(a, b):
+        z = a * x + b
+        return np.sum(np.logaddexp(0.0, z) - y * z) + 0.5 * regularization * a * a
+    
+    # 1-D logistic regression p = sigmoid(a * x + b) by Newton's method,
+    # starting from the flat fit (a = 0, b = log-odds of the labels) and
+    # halving steps that do not lower the penalized loss
+    base_rate = np.clip(y.mean(), 1e-3, 1 - 1e-3)
+    a, b = 0.0, float(np.log(base_rate / (1.0 - base_rate)))
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(-np.clip(a * x + b, -50.0, 50.0)))
+        weight = p * (1.0 - p) + 1e-9
+        gradient = np.array([np.sum((p - y) * x) + regularization * a, np.sum(p - y)])
+        hessian = np.array([
+            [np.sum(weight * x * x) + regularization, np.sum(weight * x)],
+            [np.sum(weight * x), np.sum(weight)]
+        ]) + 1e-6 * np.eye(2)
+        step = np.linalg.solve(hessian, gradient)
+        
+        current = loss(a, b)
+        scale = 1.0
+        while scale > 1e-4 and loss(a - scale * step[0], b - scale * step[1]) > current:
+            scale /= 2
+        a, b = a - scale * step[0], b - scale * step[1]
+    
+    if a <= 1e-6:
+        raise ValueError(f"Raw smile scores do not separate the labels (fitted slope {a:.3g})")
+    
+    return float(-b / a), float(1.0 / a)
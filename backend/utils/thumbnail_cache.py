@@ -0,0 +1,255 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+# Width presets; requested widths snap up to the nearest one
+THUMBNAIL_WIDTHS = (160, 320, 640, 1280)
+
+FORMATS = {
+    "jpeg": (".jpg", "image/jpeg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", "image/webp", cv2.IMWRITE_WEBP_QUALITY)
+}
+
+
+class ThumbnailCache:
+    """
+    Bounded on-disk LRU cache of resized gallery images
+    
+    Variants are keyed by source file, width preset and format, and are
+    regenerated when the source is newer than the cached file. The least
+    recently served variants are evicted once the cache exceeds max_bytes.
+    """
+    
+    def __init__(
+        self,
+        source_dir,
+        cache_dir="thumbnail_cache",
+        max_bytes=256 * 1024 * 1024,
+        quality=80,
+        eager_widths=(320,),
+        eager_formats=("webp", "jpeg"),
+        workers=2
+    ):
+        """
+        Initialize thumbnail cache
+        
+        Args:
+            source_dir: Directory holding the full-size images
+            cache_dir: Directory for generated variants
+            max_bytes: Cache size above which variants are evicted
+            quality: JPEG/WebP quality of the variants
+            eager_widths: Widths generated right after a capture
+            eager_formats: Formats generated right after a capture
+            workers: Threads generating variants
+        """
+        self.source_dir = source_dir
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.quality = quality
+        self.eager_widths = eager_widths
+        self.eager_formats = eager_formats
+        os.makedirs(self.cache_dir, exist_ok=True)
+        
+        # Variant path -> size, least recently used first
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        
+        # Striped locks so one variant is generated by one thread at a time
+        self.key_locks = [threading.Lock() for _ in range(64)]
+        
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        
+        self._load_existing()
+    
+    @staticmethod
+    def snap_width(width):
+        """Round a requested width up to the nearest preset"""
+        for preset in THUMBNAIL_WIDTHS:
+            if width <= preset:
+                return preset
+        return THUMBNAIL_WIDTHS[-1]
+    
+    def variant_path(self, filename, width, fmt):
+        """Cache file of one variant"""
+        stem = os.path.splitext(filename)[0]
+        return os.path.join(self.cache_dir, f"{stem}_w{width}{FORMATS[fmt][0]}")
+    
+    def get(self, filename, width, fmt="jpeg"):
+        """
+        Get a variant, generating it if missing or stale (blocking)
+        
+        Args:
+            filename: Image file name inside source_dir
+            width: Requested width (snapped to a preset)
+            fmt: "jpeg" or "webp"
+        
+        Returns:
+            (path, media_type), or (None, None) if the source image is gone
+        
+        Raises:
+            ValueError: On an unknown format
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown thumbnail format: {fmt}")
+        
+        source_path = os.path.join(self.source_dir, filename)
+        try:
+            source_mtime = os.stat(source_path).st_mtime
+        except OSError:
+            self.remove(filename)
+            return None, None
+        
+        width = self.snap_width(width)
+        path = self.variant_path(filename, width, fmt)
+        
+        # Concurrent requests for the same variant wait for one generator
+        with self.key_locks[hash(path) % len(self.key_locks)]:
+            try:
+                stat = os.stat(path)
+                fresh = stat.st_mtime >= source_mtime
+            except OSError:
+                fresh = False
+            
+            if fresh:
+                with self.lock:
+                    self.hits += 1
+                    if path in self.entries:
+                        self.entries.move_to_end(path)
+                    else:
+                        self.entries[path] = stat.st_size
+                        self.total_bytes += stat.st_size
+            else:
+                with self.lock:
+                    self.misses += 1
+                if not self._generate(source_path, path, width, fmt):
+                    return None, None
+        
+        return path, FORMATS[fmt][1]
+    
+    def generate_async(self, filename):
+        """Queue the eager variants of a new capture on the cache's threads"""
+        for width in self.eager_widths:
+            for fmt in self.eager_formats:
+                self.executor.submit(self._generate_quietly, filename, width, fmt)
+    
+    def remove(self, filename):
+        """Drop every cached variant of an image"""
+        for width in THUMBNAIL_WIDTHS:
+            for fmt in FORMATS:
+                path = self.variant_path(filename, width, fmt)
+                self._forget(path)
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+    
+    def clear(self):
+        """Drop every cached variant"""
+        with self.lock:
+            paths = list(self.entries)
+            self.entries.clear()
+            self.total_bytes = 0
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    def shutdown(self):
+        """Stop the generator threads"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    def get_stats(self):
+        """Get cache size and hit/miss/eviction counters"""
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+    
+    def _generate_quietly(self, filename, width, fmt):
+        try:
+            self.get(filename, width, fmt)
+        except Exception as e:
+            print(f"⚠️ Thumbnail generation failed for {filename}: {e}")
+    
+    def _generate(self, source_path, path, width, fmt):
+        """
+        Resize and encode one variant, then account for it in the LRU
+        
+        Returns:
+            True if the variant was written
+        """
+        image = cv2.imread(source_path)
+        if image is None:
+            return False
+        
+        h, w = image.shape[:2]
+        if w > width:
+            # INTER_AREA avoids aliasing when shrinking
+            image = cv2.resize(image, (width, round(h * width / w)), interpolation=cv2.INTER_AREA)
+        
+        ok, buffer = cv2.imencode(FORMATS[fmt][0], image, [FORMATS[fmt][2], self.quality])
+        if not ok:
+            return False
+        
+        # Write then rename so readers never see a partial file
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buffer)
+        os.replace(tmp_path, path)
+        
+        with self.lock:
+            self.total_bytes -= self.entries.pop(path, 0)
+            self.entries[path] = len(buffer)
+            self.total_bytes += len(buffer)
+        self._evict()
+        return True
+    
+    def _forget(self, path):
+        with self.lock:
+            self.total_bytes -= self.entries.pop(path, 0)
+    
+    def _evict(self):
+        """Delete least recently used variants until the cache fits"""
+        while True:
+            with self.lock:
+                if self.total_bytes <= self.max_bytes or len(self.entries) <= 1:
+                    return
+                path, size = self.entries.popitem(last=False)
+                self.total_bytes -= size
+                self.evictions += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    def _load_existing(self):
+        """Rebuild the LRU order from the cache directory (oldest access first)"""
+        files = []
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                if entry.name.endswith(".tmp"):
+                    os.remove(entry.path)
+                    continue
+                stat = entry.stat()
+                files.append((stat.st_atime, entry.path, stat.st_size))
+        
+        for _, path, size in sorted(files):
+            self.entries[path] = size
+            self.total_bytes += size
+        self._evict()
@@ -2,103 +2,267 @@ import cv2
 import numpy as np
 import base64
 from datetime import datetime
+import json
 import os
 from .face_detector import FaceDetector
-from .age_predictor import AgePredictor
+from .age_predictor import AgePredictor, age_midpoint
 from .gender_predictor import GenderPredictor
+from .age_gender_predictor import AgeGenderPredictor
 from .emotion_predictor import EmotionPredictor
-from .smile_detector import SmileDetector  # NEW
+from .smile_detector import SmileDetector, SmileEngine  # NEW
+from .face_tracker import FaceTracker
+from .capture_writer import unique_capture_filename
+from .frame_context import FrameContext
+from .inference_scheduler import InferenceScheduler
+from .refresh_policy import AdaptiveRefresh
+
+
+def settings_from_env():
+    """
+    Model settings shared by every VideoProcessor the server or the batch
+    workers create, read from SMILAGE_* environment variables
+    
+    Returns:
+        dict: VideoProcessor keyword arguments
+    """
+    return {
+        # Age/gender inference backend: opencv (default), onnxruntime or
+        # onnxruntime-int8 (the latter two need the artifacts from download_models.py)
+        "inference_backend": os.environ.get("SMILAGE_INFERENCE_BACKEND", "opencv"),
+        # SMILAGE_FUSED_AGE_GENDER=1 runs both nets as one model with two heads
+        "fused_age_gender": os.environ.get("SMILAGE_FUSED_AGE_GENDER", "0") == "1",
+        # Smile scoring: mouth (batched mouth-region engine, default) or haar (whole face)
+        "smile_engine": os.environ.get("SMILAGE_SMILE_ENGINE", "mouth"),
+        # Per-face stage scheduling overrides as JSON, e.g.
+        # {"gates": {"min_blur": 50}, "stages": {"emotion": {"interval": 2}}}
+        "inference_policy": json.loads(os.environ.get("SMILAGE_INFERENCE_POLICY", "{}"))
+    }
+
 
 class VideoProcessor:
     """
     Main video processing service that coordinates all AI models
     """
     
-    def __init__(self):
-        """Initialize all AI models"""
+    def __init__(
+        self,
+        detection_mode="roi",
+        inference_backend="opencv",
+        backend_options=None,
+        fused_age_gender=False,
+        smile_engine="mouth",
+        inference_policy=None,
+        refresh_options=None
+    ):
+        """
+        Initialize all AI models
+        
+        Args:
+            detection_mode: FaceDetector mode; "roi" for video streams,
+                "full" for standalone images
+            inference_backend: Age/gender backend ("opencv", "onnxruntime"
+                or "onnxruntime-int8")
+            backend_options: Options for that backend (see inference_backend)
+            fused_age_gender: Run age and gender as one fused model
+                (models/age_gender_net.onnx) instead of two separate nets
+            smile_engine: "mouth" for the batched mouth-region SmileEngine
+                (logistic score), "haar" for the whole-face SmileDetector
+            inference_policy: Overrides for the per-face stage scheduling
+                policy (see inference_scheduler.DEFAULT_POLICY)
+            refresh_options: Options for the adaptive age/gender refresh
+                (see refresh_policy.AdaptiveRefresh)
+        """
         print("🤖 Initializing Video Processor...")
         
-        self.detector = FaceDetector()
-        self.age_predictor = AgePredictor()
-        self.gender_predictor = GenderPredictor()
+        self.detector = FaceDetector(mode=detection_mode)
+        if fused_age_gender:
+            self.age_gender_predictor = AgeGenderPredictor(backend=inference_backend, backend_options=backend_options)
+            self.age_predictor = None
+            self.gender_predictor = None
+        else:
+            self.age_gender_predictor = None
+            self.age_predictor = AgePredictor(backend=inference_backend, backend_options=backend_options)
+            self.gender_predictor = GenderPredictor(backend=inference_backend, backend_options=backend_options)
         self.emotion_predictor = EmotionPredictor()
-        self.smile_detector = SmileDetector()
+        if smile_engine == "mouth":
+            self.smile_detector = SmileEngine()
+        elif smile_engine == "haar":
+            self.smile_detector = SmileDetector()
+        else:
+            raise ValueError(f"Unknown smile engine: {smile_engine}")
         
         # Settings - CHANGE THIS
-        self.smile_threshold = 0.15  # Changed from 0.5 to 0.15
+        # SmileEngine scores sit on a 0-1 logistic curve centred at 0.5; the
+        # whole-face Haar score stays on its old 0.15 operating point
+        self.smile_threshold = 0.5 if smile_engine == "mouth" else 0.15
         self.capture_dir = "captured_images"
         os.makedirs(self.capture_dir, exist_ok=True)
         
+        # Optional GalleryIndex kept in sync with every capture, and
+        # ThumbnailCache warmed with each capture's gallery variants
+        self.gallery_index = None
+        self.thumbnail_cache = None
+        
         # Frame counter for optimization
         self.frame_count = 0
         
-        # Cached predictions
-        self.last_predictions = {}
+        # Per-person tracking; age/gender/emotion/smile are cached on each track
+        self.tracker = FaceTracker()
+        
+        # Which stages run for which face on each frame
+        self.scheduler = InferenceScheduler(inference_policy)
+        
+        # Reasons smile is currently needed (armed auto-capture, subscribed
+        # clients); smile is only evaluated while this is non-empty
+        self.smile_demand = set()
+        
+        # Per-track age/gender refresh interval: backs off while results
+        # stay stable and confident, resets on confidence, scale or
+        # lighting changes
+        self.age_gender_refresh = AdaptiveRefresh(**(refresh_options or {}))
         
         print("✅ Video Processor initialized successfully!")
 
 
     
-    def process_frame(self, frame):
+    def process_frame(self, frame, smile=None):
         """
         Process a single frame and return predictions
         
         Args:
-            frame: Input frame (BGR format)
+            frame: Input frame (BGR format) or FrameContext
+            smile: Force smile evaluation on/off; None follows smile_demand
             
         Returns:
             dict: Predictions including age, gender, emotion, faces, etc.
         """
         self.frame_count += 1
         
+        # Grayscale (and the detector's downscaled level) computed once per frame
+        context = FrameContext.wrap(frame)
+        frame = context.frame
+        
         # Detect faces (fast, do every frame)
-        faces = self.detector.detect_faces(frame)
+        faces = self.detector.detect_faces(context)
         
         predictions = {
             "faces": [],
+            "frame_width": int(frame.shape[1]),
+            "frame_height": int(frame.shape[0]),
             "frame_number": self.frame_count,
             "timestamp": datetime.now().isoformat()
         }
         
-        # Process each face
+        # Gather every valid face crop first so the models can run batched;
+        # crops are views into the frame and its shared grayscale
+        face_boxes = []
+        face_images = []
         for (x, y, w, h) in faces:
-            face_img = frame[y:y+h, x:x+w]
-            
-            # Skip too small faces
-            if face_img.shape[0] < 50 or face_img.shape[1] < 50:
+            # Gate 1: skip too small faces
+            if not self.scheduler.size_gate(w, h):
                 continue
             
-            # Check image quality
-            is_clear, blur_score = self.detector.check_blur(face_img)
+            face_boxes.append((x, y, w, h))
+            face_images.append(context.crop(x, y, w, h))
+        
+        # Assign stable per-person track IDs (also ages out lost tracks)
+        tracks = self.tracker.update(face_boxes)
+        
+        if not face_images:
+            return predictions
+        
+        # Gate 2: image quality for all faces from one frame-level Laplacian
+        clear_flags, blur_scores = self.detector.check_blur_batch(context, face_boxes)
+        sharp = self.scheduler.blur_gate(blur_scores)
+        
+        # Expensive stages only for the faces the scheduler picks; the rest
+        # keep their track's cached results
+        if smile is None:
+            smile = bool(self.smile_demand)
+        brightness = {
+            track.track_id: float(cv2.mean(face.gray)[0])
+            for track, face in zip(tracks, face_images)
+        }
+        self.age_gender_refresh.observe(len(tracks))
+        
+        run_emotion = self.scheduler.plan("emotion", tracks, sharp, self.frame_count)
+        stale = self.scheduler.plan(
+            "age_gender", tracks, sharp, self.frame_count,
+            due=lambda track: self.age_gender_refresh.due(track, self.frame_count, brightness[track.track_id])
+        )
+        run_smile = self.scheduler.plan("smile", tracks, sharp, self.frame_count, demanded=smile)
+        
+        try:
+            # One (N, 1, 64, 64) tensor for the scheduled faces
+            emotion_results = self.emotion_predictor.predict_emotion_batch([face_images[i] for i in run_emotion])
+            
+            # Age/gender for the stale faces only: one shared blob and run
+            # when fused, otherwise one blob per network
+            stale_images = [face_images[i] for i in stale]
+            if self.age_gender_predictor is not None:
+                age_results, gender_results = self.age_gender_predictor.predict_age_gender_batch(stale_images)
+            else:
+                age_results = self.age_predictor.predict_age_batch(stale_images)
+                gender_results = self.gender_predictor.predict_gender_batch(stale_images)
             
-            # Run predictions
+            # Smile for the scheduled faces (one cascade call with SmileEngine)
+            smile_images = [face_images[i] for i in run_smile]
+            if isinstance(self.smile_detector, SmileEngine):
+                smile_scores = self.smile_detector.score_batch(smile_images)
+            else:
+                smile_scores = [self.smile_detector.get_smile_score(face) for face in smile_images]
+        except Exception as e:
+            print(f"⚠️ Error processing faces: {e}")
+            import traceback
+            traceback.print_exc()
+            return predictions
+        
+        # Update per-track caches
+        for i, result in zip(run_emotion, emotion_results):
+            tracks[i].cache.update({
+                'emotion': result,
+                'emotion_frame': self.frame_count
+            })
+        for i, score in zip(run_smile, smile_scores):
+            tracks[i].cache.update({
+                'smile': float(score),
+                'smile_frame': self.frame_count
+            })
+        
+        for i, (age_result, gender_result) in zip(stale, zip(age_results, gender_results)):
+            age_range, age_conf = age_result
+            gender, gender_conf = gender_result
+            tracks[i].cache.update({
+                'age': str(age_range),
+                'age_mid': int(age_midpoint(age_range)),
+                'age_conf': float(age_conf),
+                'gender': str(gender),
+                'gender_conf': float(gender_conf)
+            })
+            self.age_gender_refresh.record(
+                tracks[i], self.frame_count, brightness[tracks[i].track_id],
+                (str(age_range), str(gender)), (float(age_conf), float(gender_conf))
+            )
+        
+        # Build per-face results
+        for i, ((x, y, w, h), face_img) in enumerate(zip(face_boxes, face_images)):
             try:
-                # IMPORTANT: Run emotion EVERY SINGLE FRAME for real-time updates
-                emotion, emotion_conf, all_emotions = self.emotion_predictor.predict_emotion(face_img)
+                track = tracks[i]
+                is_clear, blur_score = clear_flags[i], blur_scores[i]
                 
-                # Run age/gender every 10 frames (these can be slower)
-                if self.frame_count % 10 == 0 or len(self.last_predictions) == 0:
-                    age_range, age_conf = self.age_predictor.predict_age(face_img)
-                    gender, gender_conf = self.gender_predictor.predict_gender(face_img)
-                    age_mid = self.age_predictor.get_age_midpoint(age_range)
-                    
-                    # Cache these predictions
-                    self.last_predictions['age'] = str(age_range)
-                    self.last_predictions['age_mid'] = int(age_mid)
-                    self.last_predictions['age_conf'] = float(age_conf)
-                    self.last_predictions['gender'] = str(gender)
-                    self.last_predictions['gender_conf'] = float(gender_conf)
+                # Nothing cached yet when the policy makes emotion on-demand
+                emotion, emotion_conf, all_emotions = track.cache.get('emotion', ('Unknown', 0.0, {}))
                 
-                # Use cached age/gender (updated every 10 frames)
-                age_range = self.last_predictions.get('age', 'Unknown')
-                age_mid = self.last_predictions.get('age_mid', 0)
-                age_conf = self.last_predictions.get('age_conf', 0.0)
-                gender = self.last_predictions.get('gender', 'Unknown')
-                gender_conf = self.last_predictions.get('gender_conf', 0.0)
+                # Use this person's cached age/gender
+                age_range = track.cache.get('age', 'Unknown')
+                age_mid = track.cache.get('age_mid', 0)
+                age_conf = track.cache.get('age_conf', 0.0)
+                gender = track.cache.get('gender', 'Unknown')
+                gender_conf = track.cache.get('gender_conf', 0.0)
                 
-                # Check for smile - USE FRESH EMOTION DATA
-                # NEW: Check for smile using Haar Cascade (WORKS!)
-                smile_score = self.smile_detector.get_smile_score(face_img)
+                # Check for smile using Haar Cascade (last evaluated score
+                # while nobody needs smile)
+                smile_score = track.cache.get('smile', 0.0)
                 is_smiling = bool(smile_score > self.smile_threshold)
                 
                 # Still get emotion for display purposes
@@ -110,6 +274,7 @@ class VideoProcessor:
                     print(f"Frame {self.frame_count}: Happiness={happiness_score:.3f}, Neutral={neutral_score:.3f}, Smiling={is_smiling}")
                 
                 face_data = {
+                    "track_id": int(track.track_id),
                     "bbox": {
                         "x": int(x), 
                         "y": int(y), 
@@ -124,14 +289,13 @@ class VideoProcessor:
                     "emotion": str(emotion),
                     "emotion_confidence": float(emotion_conf),
                     "happiness_score": happiness_score,
-                    "smile_score": float(smile_score),  # NEW: Real smile score
+                    "smile_score": float(smile_score),
                     "neutral_score": neutral_score,
-                    "is_smiling": is_smiling,  # Now based on Haar Cascade
+                    "is_smiling": is_smiling,  # Based on Haar Cascade
                     "is_clear": bool(is_clear),
                     "blur_score": float(blur_score),
                     "all_emotions": {k: float(v) for k, v in all_emotions.items()}
                 }
-
                 
                 predictions["faces"].append(face_data)
                 
@@ -142,6 +306,21 @@ class VideoProcessor:
                 continue
         
         return predictions
+    
+    def analyze_image(self, image):
+        """
+        Process a standalone image with no state carried over from earlier
+        calls (tracks, ROI search, cached age/gender)
+        
+        Args:
+            image: Input image (BGR format)
+            
+        Returns:
+            dict: Predictions in the same schema as process_frame
+        """
+        self.tracker.reset()
+        self.detector.reset()
+        return self.process_frame(image, smile=True)
 
     
     def draw_predictions(self, frame, predictions):
@@ -195,7 +374,7 @@ class VideoProcessor:
             dict: Info about captured image
         """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"selfie_{timestamp}.jpg"
+        filename = unique_capture_filename(self.capture_dir)
         filepath = os.path.join(self.capture_dir, filename)
         
         # Draw predictions on frame
@@ -204,6 +383,11 @@ class VideoProcessor:
         # Save image
         cv2.imwrite(filepath, annotated_frame)
         
+        if self.gallery_index is not None:
+            self.gallery_index.add(filename, predictions)
+        if self.thumbnail_cache is not None:
+            self.thumbnail_cache.generate_async(filename)
+        
         return {
             "filename": filename,
             "filepath": filepath,
@@ -211,6 +395,21 @@ class VideoProcessor:
             "predictions": predictions
         }
     
+    def encode_frame_to_jpeg(self, frame, quality=None):
+        """
+        Encode frame to JPEG
+        
+        Args:
+            frame: Input frame
+            quality: JPEG quality (0-100), or None for the OpenCV default
+            
+        Returns:
+            1-D uint8 array holding the JPEG bytes (the cv2.imencode buffer)
+        """
+        params = [] if quality is None else [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+        _, buffer = cv2.imencode('.jpg', frame, params)
+        return buffer
+    
     def encode_frame_to_base64(self, frame):
         """
         Encode frame to base64 for sending over WebSocket
@@ -221,7 +420,7 @@ class VideoProcessor:
         Returns:
             Base64 encoded string
         """
-        _, buffer = cv2.imencode('.jpg', frame)
+        buffer = self.encode_frame_to_jpeg(frame)
         jpg_as_text = base64.b64encode(buffer).decode('utf-8')
         return jpg_as_text
     
@@ -229,3 +428,16 @@ class VideoProcessor:
         """Update smile detection threshold"""
         self.smile_threshold = max(0.0, min(1.0, threshold))
         return self.smile_threshold
+    
+    def set_smile_demand(self, reason, needed):
+        """
+        Register or drop a reason to evaluate smile on every frame
+        
+        Args:
+            reason: Key such as "auto_capture:<subscriber>"
+            needed: True to add the reason, False to remove it
+        """
+        if needed:
+            self.smile_demand.add(reason)
+        else:
+            self.smile_demand.discard(reason)
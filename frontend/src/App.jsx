@@ -6,21 +6,32 @@ function App() {
   const [cameraActive, setCameraActive] = useState(false)
   const [predictions, setPredictions] = useState(null)
   const [gallery, setGallery] = useState([])
-  const [smileThreshold, setSmileThreshold] = useState(0.15)
+  const [galleryCursor, setGalleryCursor] = useState(null)
+  const [smileThreshold, setSmileThreshold] = useState(0.5)
   const [systemInfo, setSystemInfo] = useState(null)
   const [error, setError] = useState(null)
   const [frameCount, setFrameCount] = useState(0)
+  const [overlayMode, setOverlayMode] = useState(false)
+  const [pacing, setPacing] = useState(null)
   
   const wsRef = useRef(null)
-  const videoRef = useRef(null)
+  const canvasRef = useRef(null)
+  const decodingRef = useRef(false)
+  const previewRef = useRef(null)
+  const overlayRef = useRef(null)
+  const localStreamRef = useRef(null)
 
-  // Fetch gallery
-  const fetchGallery = async () => {
+  // Fetch gallery (first page, or the page after `cursor` to append)
+  const GALLERY_PAGE_SIZE = 24
+  const fetchGallery = async (cursor = null) => {
     try {
-      const response = await fetch('/api/gallery')
+      const params = new URLSearchParams({ limit: GALLERY_PAGE_SIZE })
+      if (cursor) params.set('cursor', cursor)
+      const response = await fetch(`/api/gallery?${params}`)
       const data = await response.json()
       if (data.success) {
-        setGallery(data.images)
+        setGallery(prev => cursor ? [...prev, ...data.images] : data.images)
+        setGalleryCursor(data.next_cursor)
       }
     } catch (error) {
       console.error('Error fetching gallery:', error)
@@ -38,8 +49,110 @@ function App() {
     }
   }
 
+  // Draw a JPEG blob onto the video canvas
+  const drawFrame = async (jpeg) => {
+    // Latest frame wins: skip frames that arrive while one is still decoding
+    if (decodingRef.current) return
+    decodingRef.current = true
+    
+    try {
+      const bitmap = await createImageBitmap(jpeg)
+      const canvas = canvasRef.current
+      if (canvas) {
+        if (canvas.width !== bitmap.width || canvas.height !== bitmap.height) {
+          canvas.width = bitmap.width
+          canvas.height = bitmap.height
+        }
+        canvas.getContext('2d').drawImage(bitmap, 0, 0)
+      }
+      bitmap.close()
+    } catch (error) {
+      console.error('Error decoding frame:', error)
+    } finally {
+      decodingRef.current = false
+    }
+  }
+
+  // Clear the video canvas
+  const clearFrame = () => {
+    const canvas = canvasRef.current
+    if (canvas) {
+      canvas.getContext('2d').clearRect(0, 0, canvas.width, canvas.height)
+    }
+  }
+
+  // Draw boxes and labels for predictions on the overlay canvas
+  const drawOverlay = (preds) => {
+    const canvas = overlayRef.current
+    if (!canvas || !preds) return
+    
+    // Work in server frame coordinates; CSS scales the canvas over the preview
+    if (canvas.width !== preds.frame_width || canvas.height !== preds.frame_height) {
+      canvas.width = preds.frame_width
+      canvas.height = preds.frame_height
+    }
+    
+    const ctx = canvas.getContext('2d')
+    ctx.clearRect(0, 0, canvas.width, canvas.height)
+    ctx.font = '16px sans-serif'
+    
+    preds.faces.forEach((face) => {
+      const { x, y, w, h } = face.bbox
+      
+      // Green when smiling, blue otherwise
+      ctx.strokeStyle = face.is_smiling ? '#00ff00' : '#0000ff'
+      ctx.lineWidth = face.is_smiling ? 3 : 2
+      ctx.strokeRect(x, y, w, h)
+      
+      const texts = [
+        `Age: ${face.age_midpoint} ${face.age}`,
+        `Gender: ${face.gender}`,
+        `Emotion: ${face.emotion}`,
+        `Smile: ${face.smile_score.toFixed(2)}`
+      ]
+      if (face.is_smiling) {
+        texts.push('SMILING!')
+      }
+      
+      ctx.fillStyle = '#00ff00'
+      texts.forEach((text, i) => {
+        const yPos = y - 10 - (texts.length - i) * 25
+        ctx.fillText(text, x, Math.max(yPos, 20))
+      })
+    })
+  }
+
+  // Stop the local camera preview
+  const stopLocalPreview = () => {
+    if (localStreamRef.current) {
+      localStreamRef.current.getTracks().forEach(track => track.stop())
+      localStreamRef.current = null
+    }
+  }
+
+  // Handle a frame message (header + JPEG blob)
+  const handleFrame = (data, jpeg) => {
+    setFrameCount(prev => prev + 1)
+    
+    if (jpeg) {
+      drawFrame(jpeg)
+    }
+    
+    if (data.predictions) {
+      setPredictions(data.predictions)
+    }
+  }
+
+  // Parse a binary frame: 4-byte big-endian header length, JSON header, JPEG bytes
+  const parseBinaryFrame = (buffer) => {
+    const headerLength = new DataView(buffer).getUint32(0)
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 4, headerLength)))
+    const jpeg = new Blob([new Uint8Array(buffer, 4 + headerLength)], { type: 'image/jpeg' })
+    return { header, jpeg }
+  }
+
   // Start camera
-  const startCamera = () => {
+  const startCamera = async () => {
     if (wsRef.current) {
       console.log('WebSocket already connected')
       return
@@ -48,7 +161,24 @@ function App() {
     console.log('Connecting to WebSocket...')
     setError(null)
     
-    const ws = new WebSocket('ws://localhost:8000/ws')
+    // Overlay mode: show the local camera and draw server predictions on top
+    if (overlayMode) {
+      try {
+        localStreamRef.current = await navigator.mediaDevices.getUserMedia({ video: true })
+      } catch (error) {
+        console.error('Error opening local camera:', error)
+        setError('Could not open local camera preview')
+        return
+      }
+    }
+    
+    // Binary protocol: JPEG bytes arrive without base64 or JSON wrapping.
+    // Predictions mode: the server skips annotation and JPEG encoding.
+    const params = overlayMode
+      ? 'protocol=binary&mode=predictions&preview_every=0'
+      : 'protocol=binary'
+    const ws = new WebSocket(`ws://localhost:8000/ws?${params}`)
+    ws.binaryType = 'arraybuffer'
     
     ws.onopen = () => {
       console.log('✅ WebSocket connected successfully')
@@ -59,21 +189,40 @@ function App() {
 
     ws.onmessage = (event) => {
       try {
+        if (event.data instanceof ArrayBuffer) {
+          const { header, jpeg } = parseBinaryFrame(event.data)
+          handleFrame(header, jpeg)
+          return
+        }
+        
         const data = JSON.parse(event.data)
         
         if (data.type === 'frame') {
-          setFrameCount(prev => prev + 1)
-          
-          if (videoRef.current && data.frame) {
-            videoRef.current.src = `data:image/jpeg;base64,${data.frame}`
-          }
-          
-          if (data.predictions) {
-            setPredictions(data.predictions)
+          // Legacy JSON protocol (base64 JPEG)
+          const jpeg = data.frame
+            ? new Blob([Uint8Array.from(atob(data.frame), c => c.charCodeAt(0))], { type: 'image/jpeg' })
+            : null
+          handleFrame(data, jpeg)
+        } else if (data.type === 'predictions') {
+          // Predictions-only message; draw the overlay locally
+          handleFrame(data, null)
+          drawOverlay(data.predictions)
+        } else if (data.type === 'pacing') {
+          // Server-chosen preview rate for this client
+          setPacing(data)
+        } else if (data.type === 'protocol' || data.type === 'stats') {
+          if (data.pacing) {
+            setPacing(data.pacing)
           }
         } else if (data.type === 'auto_capture' || data.type === 'capture_success') {
-          console.log('Image captured!')
+          // Queued for writing; capture_saved follows once it is on disk
+          console.log('Image captured!', data.image.filename)
+        } else if (data.type === 'capture_saved') {
           fetchGallery()
+        } else if (data.type === 'capture_failed') {
+          setError(`Capture failed: ${data.image.error}`)
+        } else if (data.type === 'capture_busy') {
+          console.warn('Capture queue full, try again shortly')
         } else if (data.type === 'error') {
           console.error('Backend error:', data.message)
           setError(data.message)
@@ -95,11 +244,11 @@ function App() {
       wsRef.current = null
       setFrameCount(0)
       setPredictions(null)
+      setPacing(null)
       
       // Clear video feed on disconnect
-      if (videoRef.current) {
-        videoRef.current.src = ''
-      }
+      clearFrame()
+      stopLocalPreview()
       
       if (event.code !== 1000) {
         setError('Connection closed unexpectedly')
@@ -119,9 +268,8 @@ function App() {
     }
     
     // Clear video feed immediately
-    if (videoRef.current) {
-      videoRef.current.src = ''
-    }
+    clearFrame()
+    stopLocalPreview()
     
     // Reset state
     setPredictions(null)
@@ -137,6 +285,17 @@ function App() {
     }
   }
 
+  // Load server-side settings (the default threshold depends on the smile engine)
+  const fetchSettings = async () => {
+    try {
+      const response = await fetch('/api/settings')
+      const data = await response.json()
+      setSmileThreshold(data.smile_threshold)
+    } catch (error) {
+      console.error('Error fetching settings:', error)
+    }
+  }
+
   // Update smile threshold
   const updateSmileThreshold = async (value) => {
     setSmileThreshold(value)
@@ -185,17 +344,26 @@ function App() {
   useEffect(() => {
     fetchGallery()
     fetchSystemInfo()
+    fetchSettings()
     
     const interval = setInterval(fetchSystemInfo, 2000)
     return () => clearInterval(interval)
   }, [])
 
+  // Attach the local camera stream once the preview element is rendered
+  useEffect(() => {
+    if (cameraActive && overlayMode && previewRef.current && localStreamRef.current) {
+      previewRef.current.srcObject = localStreamRef.current
+    }
+  }, [cameraActive, overlayMode])
+
   // Cleanup on unmount
   useEffect(() => {
     return () => {
       if (wsRef.current) {
         wsRef.current.close()
       }
+      stopLocalPreview()
     }
   }, [])
 
@@ -210,7 +378,17 @@ function App() {
         <div className="camera-section">
           <div className="video-container">
             {cameraActive ? (
-              <img ref={videoRef} className="video-feed" alt="Video feed" />
+              overlayMode ? (
+                <div style={{ position: 'relative' }}>
+                  <video ref={previewRef} className="video-feed" autoPlay muted playsInline />
+                  <canvas
+                    ref={overlayRef}
+                    style={{ position: 'absolute', top: 0, left: 0, width: '100%', height: '100%' }}
+                  />
+                </div>
+              ) : (
+                <canvas ref={canvasRef} className="video-feed" />
+              )
             ) : (
               <div style={{
                 width: '100%',
@@ -229,6 +407,7 @@ function App() {
             <div className="video-overlay">
               <span className={`status-indicator ${cameraActive ? 'active' : 'inactive'}`}></span>
               {cameraActive ? `Camera Active (${frameCount} frames)` : 'Camera Inactive'}
+              {cameraActive && pacing && ` · ${pacing.fps} fps · Q${pacing.jpeg_quality}`}
             </div>
             {error && (
               <div style={{
@@ -313,7 +492,7 @@ function App() {
               <div className="gallery-grid">
                 {gallery.map((img) => (
                   <div key={img.filename} className="gallery-item">
-                    <img src={img.url} alt={img.filename} />
+                    <img src={img.thumbnail_url} alt={img.filename} loading="lazy" />
                     <div className="gallery-item-overlay">
                       <button 
                         className="btn btn-danger btn-sm"
@@ -330,6 +509,11 @@ function App() {
                 <p>No captured images yet</p>
               </div>
             )}
+            {galleryCursor && (
+              <button className="btn btn-secondary btn-sm" onClick={() => fetchGallery(galleryCursor)}>
+                Load more
+              </button>
+            )}
           </div>
 
           <div className="settings">
@@ -339,13 +523,24 @@ function App() {
               <input
                 type="range"
                 min="0"
-                max="0.5"
+                max="1"
                 step="0.05"
                 value={smileThreshold}
                 onChange={(e) => updateSmileThreshold(parseFloat(e.target.value))}
               />
               <span className="setting-value">{smileThreshold.toFixed(2)}</span>
             </div>
+            <div className="setting-item">
+              <label>
+                <input
+                  type="checkbox"
+                  checked={overlayMode}
+                  disabled={cameraActive}
+                  onChange={(e) => setOverlayMode(e.target.checked)}
+                />
+                {' '}Client-side overlay (local preview)
+              </label>
+            </div>
           </div>
 
           {systemInfo && (